@@ -0,0 +1,614 @@
+#!/usr/bin/python3
+
+"""Benchmark of querPy's own overhead, independent of any real endpoint or google account.
+
+Starts a local stand-in for a SPARQL 1.1 protocol endpoint, which serves synthetic results (csv, tsv, json or xml) of
+chosen sizes after a chosen latency. Then runs querPy against it once per scenario, each in a fresh process writing
+into a local folder, a local xlsx file or a google sheets file (with the google api mocked, see Google_sheets_mock).
+
+For every scenario the wall time, the throughput of result rows, the peak memory (RSS) of the process and the seconds
+spent in every stage of the queries (see Query_data_object.stages in querPy.py) are reported and written into a json
+file, which can be compared with the one of another commit using '--compare'.
+
+Example:
+    python3 benchmark.py --rows 10000,100000 --queries 5 --output before.json
+    python3 benchmark.py --rows 10000,100000 --queries 5 --output after.json --compare before.json
+"""
+
+import argparse
+import datetime
+import http.server
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+
+
+formats = [ "csv", "tsv", "json", "xml" ]
+destination_types = [ "local_folder", "local_xlsx", "google_sheets" ]
+
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmarks querPy against a local stand-in SPARQL endpoint.")
+    parser.add_argument("--rows", default="10000", help="comma separated numbers of result rows per query (default: 10000)")
+    parser.add_argument("--queries", type=int, default=5, help="number of queries per scenario (default: 5)")
+    parser.add_argument("--latency", type=float, default=0, help="seconds the endpoint waits before responding (default: 0)")
+    parser.add_argument("--formats", default=",".join(formats), help="comma separated output formats for local folders and google sheets (default: " + ",".join(formats) + ")")
+    parser.add_argument("--destinations", default=",".join(destination_types), help="comma separated output destination types (default: " + ",".join(destination_types) + ")")
+    parser.add_argument("--settings", default="{}", help="json object of further settings for the query collection files, e.g. '{\"max_parallel_queries\": 4}'")
+    parser.add_argument("--page-size", type=int, default=None, help="executes the queries in pages of this many rows")
+    parser.add_argument("--sheets-latency", type=float, default=0, help="seconds every call to the mocked google api takes (default: 0)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs every scenario this many times, the fastest run is reported (default: 1)")
+    parser.add_argument("--output", default="benchmark_results.json", help="json file the results are written into (default: benchmark_results.json)")
+    parser.add_argument("--compare", help="json file of an earlier benchmark, whose results are compared with the ones of this benchmark")
+    parser.add_argument("--worker", nargs=3, metavar=("COLLECTION", "REPORT", "SHEETS_LATENCY"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return
+
+    scenarios = get_scenarios(args)
+
+    endpoint = Stand_in_endpoint()
+    endpoint.start()
+
+    results = []
+
+    try:
+        for scenario in scenarios:
+            result = run_scenario(scenario, endpoint, args)
+            results.append(result)
+            print(get_result_message(result))
+    finally:
+        endpoint.stop()
+
+    benchmark = {
+        'commit': get_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+    with open(args.output, 'w') as fw:
+        json.dump(benchmark, fw, indent=2)
+
+    print("\nWrote results of benchmark to: " + args.output)
+
+    if args.compare:
+        with open(args.compare, 'r') as fr:
+            print_comparison(json.load(fr), benchmark)
+
+
+
+def get_scenarios(args):
+    """Returns the scenarios to run: every combination of rows, destination type and format (the format of local xlsx
+    files is always xlsx)"""
+
+    scenarios = []
+    settings = json.loads(args.settings)
+
+    for rows in [ int(rows) for rows in args.rows.split(",") ]:
+        for destination_type in args.destinations.split(","):
+
+            if destination_type not in destination_types:
+                sys.exit("\nERROR: Unknown destination type: " + destination_type)
+
+            if destination_type == "local_xlsx":
+                scenario_formats = [ "xlsx" ]
+            else:
+                scenario_formats = args.formats.split(",")
+
+            for output_format in scenario_formats:
+
+                if output_format not in formats + [ "xlsx" ]:
+                    sys.exit("\nERROR: Unknown format: " + output_format)
+
+                scenarios.append({
+                    'name': destination_type + " / " + output_format + " / " + str(rows) + " rows",
+                    'destination_type': destination_type,
+                    'format': output_format,
+                    'rows': rows,
+                    'queries': args.queries,
+                    'latency': args.latency,
+                    'page_size': args.page_size,
+                    'settings': settings,
+                })
+
+    return scenarios
+
+
+
+def run_scenario(scenario, endpoint, args):
+    """Runs querPy on a scenario (args.repeat times, each in a fresh process) and returns the result of the fastest
+    run"""
+
+    best_result = None
+
+    endpoint.prepare(scenario)
+
+    for _ in range(args.repeat):
+
+        with tempfile.TemporaryDirectory(prefix="querPy_benchmark_") as folder:
+
+            folder = Path(folder)
+            collection_path = folder / "collection.py"
+            report_path = folder / "report.json"
+            collection_path.write_text(get_collection(scenario, endpoint, folder))
+
+            # querPy writes its log, checkpoints and cache relative to the working directory. The google api is only
+            # mocked (and its libraries imported) for scenarios writing into google sheets.
+            if scenario['destination_type'] == "google_sheets":
+                sheets_latency = str(args.sheets_latency)
+            else:
+                sheets_latency = "none"
+            command = [ sys.executable, str(Path(__file__).resolve()), "--worker",
+                        str(collection_path), str(report_path), sheets_latency ]
+            startTime = time.time()
+            process = subprocess.Popen(command, cwd=folder, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            stderr = process.stderr.read()
+            _, status, rusage = os.wait4(process.pid, 0)
+            duration = time.time() - startTime
+            process.returncode = os.waitstatus_to_exitcode(status)
+
+            if process.returncode != 0 or not report_path.exists():
+                sys.exit("\nERROR: querPy failed in scenario " + scenario['name'] + ":\n" + stderr.decode('utf-8', 'replace'))
+
+            with report_path.open('r') as fr:
+                report = json.load(fr)
+
+        result = get_result(scenario, report, duration, rusage)
+        if best_result is None or result['duration'] < best_result['duration']:
+            best_result = result
+
+    return best_result
+
+
+
+def get_collection(scenario, endpoint, folder):
+    """Returns the content of the query collection file for a scenario"""
+
+    if scenario['destination_type'] == "google_sheets":
+        output_destination = "https://docs.google.com/spreadsheets/d/" + Google_sheets_mock.spreadsheet_id + "/edit"
+    else:
+        output_destination = str(folder / "output")
+        os.makedirs(output_destination)
+
+    queries = []
+    for i in range(scenario['queries']):
+        query = {
+            'title': "Query " + str(i + 1),
+            # every query differs, so that none of them is answered by any cache
+            'query': "SELECT ?s ?n ?date ?label WHERE { ?s ?p ?o . FILTER(?o != " + str(i) + ") }",
+        }
+        if scenario['page_size'] is not None:
+            query['page_size'] = scenario['page_size']
+        queries.append(query)
+
+    settings = {
+        'title': "Benchmark",
+        'output_destination': output_destination,
+        'output_format': scenario['format'],
+        'endpoint': endpoint.get_url(scenario['rows'], scenario['latency']),
+        'queries': queries,
+    }
+    settings.update(scenario['settings'])
+
+    return "".join(key + " = " + repr(value) + "\n" for key, value in settings.items())
+
+
+
+def get_result(scenario, report, duration, rusage):
+    """Returns the result of a run of querPy on a scenario, from its report and the resource usage of its process"""
+
+    # ru_maxrss is in kilobytes on linux, but in bytes on macOS
+    peak_rss = rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+    stage_durations = {}
+    errors_count = 0
+    for iteration in report['iterations']:
+        errors_count += iteration['errors_count']
+        for stage, stage_duration in iteration['stage_durations'].items():
+            stage_durations[stage] = stage_durations.get(stage, 0) + stage_duration
+
+    rows_count = scenario['rows'] * scenario['queries']
+
+    result = dict(scenario)
+    result.update({
+        'duration': duration,
+        'run_duration': report['duration'],
+        'startup_duration': duration - report['duration'],
+        'rows_per_second': rows_count / report['duration'] if report['duration'] > 0 else None,
+        'peak_rss': peak_rss,
+        'cpu_duration': rusage.ru_utime + rusage.ru_stime,
+        'errors_count': errors_count,
+        'google_api_calls_count': report.get('google_api_calls_count') if scenario['destination_type'] == "google_sheets" else None,
+        'stage_durations': { stage: stage_durations[stage] for stage in report['stages'] if stage in stage_durations },
+    })
+
+    return result
+
+
+
+def get_result_message(result):
+    """Returns a line describing the result of a scenario"""
+
+    stages = ", ".join(stage + ": " + format(duration, ".3f") for stage, duration in result['stage_durations'].items())
+
+    return result['name'] + ": " + format(result['duration'], ".2f") + " s (startup " + \
+        format(result['startup_duration'], ".2f") + " s), " + format(result['rows_per_second'] or 0, ".0f") + \
+        " rows/s, peak RSS " + format(result['peak_rss'] / 2**20, ".1f") + " MB, errors: " + \
+        str(result['errors_count']) + "\n    stages in seconds: " + stages
+
+
+
+def print_comparison(earlier_benchmark, benchmark):
+    """Prints how duration, throughput and peak memory of every scenario changed compared to an earlier benchmark"""
+
+    print("\nCompared with " + str(earlier_benchmark.get('commit')) + " (" + str(earlier_benchmark.get('timestamp')) + "):")
+
+    earlier_results = { result['name']: result for result in earlier_benchmark['results'] }
+
+    for result in benchmark['results']:
+
+        earlier_result = earlier_results.get(result['name'])
+        if earlier_result is None:
+            print(result['name'] + ": not in earlier benchmark")
+            continue
+
+        print(result['name'] + ": duration " + get_change(earlier_result['duration'], result['duration']) +
+              ", rows/s " + get_change(earlier_result['rows_per_second'], result['rows_per_second']) +
+              ", peak RSS " + get_change(earlier_result['peak_rss'], result['peak_rss']))
+
+
+
+def get_change(earlier_value, value):
+    """Returns the relative change between two values as text"""
+
+    if not earlier_value or value is None:
+        return "n/a"
+
+    return format((value - earlier_value) / earlier_value * 100, "+.1f") + " %"
+
+
+
+def get_commit():
+    """Returns the commit of the repository the benchmark is run in (None if it is not known)"""
+
+    try:
+        return subprocess.run(
+            [ "git", "rev-parse", "--short", "HEAD" ], cwd=Path(__file__).resolve().parent,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout.decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+
+def run_worker(collection_path, report_path, sheets_latency):
+    """Runs querPy on a query collection file within this process, with the google api mocked (unless sheets_latency
+    is 'none'). The calls to the mocked google api are added to querPy's report of the run."""
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import querPy
+
+    google_sheets_mock = None
+    if sheets_latency != "none":
+        google_sheets_mock = Google_sheets_mock(float(sheets_latency))
+        google_sheets_mock.install()
+
+    # querPy reads the credentials file before passing it to the (mocked) google api
+    credentials_path = Path("credentials.json")
+    credentials_path.write_text("{}")
+
+    sys.argv = [ "querPy.py", "-r", collection_path, "--report", report_path, "-c", str(credentials_path) ]
+    querPy.main()
+
+    if google_sheets_mock is None:
+        return
+
+    with open(report_path, 'r') as fr:
+        report = json.load(fr)
+    report['google_api_calls_count'] = google_sheets_mock.calls_count
+    report['google_api_cells_count'] = google_sheets_mock.cells_count
+    with open(report_path, 'w') as fw:
+        json.dump(report, fw, indent=2)
+
+
+
+class Stand_in_endpoint:
+    """Local stand-in for a SPARQL 1.1 protocol endpoint, serving synthetic results in a background thread.
+
+    The number of result rows and the latency are taken from the path of the endpoint's url (see 'get_url'), so that
+    one server can serve all scenarios. LIMIT and OFFSET at the end of a query (as used for pages) are applied to the
+    rows, queries for counting (COUNT) are answered with their number. The bodies are generated once and kept, so that
+    generating them is not measured as time of the endpoint."""
+
+    path_pattern = re.compile(r"^/rows/(\d+)/latency/([0-9.]+)/sparql")
+    limit_pattern = re.compile(r"LIMIT\s+(\d+)\s*(?:OFFSET\s+(\d+)\s*)?$", re.IGNORECASE)
+
+    content_types = {
+        "csv": "text/csv",
+        "tsv": "text/tab-separated-values",
+        "json": "application/sparql-results+json",
+        "xml": "application/sparql-results+xml",
+    }
+
+    xsd = "http://www.w3.org/2001/XMLSchema#"
+    variables = [ "s", "n", "date", "label" ]
+
+    def __init__(self):
+
+        self.server = None
+        self.thread = None
+        self.bodies = {}
+        self.bodies_lock = threading.Lock()
+
+
+    def start(self):
+        """Starts the server on a free port"""
+
+        endpoint = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urllib.parse.urlsplit(self.path)
+                endpoint.respond(self, url.path, urllib.parse.parse_qs(url.query))
+
+            def do_POST(self):
+                url = urllib.parse.urlsplit(self.path)
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+                if self.headers.get('Content-Type', "").startswith("application/sparql-query"):
+                    parameters = { 'query': [ body ] }
+                else:
+                    parameters = urllib.parse.parse_qs(body)
+                endpoint.respond(self, url.path, parameters)
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="stand-in-endpoint", daemon=True)
+        self.thread.start()
+
+
+    def stop(self):
+
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+    def get_url(self, rows, latency):
+        """Returns the url of the endpoint serving the given number of rows after the given latency in seconds"""
+
+        return "http://127.0.0.1:" + str(self.server.server_address[1]) + \
+            "/rows/" + str(rows) + "/latency/" + str(latency) + "/sparql"
+
+
+    def respond(self, handler, path, parameters):
+        """Answers a request according to the SPARQL 1.1 protocol"""
+
+        match = self.path_pattern.match(path)
+        query = parameters.get('query', [ "" ])[0]
+
+        if match is None or query == "":
+            self.send(handler, 400, "text/plain", b"Expected /rows/<rows>/latency/<seconds>/sparql?query=<query>")
+            return
+
+        rows = int(match.group(1))
+        time.sleep(float(match.group(2)))
+
+        output_format = self.get_format(handler.headers.get('Accept', ""), parameters)
+        query = query.strip()
+
+        if "COUNT(" in query.upper().replace(" ", ""):
+            body = json.dumps({
+                'head': { 'vars': [ "callret-0" ] },
+                'results': { 'bindings': [ { "callret-0": {
+                    'type': "typed-literal", 'datatype': self.xsd + "integer", 'value': str(rows) } } ] },
+            }).encode('utf-8')
+            self.send(handler, 200, self.content_types["json"], body)
+            return
+
+        start, end = 0, rows
+        limit = self.limit_pattern.search(query)
+        if limit is not None:
+            start = min(int(limit.group(2) or 0), rows)
+            end = min(start + int(limit.group(1)), rows)
+
+        self.send(handler, 200, self.content_types[output_format], self.get_body(output_format, start, end))
+
+
+    def prepare(self, scenario):
+        """Generates the bodies a scenario will ask for in advance"""
+
+        output_format = "csv" if scenario['format'] == "xlsx" else scenario['format']
+        rows = scenario['rows']
+
+        if scenario['page_size'] is None:
+            self.get_body(output_format, 0, rows)
+        else:
+            for start in range(0, rows + 1, scenario['page_size']):
+                self.get_body(output_format, start, min(start + scenario['page_size'], rows))
+
+
+    def get_format(self, accept, parameters):
+        """Returns the format asked for by the accept header or the 'format' parameter (csv if none)"""
+
+        for output_format, content_type in self.content_types.items():
+            if content_type in accept:
+                return output_format
+
+        output_format = parameters.get('format', parameters.get('output', [ "csv" ]))[0].lower()
+
+        return output_format if output_format in self.content_types else "csv"
+
+
+    def send(self, handler, status, content_type, body):
+
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+    def get_body(self, output_format, start, end):
+        """Returns the body holding the rows from start to end in the given format, generated once"""
+
+        key = (output_format, start, end)
+
+        with self.bodies_lock:
+            if key not in self.bodies:
+                self.bodies[key] = self.generate_body(output_format, start, end)
+            return self.bodies[key]
+
+
+    def generate_body(self, output_format, start, end):
+        """Generates results with an iri, an integer, a date and a plain literal per row"""
+
+        date_start = datetime.date(2000, 1, 1)
+        rows = [
+            ("http://example.org/item/" + str(i), str(i), (date_start + datetime.timedelta(days=i % 36500)).isoformat(),
+             "Item " + str(i) + ", \"quoted\"")
+            for i in range(start, end)
+        ]
+
+        if output_format == "csv":
+            lines = [ ",".join(self.variables) ]
+            lines.extend(s + "," + n + "," + date + ",\"" + label.replace("\"", "\"\"") + "\"" for s, n, date, label in rows)
+            body = "\r\n".join(lines) + "\r\n"
+
+        elif output_format == "tsv":
+            lines = [ "\t".join("?" + variable for variable in self.variables) ]
+            lines.extend(
+                "<" + s + ">\t\"" + n + "\"^^<" + self.xsd + "integer>\t\"" + date + "\"^^<" + self.xsd + "date>\t\"" +
+                label.replace("\"", "\\\"") + "\"" for s, n, date, label in rows)
+            body = "\n".join(lines) + "\n"
+
+        elif output_format == "json":
+            body = json.dumps({
+                'head': { 'vars': self.variables },
+                'results': { 'bindings': [
+                    {
+                        's': { 'type': "uri", 'value': s },
+                        'n': { 'type': "literal", 'datatype': self.xsd + "integer", 'value': n },
+                        'date': { 'type': "literal", 'datatype': self.xsd + "date", 'value': date },
+                        'label': { 'type': "literal", 'value': label },
+                    }
+                    for s, n, date, label in rows
+                ] },
+            })
+
+        else:
+            parts = [
+                "<?xml version=\"1.0\"?>\n<sparql xmlns=\"http://www.w3.org/2005/sparql-results#\">\n<head>" +
+                "".join("<variable name=\"" + variable + "\"/>" for variable in self.variables) + "</head>\n<results>\n"
+            ]
+            parts.extend(
+                "<result><binding name=\"s\"><uri>" + s + "</uri></binding>" +
+                "<binding name=\"n\"><literal datatype=\"" + self.xsd + "integer\">" + n + "</literal></binding>" +
+                "<binding name=\"date\"><literal datatype=\"" + self.xsd + "date\">" + date + "</literal></binding>" +
+                "<binding name=\"label\"><literal>" + label.replace("\"", "&quot;") + "</literal></binding></result>\n"
+                for s, n, date, label in rows)
+            parts.append("</results>\n</sparql>\n")
+            body = "".join(parts)
+
+        return body.encode('utf-8')
+
+
+
+class Google_sheets_mock:
+    """Stands in for the google drive and sheets api (googleapiclient.discovery.build) and the credentials
+    (oauth2client), so that writing into google sheets can be benchmarked without an account. Every call takes
+    'latency' seconds, the number of calls and of cells written are counted."""
+
+    spreadsheet_id = "benchmark"
+
+    def __init__(self, latency=0):
+
+        self.latency = latency
+        self.calls_count = 0
+        self.cells_count = 0
+        self.lock = threading.Lock()
+
+
+    def install(self):
+        """Replaces the functions of the google libraries querPy calls"""
+
+        from googleapiclient import discovery
+        from oauth2client import client
+
+        mock = self
+
+        class Credentials:
+            invalid = False
+
+            def authorize(self, http):
+                return http
+
+        class Request:
+
+            def __init__(self, response, cells_count=0):
+                self.response = response
+                self.cells_count = cells_count
+
+            def execute(self, http=None):
+                time.sleep(mock.latency)
+                with mock.lock:
+                    mock.calls_count += 1
+                    mock.cells_count += self.cells_count
+                return self.response
+
+        class Values:
+
+            def batchUpdate(self, spreadsheetId, body):
+                cells_count = sum(len(row) for data in body['data'] for row in data['values'])
+                return Request({}, cells_count)
+
+        class Spreadsheets:
+
+            def get(self, spreadsheetId, **kwargs):
+                return Request({ 'sheets': [ { 'properties': {
+                    'sheetId': 0, 'title': "Sheet1", 'gridProperties': { 'rowCount': 1000, 'columnCount': 26 } } } ] })
+
+            def batchUpdate(self, spreadsheetId, body):
+                return Request({ 'replies': [ {} for _ in body['requests'] ] })
+
+            def values(self):
+                return Values()
+
+        class Files:
+
+            def create(self, body):
+                return Request({ 'id': mock.spreadsheet_id })
+
+        class Service:
+
+            def spreadsheets(self):
+                return Spreadsheets()
+
+            def files(self):
+                return Files()
+
+        discovery.build = lambda *args, **kwargs: Service()
+        client.GoogleCredentials.from_json = staticmethod(lambda json_string: Credentials())
+
+
+
+if __name__ == "__main__":
+    main()
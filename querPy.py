@@ -3,24 +3,49 @@
 from __future__ import print_function
 import inspect
 import argparse
-import imp
+import importlib.util
+import marshal
 import csv
 import json
+import codecs
 import logging
 import sys
 import time
 import os
-import regex
+import re
 import collections
-from httplib2 import Http
-import xlsxwriter
+import collections.abc
+import queue
+import concurrent.futures
+import asyncio
+import threading
+import contextlib
+import ssl
+import urllib.parse
+import urllib.error
+import email.utils
+import xml.etree.ElementTree
+import hashlib
+import random
+import array
+import math
+import datetime
+import shutil
+import subprocess
+import shlex
+import io
+import http.server
+import signal
+import multiprocessing
 from pathlib import Path
 from SPARQLWrapper import CSV, TSV, XML, JSON, SPARQLExceptions, SPARQLWrapper
-from googleapiclient import discovery
-from oauth2client import client, tools, file
-from oauth2client.client import GoogleCredentials
 # from SPARQLWrapper import SPARQLExceptions
 
+# Further libraries are only imported when they are needed, since importing them takes long compared to a run writing
+# into a local folder (see '--profile-startup'):
+# xlsxwriter (see 'init_xlsx_workbook'), regex (see 'get_query_as_sub_query'), and httplib2, googleapiclient and
+# oauth2client (see 'import_google_libraries')
+
 def main():
 
     # argument parser
@@ -29,6 +54,17 @@ def main():
     parser.add_argument("-s", help="reads in a provided client_secret json file. If no client_secret.json is provided as argument, querPy will search the current folder for one. (A client_secret can be obtained by logging into the Google Developer Console where a projects needs to be registered.)")
     parser.add_argument("-c", help="reads in a provided credentials json file. If no credentials.json is provided as argument, querPy will search the current folder for one. If there does not exist a credentials file yet, you can create one by providing a client_secret, after which you should be directed to a google-login, the resulting credentials file will be saved in the current folder.")
     parser.add_argument("-t", action='store_true', help="creates a template file for showcasing the queries-layout")
+    parser.add_argument("--no-cache", action='store_true', help="neither reads results from nor writes them to the cache of results, even if 'cache_max_age' is set in the query collection file.")
+    parser.add_argument("--refresh-cache", action='store_true', help="executes all queries, even if valid results are in the cache of results, and saves their new results in the cache.")
+    parser.add_argument("--checkpoint", action='store_true', help="records the progress of the run in a checkpoint journal (in the folder 'querPy_checkpoints'), so that it can be resumed with '--resume' if it is interrupted. For xlsx files and google sheets, the results are then also kept next to the journal. Implied by '--resume' and '--incremental'.")
+    resume_or_incremental = parser.add_mutually_exclusive_group()
+    resume_or_incremental.add_argument("--resume", action='store_true', help="resumes an interrupted run of the specified file (started with '--checkpoint', '--resume' or '--incremental'): queries which were completed already are not executed again, and their output (local folder, xlsx file or google sheets) is reopened to continue in it.")
+    resume_or_incremental.add_argument("--incremental", action='store_true', help="only executes queries which are new or changed since the previous run of the specified file with a checkpoint journal (see '--checkpoint'; or whose endpoint, output format or multi-value changed). The results of all other queries are copied from the previous run's output into the new one, so that it is still complete.")
+    parser.add_argument("--profile-startup", action='store_true', help="runs querPy with the other arguments given (or only imports it, if neither '-r' nor '-t' is given) and then reports how long importing the libraries took, by package.")
+    parser.add_argument("--serve", help="keeps running and runs query collection files on schedules, as given in the specified file: a line per query collection file in the form of a crontab line, e.g. '*/15 * * * * collections/counts.py --incremental' (possible options: --no-cache, --refresh-cache, --incremental, --report FILE). Connections to endpoints, services for google sheets and loaded query collection files are kept between runs. A query collection file due while still running is run once more afterwards, one due while querPy was not running is run once as soon as possible.")
+    parser.add_argument("--api", help="keeps running as local http server at the specified [HOST:]PORT (host by default 127.0.0.1), to which query collections can be submitted (POST /runs, as json, toml or yaml body, or '?file=' the name of a query collection file in the folder given by '--api-collections'). The progress of their queries is streamed as server-sent events (GET /runs/<run id>/events), and their results are served as json or csv, in pages or streamed (GET /runs/<run id>/results/<query id>). Can be combined with '--serve'.")
+    parser.add_argument("--api-collections", help="folder of query collection files which can be run via '--api' by their name ('?file='). Files outside of it can not be run that way; without this folder only query collections in the body can be submitted.")
+    parser.add_argument("--report", help="writes a report of the run as json into the specified file: for every multi-value iteration and every query in it, how long it took, how it went, and how many seconds were spent in each stage of it (connect, time to first byte, download, count query, parse, harmonize, write summary, write result, meta function, cooldown).")
 
     if len(sys.argv) == 1:
         print("\nERROR: No arguments given!")
@@ -39,54 +75,211 @@ def main():
 
 
 
+    # user wants to see how long querPy takes for starting up
+    if args.profile_startup:
+
+        profile_startup([ argument for argument in sys.argv[1:] if argument != "--profile-startup" ], args.r or args.t)
+
+
+
+    # user wants to keep querPy running for running query collection files on schedules and / or submitted to its api
+    elif (args.serve or args.api) and not args.r and not args.t:
+
+        logging.basicConfig(filename="querPy.log", filemode="a", level=logging.INFO)
+
+        credentials_path, client_secret_path = get_google_credentials_paths(args)
+
+        run_settings = {
+            'credentials_path': credentials_path,
+            'client_secret_path': client_secret_path,
+        }
+
+        if args.api:
+
+            host, _, port = args.api.rpartition(":")
+
+            try:
+                query_collection_api = Query_collection_api(
+                    host or "127.0.0.1", int(port), run_settings, args.api_collections)
+            except (ValueError, OSError) as ex:
+                message = "\nERROR: INVALID INPUT! Could not serve api at '" + args.api + "': " + str(ex)
+                logging.error(message)
+                sys.exit(message)
+
+        if args.serve:
+
+            if args.api:
+                query_collection_api.start()
+
+            Query_collection_scheduler(args.serve, "querPy_cache/schedule_state.json", run_settings).serve()
+
+            if args.api:
+                query_collection_api.stop()
+
+        else:
+            query_collection_api.serve()
+
+        # close pooled connections (if any were used)
+        sparql_http_client.close()
+
+
+
     # user wants to run a queries file and does not want to create a template file
-    if args.r and not args.t:
+    elif args.r and not args.t:
 
         logging.basicConfig(filename="querPy.log", filemode="w", level=logging.INFO)
 
-        # read queries collection file
-        query_collection_module = imp.load_source('conf', args.r)
+        credentials_path, client_secret_path = get_google_credentials_paths(args)
+
+        # cache of results
+
+        if args.no_cache:
+            cache_mode = "bypass"
+        elif args.refresh_cache:
+            cache_mode = "refresh"
+        else:
+            cache_mode = "use"
+
+        run_settings = {
+            'credentials_path': credentials_path,
+            'client_secret_path': client_secret_path,
+            'cache_mode': cache_mode,
+            'checkpoint': args.checkpoint,
+            'resume': args.resume,
+            'incremental': args.incremental,
+        }
+
+        query_collection_data_object, iterations_stats, failed_iterations, duration = \
+            run_query_collection(args.r, run_settings)
+
+        # close pooled connections (if any were used)
+        sparql_http_client.close()
+
+        if args.report:
+            write_run_report(args.report, query_collection_data_object, iterations_stats, duration)
+
+        if len(failed_iterations) > 0:
+            message = "\nERROR: Multi-value iterations failed: " + ", ".join(str(i) for i in sorted(failed_iterations))
+            logging.error(message)
+            sys.exit(message)
+
+
+
+
+
+    # user wants to create a template file and does not run a queries-file
+    elif args.t and not args.r:
+
+        create_template()
+
+
+
+    # invalid arguments, print help
+    else:
+        print("\nERROR: Invalid arguments!")
+        parser.print_help()
+        sys.exit()
+
+
 
-        # extract and validate data from the queries collection file
-        query_collection_data_object = read_query_collection_data_input(query_collection_module, args.r)
+def get_google_credentials_paths(args):
+    """Returns the paths of the credentials file and the client_secret file for the google api (False for the one not
+    used), as given in the arguments or found in the current folder"""
 
-        ## google authentication cases
+    # case: user provides credentials.json
+    if args.c:
+        credentials_path = args.c
+        client_secret_path = False
 
-        # case: user provides credentials.json
-        if args.c:
-            credentials_path = args.c
+    # case: user provides client_secret.json
+    elif args.s:
+        client_secret_path = args.s
+        credentials_path = False
+
+    # case: user did not provide any file. Search local folder for files and load them
+    else:
+        files_list = os.listdir('./')
+
+        # case: found credentials.json
+        if "credentials.json" in files_list:
+            credentials_path = "credentials.json"
             client_secret_path = False
 
-        # case: user provides client_secret.json
-        elif args.s:
-            client_secret_path = args.s
+        # case: found client_secret.json
+        elif "client_secret.json" in files_list:
+            client_secret_path = "client_secret.json"
             credentials_path = False
 
-        # case: user did not provide any file. Search local folder for files and load them
+        # case: did not find either
         else:
-            files_list = os.listdir('./')
+            credentials_path = False
+            client_secret_path = False
 
-            # case: found credentials.json
-            if "credentials.json" in files_list:
-                credentials_path = "credentials.json"
-                client_secret_path = False
+    return credentials_path, client_secret_path
 
-            # case: found client_secret.json
-            elif "client_secret.json" in files_list:
-                client_secret_path = "client_secret.json"
-                credentials_path = False
 
-            # case: did not find either
-            else:
-                credentials_path = False
-                client_secret_path = False
 
+def run_query_collection(query_collection_filename, run_settings):
+    """Runs all multi-value iterations of a query collection file. The run_settings are those not read from the file
+    (credentials_path, client_secret_path, cache_mode, resume, incremental and optionally checkpoint and
+    progress_listener, which is only called for multi-value iterations run in this process).
+    Returns the query collection data object, the statistics of the iterations, the numbers of the iterations which
+    failed and the duration of the run."""
+
+    # read queries collection file
+    query_collection_module = query_collection_loader.load(query_collection_filename)
+
+    # checkpoint journal (only kept if asked for), if resuming an interrupted run, then the earlier run's timestamp is
+    # used again, so that its output is found again
+    checkpoint_journal = Checkpoint_journal.for_query_collection(
+        query_collection_filename,
+        run_settings.get('checkpoint', False) or run_settings['resume'] or run_settings['incremental'])
+    timestamp_start = None
+    if run_settings['resume']:
+        if checkpoint_journal.load():
+            timestamp_start = checkpoint_journal.timestamp_start
+            message = "Resuming interrupted run from: " + timestamp_start
+        else:
+            message = "Did not find a checkpoint journal of an earlier run; starting a new run instead."
+        logging.info(message)
+        print(message)
+
+    # extract and validate data from the queries collection file
+    query_collection_data_object = read_query_collection_data_input(
+        query_collection_module, query_collection_filename, timestamp_start)
 
-        # credentials for google api
+    if timestamp_start is None:
+        checkpoint_journal.start(
+            query_collection_filename, query_collection_data_object.timestamp_start, run_settings['incremental'])
+    query_collection_data_object.checkpoint_journal = checkpoint_journal
+    query_collection_data_object.resume = timestamp_start is not None
 
-        query_collection_data_object.credentials_path = credentials_path
-        query_collection_data_object.client_secret_path = client_secret_path
+    # credentials for google api
 
+    query_collection_data_object.credentials_path = run_settings['credentials_path']
+    query_collection_data_object.client_secret_path = run_settings['client_secret_path']
+
+    # cache of results
+
+    query_collection_data_object.cache_mode = run_settings['cache_mode']
+
+    # listener of the progress of the run (if any, see '--api')
+
+    query_collection_data_object.progress_listener = run_settings.get('progress_listener')
+
+
+    startTime = time.time()
+    failed_iterations = []
+
+    # multi-value iterations can be run in parallel, each in a process of its own
+    if query_collection_data_object.max_parallel_iterations > 1 and \
+            query_collection_data_object._multi_value_length > 1:
+
+        iterations_stats, failed_iterations = run_multi_value_iterations_in_processes(query_collection_data_object)
+
+    else:
+
+        iterations_stats = []
 
         # save original state of queries-list, since meta_functions could change it which then
         # could interfere with multi-value iterations.
@@ -96,18 +289,7 @@ def main():
 
         while has_next:
 
-            # output_writer setup
-            query_collection_data_object.output_writer = Output_writer(query_collection_data_object)
-
-            # execute queries, get results with further query data returned
-            execute_queries(query_collection_data_object)
-
-            # pass results to custom post processing method in the query collection file (if present)
-            if hasattr(query_collection_module, "custom_post_processing"):
-                query_collection_module.custom_post_processing(query_collection_data_object)
-
-            # Close xlsx writer
-            query_collection_data_object.output_writer.close()
+            iterations_stats.append(run_multi_value_iteration(query_collection_data_object))
 
             has_next = query_collection_data_object.has_next()
             if has_next:
@@ -115,27 +297,289 @@ def main():
                 # reset the queries list to its initial state
                 query_collection_module.queries = queries_original_state
 
+    # delete results kept for earlier runs in the checkpoint journal
+    checkpoint_journal.clean_up()
 
+    return query_collection_data_object, iterations_stats, failed_iterations, time.time() - startTime
 
 
 
-    # user wants to create a template file and does not run a queries-file
-    elif args.t and not args.r:
+def run_multi_value_iteration(query_collection_data_object):
+    """Runs all queries of the current multi-value iteration and writes them into a new output destination.
+    Returns some statistics about the iteration (see 'get_iteration_message')."""
 
-        create_template()
+    query_collection_module = query_collection_data_object.query_collection_module
+    checkpoint_journal = query_collection_data_object.checkpoint_journal
+    startTime = time.time()
 
+    iteration_stats = {
+        'multi_value_index': query_collection_data_object._current_multi_value,
+        'title': query_collection_data_object.title,
+        'endpoint': query_collection_data_object.endpoint,
+        'skipped': False,
+        'queries_count': 0,
+        'errors_count': 0,
+        'duration': 0,
+        'stage_durations': {},
+        'queries': [],
+    }
 
+    # iterations completed by an interrupted run are skipped when resuming it
+    if not checkpoint_journal.start_iteration(
+            query_collection_data_object._current_multi_value, query_collection_data_object.resume):
 
-    # invalid arguments, print help
-    else:
-        print("\nERROR: Invalid arguments!")
-        parser.print_help()
-        sys.exit()
+        message = "Skipping multi-value iteration " + str(query_collection_data_object._current_multi_value + 1) + \
+                  ", it was completed by the interrupted run."
+        logging.info(message)
+        print(message)
+
+        iteration_stats['skipped'] = True
+        return iteration_stats
+
+    query_collection_data_object.report_progress('iteration_started')
+
+    # output_writer setup
+    query_collection_data_object.output_writer = Output_writer(query_collection_data_object)
+
+    # execute queries, get results with further query data returned
+    execute_queries(query_collection_data_object)
+
+    # pass results to custom post processing method in the query collection file (if present)
+    if hasattr(query_collection_module, "custom_post_processing"):
+        query_collection_module.custom_post_processing(query_collection_data_object)
+
+    # Close xlsx writer
+    query_collection_data_object.output_writer.close()
+
+    checkpoint_journal.complete_iteration()
+
+    # query data objects are by id, since the list of queries can contain them more than once
+    queries = { query_data_object.id: query_data_object for query_data_object in query_collection_data_object.queries }
+    iteration_stats['queries_count'] = len(queries)
+    iteration_stats['errors_count'] = sum(1 for q in queries.values() if q.error_message is not None)
+    iteration_stats['duration'] = time.time() - startTime
+
+    query_collection_data_object.report_progress('iteration_finished')
+
+    for query_data_object in queries.values():
+
+        iteration_stats['queries'].append({
+            'id': query_data_object.id,
+            'title': query_data_object.title,
+            'restored': query_data_object.results_restored,
+            'error_message': query_data_object.error_message,
+            'results_lines_count': query_data_object.results_lines_count,
+            'results_execution_duration': query_data_object.results_execution_duration,
+            'results_attempts': query_data_object.results_attempts,
+            'results_count_attempts': query_data_object.results_count_attempts,
+            'results_retry_duration': query_data_object.results_retry_duration,
+            'stage_durations': dict(query_data_object.results_stage_durations),
+        })
+
+        for stage, duration in query_data_object.results_stage_durations.items():
+            iteration_stats['stage_durations'][stage] = iteration_stats['stage_durations'].get(stage, 0) + duration
+
+    return iteration_stats
+
+
+
+def run_multi_value_iterations_in_processes(query_collection_data_object):
+    """Runs all multi-value iterations at the same time in a pool of max_parallel_iterations worker processes, each
+    with its own output writer. Progress and errors of the iterations are reported here, once they are done.
+    Returns the statistics of the iterations which finished (in order of the multi values) and the numbers of those
+    which failed."""
+
+    multi_value_length = query_collection_data_object._multi_value_length
+    max_workers = min(query_collection_data_object.max_parallel_iterations, multi_value_length)
+
+    message = "\n\n################################\n" + \
+              "Running " + str(multi_value_length) + " multi-value iterations in " + str(max_workers) + " processes"
+    logging.info(message)
+    print(message)
+
+    # everything a worker needs which is not read from the query collection file itself
+    run_settings = {
+        'timestamp_start': query_collection_data_object.timestamp_start,
+        'credentials_path': query_collection_data_object.credentials_path,
+        'client_secret_path': query_collection_data_object.client_secret_path,
+        'cache_mode': query_collection_data_object.cache_mode,
+        'resume': query_collection_data_object.resume,
+        'checkpoint': query_collection_data_object.checkpoint_journal.is_enabled,
+        'previous_queries': query_collection_data_object.checkpoint_journal.previous_queries,
+    }
+
+    iterations_stats = {}
+    failed_iterations = []
+    finished_count = 0
+
+    # the worker processes are spawned instead of forked, since this process has threads running (e.g. the event loop
+    # of the http client), whose locks and sockets would be inherited by a forked process in whatever state they are in
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initialize_iteration_process) as executor:
+
+        futures = {
+            executor.submit(
+                run_multi_value_iteration_in_process,
+                query_collection_data_object.query_collection_filename, multi_value_index, run_settings
+            ): multi_value_index
+            for multi_value_index in range(multi_value_length)
+        }
+
+        for future in concurrent.futures.as_completed(futures):
+
+            multi_value_index = futures[future]
+            finished_count += 1
+
+            try:
+                iteration_stats = future.result()
+                iterations_stats[multi_value_index] = iteration_stats
+                message = "Finished multi-value iteration " + str(finished_count) + " of " + \
+                          str(multi_value_length) + ": " + get_iteration_message(iteration_stats)
+                logging.info(message)
+                print(message)
+
+            except (Exception, SystemExit) as ex:
+                message = "EXCEPTION OCCURED IN MULTI-VALUE ITERATION " + str(multi_value_index + 1) + ": " + \
+                          str(ex) + "\n Continue with the other iterations."
+                logging.error(message)
+                print(message)
+                failed_iterations.append(multi_value_index + 1)
+
+    return [ iterations_stats[i] for i in sorted(iterations_stats) ], failed_iterations
+
+
+
+def initialize_iteration_process():
+    """Sets up a worker process of 'run_multi_value_iterations_in_processes' before it runs any iteration. The http
+    client, the cached google services and the logging handlers are replaced with fresh ones of this process, so
+    that nothing set up by the parent process is used here, should it have been inherited."""
+
+    global sparql_http_client
+    sparql_http_client = Sparql_http_client()
+
+    Output_writer.google_services_cache = {}
+    Output_writer.google_services_cache_lock = threading.Lock()
+
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    logging.basicConfig(filename="querPy.log", filemode="a", level=logging.INFO)
+
+
+
+def run_multi_value_iteration_in_process(query_collection_filename, multi_value_index, run_settings):
+    """Runs one multi-value iteration in a worker process (set up by 'initialize_iteration_process'). Since modules
+    (and the meta functions in them) can not be passed between processes, the query collection file is read in again
+    here."""
+
+    try:
 
+        query_collection_module = query_collection_loader.load(query_collection_filename)
+        query_collection_data_object = read_query_collection_data_input(
+            query_collection_module, query_collection_filename, run_settings['timestamp_start'])
+        query_collection_data_object._current_multi_value = multi_value_index
 
+        query_collection_data_object.credentials_path = run_settings['credentials_path']
+        query_collection_data_object.client_secret_path = run_settings['client_secret_path']
+        query_collection_data_object.cache_mode = run_settings['cache_mode']
+        query_collection_data_object.resume = run_settings['resume']
 
-def read_query_collection_data_input(query_collection_module, query_collection_filename):
-    """Reads input from query collection file and convert into usable data structure available throughout the entire program execution"""
+        checkpoint_journal = Checkpoint_journal.for_query_collection(
+            query_collection_filename, run_settings['checkpoint'])
+        checkpoint_journal.data = {
+            'query_collection_filename': query_collection_filename,
+            'timestamp_start': run_settings['timestamp_start'],
+        }
+        checkpoint_journal.previous_queries = run_settings['previous_queries']
+        query_collection_data_object.checkpoint_journal = checkpoint_journal
+
+        return run_multi_value_iteration(query_collection_data_object)
+
+    finally:
+        sparql_http_client.close()
+
+
+
+def write_run_report(report_path, query_collection_data_object, iterations_stats, duration):
+    """Writes the statistics of all multi-value iterations of a run (see 'run_multi_value_iteration') as json into
+    the given file, for looking into where the run spent its time"""
+
+    report = {
+        'query_collection_file': query_collection_data_object.query_collection_filename,
+        'timestamp_start': query_collection_data_object.timestamp_start,
+        'duration': duration,
+        'stages': list(Query_data_object.stages),
+        'iterations': iterations_stats,
+    }
+
+    with open(report_path, 'w') as fw:
+        json.dump(report, fw, indent=2, default=str)
+
+    message = "Wrote report of run to: " + report_path
+    logging.info(message)
+    print(message)
+
+
+
+def profile_startup(arguments, is_run):
+    """Runs querPy with the given arguments in a new process with python's import profiling (-X importtime), then
+    prints how long importing took in total and per top-level package (a module imported by several packages is
+    counted for the one importing it first). If no run is asked for, querPy only prints its help, so that merely
+    importing it is profiled."""
+
+    if not is_run:
+        arguments = [ "-h" ]
+
+    startTime = time.time()
+    process = subprocess.run(
+        [ sys.executable, "-X", "importtime", os.path.abspath(__file__) ] + arguments,
+        stdout=None if is_run else subprocess.DEVNULL, stderr=subprocess.PIPE)
+    duration = time.time() - startTime
+
+    # lines look like 'import time:       265 |      25701 |   xlsxwriter' (self and cumulative microseconds, then the
+    # module, indented by two spaces per level of nesting)
+    pattern = re.compile(r"^import time:\s*(\d+) \|\s*(\d+) \| ( *)(\S+)$")
+    packages_durations = collections.Counter()
+
+    for line in process.stderr.decode('utf-8', errors='replace').splitlines():
+
+        match = pattern.match(line)
+
+        if match is None:
+            if not line.startswith("import time:"):
+                print(line, file=sys.stderr)
+
+        elif len(match.group(3)) == 0:
+            packages_durations[match.group(4).split(".")[0]] += int(match.group(2)) / 10**6
+
+    message = "\n\n################################\nStartup profile\n" + \
+              "\nDuration of the whole process in seconds: " + str(duration) + \
+              "\nDuration of imports in seconds: " + str(sum(packages_durations.values())) + \
+              "\n\nDuration of imports per package in seconds:\n" + \
+              "\n".join(package + ": " + str(package_duration)
+                        for package, package_duration in packages_durations.most_common())
+    logging.info(message)
+    print(message)
+
+
+
+def get_iteration_message(iteration_stats):
+    """Returns a line describing how a multi-value iteration went"""
+
+    if iteration_stats['skipped']:
+        return iteration_stats['title'] + " (skipped, it was completed by the interrupted run)"
+
+    return iteration_stats['title'] + " (" + str(iteration_stats['queries_count']) + " queries, " + \
+        str(iteration_stats['errors_count']) + " errors, duration in seconds: " + \
+        str(iteration_stats['duration']) + ")"
+
+
+
+def read_query_collection_data_input(query_collection_module, query_collection_filename, timestamp_start=None):
+    """Reads input from query collection file and convert into usable data structure available throughout the entire program execution.
+    If a timestamp_start is given (when resuming an interrupted run), it is used instead of the current time."""
 
     # Since when they are accessed the current multi_value variable affects the read-out
     # in such a way that only the current value and not the whole list of values is returned
@@ -145,7 +589,9 @@ def read_query_collection_data_input(query_collection_module, query_collection_f
 
     query_collection_data_object.query_collection_module = query_collection_module
     query_collection_data_object.query_collection_filename = query_collection_filename
-    query_collection_data_object.timestamp_start = time.strftime('%y%m%d_%H%M%S')
+    if timestamp_start is None:
+        timestamp_start = time.strftime('%y%m%d_%H%M%S')
+    query_collection_data_object.timestamp_start = timestamp_start
     message = \
         "\n\n################################\n" + \
         "Reading query collection file: " + query_collection_filename + "\n" + \
@@ -258,1698 +704,6995 @@ def read_query_collection_data_input(query_collection_module, query_collection_f
         query_collection_data_object.count_the_results = True
 
 
-    # endpoint
+    # count_from_downloaded_results
 
-    logging.info("Reading endpoints")
+    logging.info("Reading count_from_downloaded_results")
     try:
-        query_collection_data_object.endpoint = query_collection_module.endpoint
-        logging.info("endpoint: " + str(query_collection_data_object._endpoint) )
+        query_collection_data_object.count_from_downloaded_results = query_collection_module.count_from_downloaded_results
+        logging.info("count_from_downloaded_results: " + str(query_collection_data_object._count_from_downloaded_results))
     except AttributeError:
-        message = "\nERROR: INVALID INPUT! Did not find endpoint in query collection file!"
-        logging.error(message)
-        sys.exit(message)
-
+        message = "Did not find count_from_downloaded_results in query collection file; assuming False instead."
+        logging.info(message)
+        print(message)
+        query_collection_data_object.count_from_downloaded_results = False
 
-    return query_collection_data_object
 
+    # stream_results_to_disk
 
-def read_query_data_input(query_conf_module, query_collection_data_object):
+    logging.info("Reading stream_results_to_disk")
+    try:
+        query_collection_data_object.stream_results_to_disk = query_collection_module.stream_results_to_disk
+        logging.info("stream_results_to_disk: " + str(query_collection_data_object._stream_results_to_disk))
+    except AttributeError:
+        message = "Did not find stream_results_to_disk in query collection file; assuming False instead."
+        logging.info(message)
+        print(message)
+        query_collection_data_object.stream_results_to_disk = False
 
-    query_data_object = Query_data_object( query_collection_data_object=query_collection_data_object )
-    logging.info("\n\n################################\nReading in next query\n")
 
-    # title
+    # xlsx_constant_memory
 
-    logging.info("Reading title of query")
+    logging.info("Reading xlsx_constant_memory")
     try:
-        query_data_object.title = query_conf_module['title']
-        logging.info("query title: " + str(query_data_object._title))
-    except KeyError:
-        logging.info("No title for query found; ignoring.")
-        query_data_object.title = ""
+        query_collection_data_object.xlsx_constant_memory = query_collection_module.xlsx_constant_memory
+        logging.info("xlsx_constant_memory: " + str(query_collection_data_object._xlsx_constant_memory))
+    except AttributeError:
+        message = "Did not find xlsx_constant_memory in query collection file; assuming False instead."
+        logging.info(message)
+        print(message)
+        query_collection_data_object.xlsx_constant_memory = False
 
 
-    # description
+    # max_parallel_queries
 
-    logging.info("Reading description of query")
+    logging.info("Reading max_parallel_queries")
     try:
-        query_data_object.description = query_conf_module['description']
-        logging.info("query description: " + str(query_data_object._description))
-    except KeyError:
-        logging.info("No description for query found; ignoring.")
-        query_data_object.description = ""
+        query_collection_data_object.max_parallel_queries = query_collection_module.max_parallel_queries
+        logging.info("max_parallel_queries: " + str(query_collection_data_object._max_parallel_queries))
+    except AttributeError:
+        message = "Did not find max_parallel_queries in query collection file; executing queries one after another."
+        logging.info(message)
+        print(message)
+        query_collection_data_object.max_parallel_queries = 1
 
 
-    # query
+    # pipeline_queue_size
 
-    logging.info("Reading query of query")
+    logging.info("Reading pipeline_queue_size")
     try:
-        query_data_object.query = query_conf_module['query']
-        logging.info("sparql query: " + str(query_data_object._query))
-    except KeyError:
-        message = "ERROR: No query found in an element of list 'queries'!"
-        logging.error(message)
-        sys.exit(message)
+        query_collection_data_object.pipeline_queue_size = query_collection_module.pipeline_queue_size
+        logging.info("pipeline_queue_size: " + str(query_collection_data_object._pipeline_queue_size))
+    except AttributeError:
+        message = "Did not find pipeline_queue_size in query collection file; not running queries as pipeline."
+        logging.info(message)
+        print(message)
+        query_collection_data_object.pipeline_queue_size = 0
 
 
-    # custom_data_container
+    # max_parallel_iterations
 
-    logging.info("Reading custom_data_container of query")
+    logging.info("Reading max_parallel_iterations")
     try:
-        query_data_object.custom_data_container = query_conf_module['custom_data_container']
-        logging.info("custom_data_container: " + str(query_data_object.custom_data_container))
-    except KeyError:
-        logging.info("No custom_data_container found; ignoring.")
-        query_data_object.custom_data_container = None
+        query_collection_data_object.max_parallel_iterations = query_collection_module.max_parallel_iterations
+        logging.info("max_parallel_iterations: " + str(query_collection_data_object.max_parallel_iterations))
+    except AttributeError:
+        message = "Did not find max_parallel_iterations in query collection file; running multi-value iterations one after another."
+        logging.info(message)
+        query_collection_data_object.max_parallel_iterations = 1
 
 
-    # custom_meta_function
+    # max_parallel_pages
 
-    logging.info("Reading custom_meta_function of query")
+    logging.info("Reading max_parallel_pages")
     try:
-        query_data_object.custom_meta_function = query_conf_module['custom_meta_function']
-        logging.info("custom_meta_function: " + str(query_data_object.custom_meta_function))
-    except KeyError:
-        logging.info("No custom_meta_function found; ignoring.")
-        query_data_object.custom_meta_function = None
+        query_collection_data_object.max_parallel_pages = query_collection_module.max_parallel_pages
+        logging.info("max_parallel_pages: " + str(query_collection_data_object._max_parallel_pages))
+    except AttributeError:
+        message = "Did not find max_parallel_pages in query collection file; executing pages one after another."
+        logging.info(message)
+        query_collection_data_object.max_parallel_pages = 1
 
 
-    return query_data_object
+    # page_retries
 
+    logging.info("Reading page_retries")
+    try:
+        query_collection_data_object.page_retries = query_collection_module.page_retries
+        logging.info("page_retries: " + str(query_collection_data_object._page_retries))
+    except AttributeError:
+        message = "Did not find page_retries in query collection file; assuming zero instead."
+        logging.info(message)
+        query_collection_data_object.page_retries = 0
 
 
+    # max_connections_per_endpoint
 
-def execute_queries(query_collection_data_object):
-    """Executes all the queries and calls the writer-method from the Output_writer object to write to its specified destinations"""
+    logging.info("Reading max_connections_per_endpoint")
+    try:
+        query_collection_data_object.max_connections_per_endpoint = query_collection_module.max_connections_per_endpoint
+        logging.info("max_connections_per_endpoint: " + str(query_collection_data_object._max_connections_per_endpoint))
+    except AttributeError:
+        message = "Did not find max_connections_per_endpoint in query collection file; opening a new connection for every query."
+        logging.info(message)
+        print(message)
+        query_collection_data_object.max_connections_per_endpoint = 0
 
-    def main(query_collection_data_object):
 
-        message = \
-            "\n\n################################\n" + \
-            "Starting execution of query collection: " + query_collection_data_object.title + "\n" + \
-            "\nsparql endpoint: " + query_collection_data_object.endpoint
+    # query_timeout
+
+    logging.info("Reading query_timeout")
+    try:
+        query_collection_data_object.query_timeout = query_collection_module.query_timeout
+        logging.info("query_timeout: " + str(query_collection_data_object._query_timeout))
+    except AttributeError:
+        message = "Did not find query_timeout in query collection file; waiting for queries without timeout."
         logging.info(message)
         print(message)
+        query_collection_data_object.query_timeout = 0
 
 
+    # retry_policy
 
-        # Before executing queries, Get the count of all triples in whole triplestore
+    logging.info("Reading retry_policy")
+    try:
+        query_collection_data_object.retry_policy = query_collection_module.retry_policy
+        logging.info("retry_policy: " + str(query_collection_data_object._retry_policy))
+    except AttributeError:
+        message = "Did not find retry_policy in query collection file; not retrying failed queries."
+        logging.info(message)
+        query_collection_data_object.retry_policy = None
 
-        try:
 
-            message = "Getting count of all triples in whole triplestore"
-            logging.info(message)
-            print(message)
+    # endpoint_rate_limit
 
-            results, execution_duration = execute_query(
-                "SELECT COUNT(*) WHERE {[][][]}", query_collection_data_object.endpoint, JSON)
+    logging.info("Reading endpoint_rate_limit")
+    try:
+        query_collection_data_object.endpoint_rate_limit = query_collection_module.endpoint_rate_limit
+        logging.info("endpoint_rate_limit: " + str(query_collection_data_object._endpoint_rate_limit))
+    except AttributeError:
+        message = "Did not find endpoint_rate_limit in query collection file; not limiting requests to endpoint."
+        logging.info(message)
+        query_collection_data_object.endpoint_rate_limit = None
 
-            query_collection_data_object.count_triples_in_endpoint = \
-                results["results"]["bindings"][0]["callret-0"]["value"]
 
-            message = "count_triples_in_endpoint: " + query_collection_data_object.count_triples_in_endpoint
-            logging.info(message)
-            print(message)
+    # google_rate_limit
 
-            query_collection_data_object.header_error_message = None
+    logging.info("Reading google_rate_limit")
+    try:
+        query_collection_data_object.google_rate_limit = query_collection_module.google_rate_limit
+        logging.info("google_rate_limit: " + str(query_collection_data_object._google_rate_limit))
+    except AttributeError:
+        message = "Did not find google_rate_limit in query collection file; not limiting requests to google."
+        logging.info(message)
+        query_collection_data_object.google_rate_limit = None
 
-        except Exception as ex:
-            message = "EXCEPTION OCCURED! " + str(ex)
-            print(message)
-            logging.error(message)
-            query_collection_data_object.header_error_message = message
 
+    # cache_max_age
 
-        # Write header
+    logging.info("Reading cache_max_age")
+    try:
+        query_collection_data_object.cache_max_age = query_collection_module.cache_max_age
+        logging.info("cache_max_age: " + str(query_collection_data_object._cache_max_age))
+    except AttributeError:
+        message = "Did not find cache_max_age in query collection file; not using cache of results."
+        logging.info(message)
+        print(message)
+        query_collection_data_object.cache_max_age = 0
 
-        query_collection_data_object.output_writer.write_header_summary(query_collection_data_object)
 
+    # cache_max_size
 
-        # execute queries
+    logging.info("Reading cache_max_size")
+    try:
+        query_collection_data_object.cache_max_size = query_collection_module.cache_max_size
+        logging.info("cache_max_size: " + str(query_collection_data_object._cache_max_size))
+    except AttributeError:
+        message = "Did not find cache_max_size in query collection file; assuming 1000 megabytes."
+        logging.info(message)
+        query_collection_data_object.cache_max_size = 1000
 
-        query_id = 0
-        query_collection_data_object.queries = []
 
+    # count_triples_max_age
 
-        # Iterate over queries list in the originating python module (not over any list from a parsed data object!)
-        #
-        # Since the usage of meta_function on queries requires their logic to be implemented where the queries are written
-        # , i.e. the "query collection file" written by end-users, querPy must iterate over the list object
-        # within the according python module, contrary to reading this list into a data object and handling it all
-        # in querPy (where meta_functions could not write to). Hence this iteration goes over the original list object.
+    logging.info("Reading count_triples_max_age")
+    try:
+        query_collection_data_object.count_triples_max_age = query_collection_module.count_triples_max_age
+        logging.info("count_triples_max_age: " + str(query_collection_data_object._count_triples_max_age))
+    except AttributeError:
+        message = "Did not find count_triples_max_age in query collection file; counting all triples on every run."
+        logging.info(message)
+        print(message)
+        query_collection_data_object.count_triples_max_age = 0
 
-        for query_conf_module in query_collection_data_object.query_collection_module.queries:
 
+    # endpoint
 
-            # read in current query, constuct data object from it.
-            query_data_object = read_query_data_input(query_conf_module, query_collection_data_object)
-            query_collection_data_object.queries.append(query_data_object)
+    logging.info("Reading endpoints")
+    try:
+        query_collection_data_object.endpoint = query_collection_module.endpoint
+        logging.info("endpoint: " + str(query_collection_data_object._endpoint) )
+    except AttributeError:
+        message = "\nERROR: INVALID INPUT! Did not find endpoint in query collection file!"
+        logging.error(message)
+        sys.exit(message)
 
 
-            # read information from data object used for logging and printout
+    return query_collection_data_object
 
-            query_id += 1
-            query_data_object.id = query_id
 
-            message = \
-                "\n\n################################\nExecute\n" + \
-                "\nid: " + str(query_id) + \
-                "\nTitle: " + query_data_object.title + \
-                "\nDescription: " + query_data_object.description + \
-                "\nQuery:\n" + query_data_object.query
-            logging.info(message)
-            print(message)
+def read_query_data_input(query_conf_module, query_collection_data_object):
 
+    query_data_object = Query_data_object( query_collection_data_object=query_collection_data_object )
+    logging.info("\n\n################################\nReading in next query\n")
 
-            # execute query and query for counting the results
+    # title
 
-            startTime = time.time()
+    logging.info("Reading title of query")
+    try:
+        query_data_object.title = query_conf_module['title']
+        logging.info("query title: " + str(query_data_object._title))
+    except KeyError:
+        logging.info("No title for query found; ignoring.")
+        query_data_object.title = ""
 
-            try:
 
-                # execute query
+    # description
 
-                if query_collection_data_object.output_format == "XLSX":
-                    output_format = CSV
-                else:
-                    output_format = query_collection_data_object.output_format
+    logging.info("Reading description of query")
+    try:
+        query_data_object.description = query_conf_module['description']
+        logging.info("query description: " + str(query_data_object._description))
+    except KeyError:
+        logging.info("No description for query found; ignoring.")
+        query_data_object.description = ""
+
+
+    # query
+
+    logging.info("Reading query of query")
+    try:
+        query_data_object.query = query_conf_module['query']
+        logging.info("sparql query: " + str(query_data_object._query))
+    except KeyError:
+        message = "ERROR: No query found in an element of list 'queries'!"
+        logging.error(message)
+        sys.exit(message)
 
-                results, execution_duration = execute_query(
-                    query_data_object.query, query_collection_data_object.endpoint, output_format )
-                query_data_object.results_raw = results
-                query_data_object.results_execution_duration = execution_duration
 
+    # page_size
 
-                # execute query for counting results (if needs to be done)
+    logging.info("Reading page_size of query")
+    try:
+        query_data_object.page_size = query_conf_module['page_size']
+        logging.info("page_size: " + str(query_data_object.page_size))
+    except KeyError:
+        logging.info("No page_size found; executing query as a whole.")
+        query_data_object.page_size = None
 
-                query_data_object.query_for_count = None
-                query_data_object.results_lines_count = None
 
-                if query_collection_data_object.count_the_results:
+    # timeout
 
-                    # For this, search for the first select statement, and replace it with
-                    # select count(*) where ... and add a '}' to the end, to make the original select
-                    # a sub-query
-                    #
-                    # This requires a non-standard regex module to use variable length negative look behind
-                    # which are needed to detect only 'select' statements, where there are no '#'
-                    # before, which would make it a comment and thus not necesseray to replace
+    logging.info("Reading timeout of query")
+    try:
+        query_data_object.timeout = query_conf_module['timeout']
+        logging.info("timeout: " + str(query_data_object.timeout))
+    except KeyError:
+        logging.info("No timeout found; using query_timeout of query collection.")
+        query_data_object.timeout = None
 
-                    logging.info("Creating query for counting results.")
 
-                    pattern = regex.compile(r"(?<!#.*)select", regex.IGNORECASE | regex.MULTILINE)
-                    query_for_count = pattern.sub(
-                        "SELECT COUNT(*) WHERE { \nSELECT",
-                        query_data_object.query,
-                        1)
-                    query_for_count += "\n}"
+    # retry_policy
 
-                    query_data_object.query_for_count = query_for_count
+    logging.info("Reading retry_policy of query")
+    try:
+        query_data_object.retry_policy = query_conf_module['retry_policy']
+        logging.info("retry_policy: " + str(query_data_object.retry_policy))
+    except KeyError:
+        logging.info("No retry_policy found; using retry_policy of query collection.")
+        query_data_object.retry_policy = None
 
-                    results_lines_count, execution_duration = execute_query(
-                        query_for_count, query_collection_data_object.endpoint, JSON )
 
-                    results_lines_count = results_lines_count["results"]["bindings"][0]["callret-0"]["value"]
-                    query_data_object.results_lines_count = results_lines_count
-                    logging.info("results_lines_count: " + query_data_object.results_lines_count + "\n")
+    # custom_data_container
 
+    logging.info("Reading custom_data_container of query")
+    try:
+        query_data_object.custom_data_container = query_conf_module['custom_data_container']
+        logging.info("custom_data_container: " + str(query_data_object.custom_data_container))
+    except KeyError:
+        logging.info("No custom_data_container found; ignoring.")
+        query_data_object.custom_data_container = None
 
-            except SPARQLExceptions.SPARQLWrapperException as ex:
-                message = "EXCEPTION OCCURED WHEN EXECUTING QUERY: " + str(ex) + "\n Continue with execution of next query."
-                print(message)
-                logging.error(message)
-                query_data_object.error_message = str(ex)
-                query_data_object.results_execution_duration = time.time() - startTime
-                query_data_object.results_raw = None
+
+    # custom_meta_function
+
+    logging.info("Reading custom_meta_function of query")
+    try:
+        query_data_object.custom_meta_function = query_conf_module['custom_meta_function']
+        logging.info("custom_meta_function: " + str(query_data_object.custom_meta_function))
+    except KeyError:
+        logging.info("No custom_meta_function found; ignoring.")
+        query_data_object.custom_meta_function = None
+
+
+    return query_data_object
+
+
+
+
+def execute_queries(query_collection_data_object):
+    """Executes all the queries and calls the writer-method from the Output_writer object to write to its specified destinations"""
+
+    def main(query_collection_data_object):
+
+        message = \
+            "\n\n################################\n" + \
+            "Starting execution of query collection: " + query_collection_data_object.title + "\n" + \
+            "\nsparql endpoint: " + query_collection_data_object.endpoint
+        logging.info(message)
+        print(message)
 
 
-            message = "\nEXECUTION FINISHED\nElapsed time: " + str(query_data_object.results_execution_duration)
+
+        # set up cache of results (if used)
+
+        query_collection_data_object.result_cache = Result_cache(
+            "querPy_cache",
+            query_collection_data_object.cache_max_age,
+            query_collection_data_object.cache_max_size * 1024 * 1024,
+            query_collection_data_object.cache_mode)
+
+        if query_collection_data_object.result_cache.is_enabled():
+            message = "Using cache of results in folder 'querPy_cache' (mode: " + \
+                      query_collection_data_object.cache_mode + ")"
             logging.info(message)
             print(message)
 
 
-            # harmonize results for other uses later
+        # set up rate limiter for requests to the endpoint
 
-            logging.info("harmonizing results")
+        query_collection_data_object.endpoint_rate_limiter = Rate_limiter(
+            "endpoint", query_collection_data_object.endpoint_rate_limit)
 
-            if query_data_object.results_raw is None:
-                query_data_object.results_matrix = [[query_data_object.error_message]]
 
-            else:
-                query_data_object.results_matrix = get_harmonized_result(
-                    query_data_object.results_raw, query_collection_data_object.output_format)
+        # Before executing queries, get the count of all triples in whole triplestore. This is done in the background,
+        # so that it does not hold up the queries, and its result is written into the header once all queries are done.
 
-            logging.info("Done with harmonizing results")
+        triple_count_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        triple_count_future = triple_count_executor.submit(get_count_triples_in_endpoint, query_collection_data_object)
+        triple_count_executor.shutdown(wait=False)
 
 
-            # write results
+        # Write header
 
-            query_collection_data_object.output_writer.write_query_summary(query_data_object)
-            query_collection_data_object.output_writer.write_query_result(query_data_object)
+        query_collection_data_object.output_writer.write_header_summary(query_collection_data_object)
 
+        # rows of xlsx files written in constant memory can not be changed later on, so the count of all triples is
+        # waited for and written into the header right away
+        if query_collection_data_object.output_writer.xlsx_constant_memory:
+            triple_count_future.result()
+            query_collection_data_object.output_writer.write_header_triple_count(query_collection_data_object)
 
-            # run custom meta function (if present)
 
-            query_data_object.call_custom_meta_function()
+        # execute queries
 
+        query_id = 0
+        query_collection_data_object.queries = []
+        max_parallel_queries = query_collection_data_object.max_parallel_queries
+        pipeline_queue_size = query_collection_data_object.pipeline_queue_size
+
+        # queries are processed in a pipeline of three stages: executing them (by a pool of up to max_parallel_queries
+        # worker threads), harmonizing their results (by a worker thread of its own) and writing them, which is always
+        # done here in the order of the query ids. Thus the summary looks the same as when run in serial, while the
+        # endpoint is already queried for the next queries during harmonizing and writing.
+        # The stages are connected by queues of up to pipeline_queue_size queries: the queue from executing to
+        # harmonizing, and the queries waiting for being written. A stage waits once its queue is full, so that at most
+        # max_parallel_queries + 2 * pipeline_queue_size queries are in the pipeline (and hold results in memory).
+        # With a pipeline_queue_size of 0, queries are executed and harmonized together, and only in parallel if
+        # max_parallel_queries is greater than 1.
+        max_pending_queries = max_parallel_queries + 2 * pipeline_queue_size
+
+        if max_parallel_queries > 1:
+            message = "Executing up to " + str(max_parallel_queries) + " queries in parallel."
+            logging.info(message)
+            print(message)
 
-            # cooldown between query-runs to prevent google api exhaustion
+        if max_pending_queries > 1:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_parallel_queries)
+        else:
+            executor = None
 
-            cooldown = query_collection_data_object.cooldown_between_queries
-            number_queries =  len(query_collection_data_object.query_collection_module.queries)
-            if cooldown > 0 and query_id < number_queries:
+        if pipeline_queue_size > 0:
+            harmonize_queue = queue.Queue(maxsize=pipeline_queue_size)
+            harmonize_thread = threading.Thread(
+                target=harmonize_queries_in_pipeline, args=(harmonize_queue,), name="harmonize", daemon=True)
+            harmonize_thread.start()
+        else:
+            harmonize_queue = None
 
-                print("\nSleep for " + str(query_collection_data_object.cooldown_between_queries) + " seconds.")
-                time.sleep(query_collection_data_object.cooldown_between_queries)
 
+        # Iterate over queries list in the originating python module (not over any list from a parsed data object!)
+        #
+        # Since the usage of meta_function on queries requires their logic to be implemented where the queries are written
+        # , i.e. the "query collection file" written by end-users, querPy must iterate over the list object
+        # within the according python module, contrary to reading this list into a data object and handling it all
+        # in querPy (where meta_functions could not write to). Hence this iteration goes over the original list object.
+        #
+        # Since a meta_function could change the queries which follow it, a query having a meta_function acts as a
+        # barrier: no further queries are read from the list until it is executed, written, and its meta_function
+        # has been called.
 
-            # done with executing query; add its data_object to the collection_data_object
+        query_index = 0
+        pending_queries = collections.deque()
+        waiting_for_meta_function = False
 
-            query_collection_data_object.queries.append(query_data_object)
+        try:
 
+            while True:
+
+                # read in as many queries as there are free workers, constuct data objects from them and start them
+
+                queries_list = query_collection_data_object.query_collection_module.queries
+                while not waiting_for_meta_function and \
+                        query_index < len(queries_list) and \
+                        len(pending_queries) < max_pending_queries:
+
+                    query_data_object = read_query_data_input(queries_list[query_index], query_collection_data_object)
+                    query_collection_data_object.queries.append(query_data_object)
+                    query_index += 1
+
+                    query_id += 1
+                    query_data_object.id = query_id
+
+                    # queries completed by an interrupted run are restored from the checkpoint journal, and when
+                    # running incrementally, unchanged queries are reused from the previous run
+
+                    checkpoint_journal = query_collection_data_object.checkpoint_journal
+                    journal_entry = checkpoint_journal.get_completed_query(query_data_object)
+                    previous_entry = checkpoint_journal.get_unchanged_query(
+                        query_data_object, query_collection_data_object.output_writer.output_destination_type)
+
+                    if journal_entry is not None:
+                        message = "Restoring query " + str(query_id) + " from checkpoint journal: " + query_data_object.title
+                        logging.info(message)
+                        print(message)
+                        checkpoint_journal.restore_query(query_data_object, journal_entry)
+                        future = None
+                    elif previous_entry is not None:
+                        message = "Reusing results of unchanged query " + str(query_id) + " from previous run: " + \
+                                  query_data_object.title
+                        logging.info(message)
+                        print(message)
+                        checkpoint_journal.restore_query(query_data_object, previous_entry, reused=True)
+                        future = None
+                    elif executor is None:
+                        execute_and_harmonize_query_data_object(query_data_object)
+                        future = None
+                    elif harmonize_queue is None:
+                        future = executor.submit(execute_and_harmonize_query_data_object, query_data_object)
+                    else:
+                        future = concurrent.futures.Future()
+                        executor.submit(execute_query_in_pipeline, query_data_object, harmonize_queue, future)
 
+                    pending_queries.append((query_data_object, future))
 
-    def execute_query( query_string, endpoint, results_format ):
-        """executes a query provided as string and returns the results in the asked-for format.
-        Also returns duration of execution"""
+                    if query_data_object.custom_meta_function is not None:
+                        waiting_for_meta_function = True
 
-        logging.info("Executing query: " + query_string)
+                if len(pending_queries) == 0:
+                    break
 
-        # Currently onyl accepts formats: CSV, TSV, XML, JSON
-        # Other formats such as rdf-xml, turtle, and n-triples could be possible with a bit of tweaking.
-        # Problems encountered so far are summarized here:
-        # https://github.com/RDFLib/sparqlwrapper/issues/107
-        sparql_wrapper = SPARQLWrapper(endpoint)
-        sparql_wrapper.setQuery( query_string )
-        sparql_wrapper.setReturnFormat( results_format )
 
-        startTime = time.time()
-        results = sparql_wrapper.query().convert()
-        execution_duration = time.time() - startTime
+                # write the oldest pending query, once it is done
 
-        return results, execution_duration
+                query_data_object, future = pending_queries.popleft()
+                if future is not None:
+                    future.result()
 
+                write_query_data_object(query_data_object)
 
-    def get_harmonized_result(result, format):
-        """Transforms the result data from its varying data formats into a two-dimensional list, used for writing summaries or into xlsx / google sheets files"""
+                if query_data_object.custom_meta_function is not None:
+                    waiting_for_meta_function = False
 
-        def get_harmonized_rows_from_keyed_rows(result_sample_keyed):
-            """Some output formats require an intermediate step where the individual result rows are initially indexed by keys and their layout might change from row to row. Thus this methods iterate over each key-value row and transforms it into a regular two-dimensional list, where every column is identifiable by the same column-key"""
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+            if harmonize_queue is not None:
+                harmonize_queue.put(None)
+                harmonize_thread.join()
 
-            # transform the result_sample_keyed into a regular two-dimensional list used for later inserting into xlsx or google sheets
-            harmonized_rows = []
-            harmonized_rows.append(result_sample_keyed[0])
 
-            for y in range(1, len(result_sample_keyed)):
+        # Write count of all triples into header
 
-                sample_row = []
-                for x in range(0, len(harmonized_rows[0])):
-                    key = harmonized_rows[0][x]
-                    sample_row.append(result_sample_keyed[y][key])
+        if not query_collection_data_object.output_writer.xlsx_constant_memory:
+            triple_count_future.result()
+            query_collection_data_object.output_writer.write_header_triple_count(query_collection_data_object)
 
-                harmonized_rows.append(sample_row)
 
-            return harmonized_rows
+    def get_count_triples_in_endpoint(query_collection_data_object):
+        """Gets the count of all triples in whole triplestore, and saves it in the query_collection_data_object.
+        A count which is not older than count_triples_max_age is reused instead (from earlier multi-value
+        iterations against the same endpoint, or from earlier runs)."""
 
+        try:
 
-        harmonized_result = []
+            message = "Getting count of all triples in whole triplestore"
+            logging.info(message)
+            print(message)
 
-        if result is None:
-            return None
-        else:
+            endpoint = query_collection_data_object.endpoint
+            cached_count = triple_count_cache.get(endpoint, query_collection_data_object.count_triples_max_age)
 
+            if cached_count is not None:
+                query_collection_data_object.count_triples_in_endpoint, \
+                    query_collection_data_object.count_triples_in_endpoint_timestamp = cached_count
 
-            # CSV, TSV, XLSX (since XLSX means CSV is internally used for querying the endpoint)
+            else:
+                results, execution_duration = execute_query(
+                    "SELECT COUNT(*) WHERE {[][][]}", endpoint, JSON)
 
-            if format == CSV or format == TSV or format == "XLSX":
+                query_collection_data_object.count_triples_in_endpoint = \
+                    json.loads(results.decode('utf-8'))["results"]["bindings"][0]["callret-0"]["value"]
+                query_collection_data_object.count_triples_in_endpoint_timestamp = None
 
-                result = result.decode('utf-8').splitlines()
-                harmonized_result = []
-                valid_row_length = float("inf")
+                # only kept for reuse if reusing counts is enabled at all
+                if query_collection_data_object.count_triples_max_age > 0:
+                    triple_count_cache.put(endpoint, query_collection_data_object.count_triples_in_endpoint)
 
-                if format == TSV:
-                    reader = csv.reader(result, delimiter="\t")
-                else:
-                    reader = csv.reader(result)
+            message = "count_triples_in_endpoint: " + query_collection_data_object.count_triples_in_endpoint
+            logging.info(message)
+            print(message)
 
-                for row in reader:
+            query_collection_data_object.header_error_message = None
 
-                    row_harmonized = []
+        except Exception as ex:
+            message = "EXCEPTION OCCURED! " + str(ex)
+            print(message)
+            logging.error(message)
+            query_collection_data_object.header_error_message = message
 
-                    for column in row:
 
-                        # check if value could be integer, if so change type
-                        try:
-                            column = int(column)
-                        except ValueError:
-                            pass
+    def execute_query_data_object(query_data_object):
+        """Executes a query and its query for counting the results.
+        Does not write anything (except results streamed to disk), so that this can be run in parallel for several
+        queries."""
 
-                        row_harmonized.append(column)
+        query_collection_data_object = query_data_object._query_collection_data_object
 
-                    harmonized_result.append(row_harmonized)
+        # read information from data object used for logging and printout
 
-                    # check validity of results
-                    current_row_length = len(row)
-                    if valid_row_length != float("inf") and valid_row_length != current_row_length:
-                        message = "\nERROR: INVALID ROW LENGTH! " + str(row) + " has length " + str(current_row_length) + ", while valid length is " + str(valid_row_length)
-                        logging.error(message)
-                        sys.exit(message)
-                    valid_row_length = current_row_length
+        message = \
+            "\n\n################################\nExecute\n" + \
+            "\nid: " + str(query_data_object.id) + \
+            "\nTitle: " + query_data_object.title + \
+            "\nDescription: " + query_data_object.description + \
+            "\nQuery:\n" + query_data_object.query
+        logging.info(message)
+        print(message)
 
+        query_collection_data_object.report_progress('query_executing', query_data_object)
 
-            # JSON
 
-            elif format == JSON:
+        # execute query and query for counting the results
 
-                # construct list of dictionaries (to preserve the key-value pairing of individual row-results)
+        startTime = time.time()
 
-                result_keyed = []
+        query_data_object.query_for_count = None
+        query_data_object.error_message = None
+        query_data_object.results_lines_count = None
+        query_data_object.results_cache_timestamp = None
+        query_data_object.results_file = None
+        query_data_object.results_pages_durations = None
+        query_data_object.results_attempts = 0
+        query_data_object.results_count_attempts = 0
+        query_data_object.results_retry_duration = 0
+        query_data_object.results_stage_durations = {}
 
-                # get keys and save in first row of result_keyed
-                keys = []
-                for key in result.results_raw['bindings'][0]:
-                    keys.append(key)
-                result_keyed.append(keys)
+        count_future = None
 
-                # go through the json - rows and extract key-value pairs from each, insert them into result_keyed
-                valid_row_length = len(keys)
-                for y in range(0, len(result.results_raw['bindings'])):
-                    dict_tmp = {}
+        try:
 
-                    row = result.results_raw['bindings'][y]
+            # dispatch query for counting results (if needs to be done), so that it runs at the same time as the
+            # query itself. Not needed if the results are counted from the downloaded results instead.
 
-                    for key in row:
-                        column = row[key]['value']
+            if query_collection_data_object.count_the_results and \
+                    not query_collection_data_object.count_from_downloaded_results:
 
-                        # check if value could be integer, if so change type
-                        try:
-                            column = int(column)
-                        except ValueError:
-                            pass
+                query_for_count = get_query_for_count(query_data_object.query)
+                query_data_object.query_for_count = query_for_count
 
-                        dict_tmp[key] = column
+                count_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+                count_future = count_executor.submit(
+                    execute_query_with_cache, query_for_count, query_collection_data_object.endpoint, JSON,
+                    query_data_object, 'count_query' )
+                count_executor.shutdown(wait=False)
 
-                    # check validity of results
-                    if len(row) != valid_row_length:
-                        message = "\nERROR: INVALID ROW LENGTH! " + str(row) + " has length " + str(len(row)) + ", while valid length is " + str(valid_row_length)
-                        logging.error(message)
-                        sys.exit(message)
 
-                    result_keyed.append(dict_tmp)
+            # execute query
 
-                harmonized_result = get_harmonized_rows_from_keyed_rows(result_keyed)
+            if query_collection_data_object.output_format == "XLSX":
+                output_format = CSV
+            else:
+                output_format = query_collection_data_object.output_format
 
+            if query_data_object.page_size is not None:
 
-            # XML
+                # results are fetched in pages and joined afterwards (streamed to disk if set so)
 
-            elif format == XML:
+                if is_streamed_to_disk(output_format):
+                    local_file = query_collection_data_object.output_writer.get_local_file_path(query_data_object)
+                    query_data_object.results_file = local_file
+                else:
+                    local_file = None
 
-                # construct list of dictionaries (to preserve the key-value pairing of individual row-results)
+                results, execution_duration = execute_query_in_pages(query_data_object, output_format, local_file)
+                query_data_object.results_raw = results
+                query_data_object.results_execution_duration = execution_duration
 
-                result_keyed = []
+            elif is_streamed_to_disk(output_format):
 
-                # get keys and save in first row of result_keyed
-                vars = result.getElementsByTagName("head")[0].getElementsByTagName("variable")
-                keys = []
-                for var in vars:
-                    keys.append(var.getAttribute('name'))
-                result_keyed.append(keys)
+                # results are written in chunks directly into their file in the local folder, instead of keeping
+                # them in memory. The path of the file is then used as raw results.
 
-                # get results rows
-                results = result.getElementsByTagName("result")
+                local_file = query_collection_data_object.output_writer.get_local_file_path(query_data_object)
+                query_data_object.results_file = local_file
+                execution_duration = execute_query_to_file(
+                    query_data_object.query, query_collection_data_object.endpoint, output_format, local_file,
+                    query_data_object )
+                query_data_object.results_raw = local_file
+                query_data_object.results_execution_duration = execution_duration
 
-                # go through the xml results and extract key-value pairs from each, insert them into result_keyed
-                valid_row_length = len(keys)
-                for y in range(0, len(results)):
+            else:
 
-                    result = results[y]
+                results, execution_duration, cache_timestamp = execute_query_with_cache(
+                    query_data_object.query, query_collection_data_object.endpoint, output_format,
+                    query_data_object )
+                query_data_object.results_raw = results
+                query_data_object.results_execution_duration = execution_duration
+                query_data_object.results_cache_timestamp = cache_timestamp
 
-                    dict_tmp = {}
-                    for binding in result.getElementsByTagName("binding"):
-                        # column = binding.childNodes[0].childNodes[0].nodeValue
 
-                        child_node = binding.childNodes[0]
+            # join query for counting results
 
-                        if child_node.localName == "literal" and child_node.childNodes == [] :
-                            column = ""
-                        else:
-                            column = child_node.childNodes[0].nodeValue
+            if count_future is not None:
 
-                        # TODO: Check if this is best practice?
-                        # check if value could be turned into an integer. If so change type, if not nothing happens
-                        try:
-                            column = int(column)
-                        except ValueError:
-                            pass
+                results_lines_count, execution_duration, cache_timestamp = count_future.result()
 
-                        dict_tmp[binding.getAttribute('name')] = column
+                results_lines_count = \
+                    json.loads(results_lines_count.decode('utf-8'))["results"]["bindings"][0]["callret-0"]["value"]
+                query_data_object.results_lines_count = results_lines_count
+                logging.info("results_lines_count: " + query_data_object.results_lines_count + "\n")
 
-                    # check validity of results
-                    if len(dict_tmp) != valid_row_length:
-                        message = "\nERROR: INVALID ROW LENGTH! " + str(dict_tmp) + " has length " + str(len(dict_tmp)) + ", while valid length is " + str(valid_row_length)
-                        logging.error(message)
-                        sys.exit(message)
 
-                    result_keyed.append(dict_tmp)
+        except SPARQLExceptions.SPARQLWrapperException as ex:
+            message = "EXCEPTION OCCURED WHEN EXECUTING QUERY: " + str(ex) + "\n Continue with execution of next query."
+            print(message)
+            logging.error(message)
+            query_data_object.error_message = str(ex)
+            query_data_object.results_execution_duration = time.time() - startTime
+            query_data_object.results_raw = None
 
-                harmonized_result = get_harmonized_rows_from_keyed_rows(result_keyed)
+            # remove what might have been streamed to disk until the error occured
+            if query_data_object.results_file is not None:
+                if query_data_object.results_file.exists():
+                    query_data_object.results_file.unlink()
+                query_data_object.results_file = None
 
-            return harmonized_result
+        finally:
 
-    return main(query_collection_data_object)
+            # if the query failed, the query for counting its results is not needed anymore. It is cancelled, or waited
+            # for if running already, so that it does not keep a connection to the endpoint busy (or records into the
+            # query data object) while the next queries are executed. Its own errors are of no interest then.
+            if count_future is not None and not count_future.cancel():
+                concurrent.futures.wait([ count_future ])
 
 
-def create_template():
-    """Creates a template for the query collection file in the relative folder, where the script is executed"""
+        message = "\nEXECUTION FINISHED\nid: " + str(query_data_object.id) + \
+                  "\nElapsed time: " + str(query_data_object.results_execution_duration)
+        logging.info(message)
+        print(message)
 
-    template = """
+        query_collection_data_object.report_progress('query_executed', query_data_object)
 
 
-# -------------------- OPTIONAL SETTINGS -------------------- 
+    def harmonize_query_data_object(query_data_object):
+        """Harmonizes the results of an executed query for other uses later (summaries, xlsx / google sheets files)"""
 
-# title
-# defines the title of the whole set of queries
-# OPTIONAL, if not set, timestamp will be used
-title = \"TEST QUERIES\"
+        query_collection_data_object = query_data_object._query_collection_data_object
 
+        logging.info("harmonizing results")
 
-# description
-# defines the textual and human-intended description of the purpose of these queries
-# OPTIONAL, if not set, nothing will be used or displayed
-description = \"This set of queries is used as a template for showcasing a valid query collection file.\"
+        count_from_downloaded_results = \
+            query_data_object.results_raw is not None and \
+            query_collection_data_object.count_the_results and \
+            query_collection_data_object.count_from_downloaded_results
 
+        if query_data_object.results_raw is None:
+            query_data_object.results_matrix = [[query_data_object.error_message]]
 
-# output_destination
-# defines where to save the results, input can be: 
-# * a local path to a folder 
-# * a URL for a google sheets document  
-# * a URL for a google folder
-# NOTE: On windows, folders in a path use backslashes, in such a case it is mandatory to attach a 'r' in front of the quotes, e.g. r\"C:\\Users\\sresch\\..\"
-# In the other cases the 'r' is simply ignored; thus best would be to always leave it there.
-# OPTIONAL, if not set, folder of executed script will be used
-output_destination = r\".\"
+        elif query_data_object.results_file is not None:
 
+            # of results streamed to disk, only the rows needed for the summary are harmonized (but if the results
+            # are to be counted from the downloaded results, then all rows need to be read for counting)
+            query_data_object.results_matrix, rows_count = get_harmonized_result_from_file(
+                query_data_object.results_file,
+                query_collection_data_object.output_format,
+                max(query_collection_data_object.summary_sample_limit, 1),
+                count_from_downloaded_results,
+                query_data_object)
 
-# output_format
-# defines the format in which the result data shall be saved (currently available: csv, tsv, xml, json, xlsx)
-# OPTIONAL, if not set, csv will be used
-output_format = \"csv\"
+        else:
+            query_data_object.results_matrix = get_harmonized_result(
+                query_data_object.results_raw, query_collection_data_object.output_format, query_data_object)
+            rows_count = len(query_data_object.results_matrix)
 
+        logging.info("Done with harmonizing results")
 
-# summary_sample_limit
-# defines how many rows shall be displayed in the summary
-# OPTIONAL, if not set, 5 will be used
-summary_sample_limit = 3
 
+        # count results from the downloaded results (if needs to be done), saving the query for counting
 
-# cooldown_between_queries
-# defines how many seconds should be waited between execution of individual queries in order to prevent exhaustion of Google API due to too many writes per time-interval
-# OPTIONAL, if not set, 0 will be used
-cooldown_between_queries = 0
+        if count_from_downloaded_results:
 
+            query_data_object.results_lines_count = rows_count - 1
+            logging.info("results_lines_count (from downloaded results): " +
+                         str(query_data_object.results_lines_count) + "\n")
 
-# write_empty_results
-# Should tabs be created in a summary file for queries which did not return results? Possible values are python boolean values: True, False
-# OPTIONAL, if not set, False will be used
-write_empty_results = False
 
+    def execute_and_harmonize_query_data_object(query_data_object):
+        """Executes a query and harmonizes its results, used if these are not run as separate stages"""
 
-# -------------------- MANDATORY SETTINGS -------------------- 
+        execute_query_data_object(query_data_object)
+        harmonize_query_data_object(query_data_object)
 
-# endpoint
-# defines the SPARQL endpoint against which all the queries are run
-# MANDATORY
-endpoint = \"http://dbpedia.org/sparql\"
 
-# queries
-# defines the set of queries to be run. 
-# MANDATAORY
-queries = [
-    {
-        # title
-        # OPTIONAL, if not set, timestamp will be used
-        \"title\" : \"Optional title of first query\" ,
+    def execute_query_in_pipeline(query_data_object, harmonize_queue, future):
+        """First stage of the pipeline: executes a query, then puts it into the queue for being harmonized (waiting
+        while the queue is full). Errors are passed on to the future of the query."""
 
-        # description
-        # OPTIONAL, if not set, nothing will be used or displayed
-        \"description\" : \"Optional description of first query, used to describe the purpose of the query.\" ,
+        try:
+            execute_query_data_object(query_data_object)
+        except BaseException as ex:
+            future.set_exception(ex)
+            return
 
-        # query
-        # the sparql query itself
-        # NOTE: best practise is to attach a 'r' before the string so that python would not interpret some characters as metacharacters, e.g. \"\\n\"
-        # MANDATORY
-        \"query\" : r\"\"\"
-            SELECT * WHERE {
-                ?s ?p ?o
-            }
-            LIMIT 50
-        \"\"\"
-    },   
-    {    
-        \"title\" : \"Second query\" , 
-        \"description\" : \"This query returns all triples which have a label associated\" , 
-        \"query\" : r\"\"\"
-            SELECT * WHERE {
-                ?s <http://www.w3.org/2000/01/rdf-schema#label> ?o
-            }
-            LIMIT 50
-        \"\"\"
-    },
-    {    
-        \"query\" : r\"\"\"
-            SELECT * WHERE {
-                ?s ?p ?o . 
-                FILTER ( ?p = <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> )
-            }
-            LIMIT 50
-        \"\"\"
-    },
-]
+        harmonize_queue.put((query_data_object, future))
 
-# Each query is itself encoded as a python dictionary, and together these dictionaries are collected in a python list. 
-# Beginner's note on such syntax as follows:
-# * the set of queries is enclosed by '[' and ']'
-# * individual queries are enclosed by '{' and '},'
-# * All elements of a query (title, description, query) need to be defined using quotes as well as their contents, and both need to be separated by ':'
-# * All elements of a query (title, description, query) need to be separated from each other using quotes ','
-# * The content of a query needs to be defined using triple quotes, e.g. \"\"\" SELECT * WHERE .... \"\"\"
-# * Any indentation (tabs or spaces) do not influence the queries-syntax, they are merely syntactic sugar.
 
+    def harmonize_queries_in_pipeline(harmonize_queue):
+        """Second stage of the pipeline: harmonizes the queries taken from the queue one after another, until None is
+        taken. Then sets the future of each query, which the third stage (writing) waits for."""
 
+        while True:
 
-# --------------- CUSTOM POST-PROCESSING METHOD --------------- 
-'''
-The method 'custom_post_processing(results)' is a stump for custom post processing which is always called if present and to which
-result data from the query execution is passed. This way you can implement your own post-processing steps there.
+            item = harmonize_queue.get()
+            if item is None:
+                return
 
-The incoming 'results' argument is a list, where each list-element is a dictionary represting all data of a query.
+            query_data_object, future = item
 
-This dictionary has the following keys and respective values:
+            try:
+                harmonize_query_data_object(query_data_object)
+            except BaseException as ex:
+                future.set_exception(ex)
+            else:
+                future.set_result(query_data_object)
 
-* most likely to be needed are these two keys and values:
-'query_title' - title of an individual query, as defined above.
-'results_matrix' - the result data organized as a two dimensional list, where the first row contains the headers. 
-This value is what you would most likely need to post process the result data.  
 
-* other than these two, each query dictionary also contains data from and for querPy, which might be of use:
-'query_description' - description of an individual query, as defined above.
-'query_text' - the sparql query itself.
-'results_execution_duration' - the duration it took to run the sparql query.
-'results_lines_count' - the number of lines the sparql query produced at the triplestore.
-'results_raw' - the result data in the specified format, encapsulated by its respective python class (e.g. a python json object).
-'query_for_count' - an infered query from the original query, is used to get number of result lines at the triplestore.
+    def write_query_data_object(query_data_object):
+        """Writes the results of an executed query, calls its meta function and cools down afterwards.
+        Must be called in the order of the query ids."""
 
-As an example to print the raw data from the second query defined above, write:
-print(results[1].results_matrix)
-'''
+        query_collection_data_object = query_data_object._query_collection_data_object
 
-# UNCOMMENT THE FOLLOWING LINES FOR A QUICKSTART:
-'''    
-def custom_post_processing(results):
 
-    print(\"\\n\\Samples from the raw data:\\n\")
+        # write results (the durations of writing and of the stages after it can not be written into the summary
+        # anymore, but are kept for the run report)
 
-    for result in results:
+        with query_data_object.measure_stage('write_summary'):
+            query_collection_data_object.output_writer.write_query_summary(query_data_object)
+        with query_data_object.measure_stage('write_result'):
+            query_collection_data_object.output_writer.write_query_result(query_data_object)
 
-        print(\"some results of query: \" + result.title)
 
-        limit = 5 if len(result.results_matrix) > 5 else len(result.results_matrix)
-        for i in range(0, limit):
-            print(result.results_matrix[i])
+        # record the query as completed in the checkpoint journal, once what was written for it is in the output
+        # (writes into google sheets are batched)
 
-        print()
-'''
-"""
+        if not query_data_object.results_restored or query_data_object.results_reused:
+            query_collection_data_object.output_writer.call_when_written(
+                query_collection_data_object.checkpoint_journal.record_query,
+                query_data_object, query_collection_data_object.output_writer)
 
-    with open('template.py', 'w') as f:
-        f.write(template)
 
+        # run custom meta function (if present), which might look into the output
 
-class Output_writer:
-    """the Output_writer Class encapsulates all technical details which vary due to the specified output destinations"""
+        if query_data_object.custom_meta_function is not None:
+            query_collection_data_object.output_writer.flush()
 
-    # general variables
-    output_destination_type = None
-    summary_sample_limit = None
-    line_number = None
+        with query_data_object.measure_stage('meta_function'):
+            query_data_object.call_custom_meta_function()
 
-    # local folder and xlsx variables
-    folder = None
-    file_xlsx = None
-    xlsx_workbook = None
-    xlsx_worksheet_summary = None
-    output_format = None
-    bold_format = None
-    title_2_format = None
-    query_text_format = None
 
-    # google folder and sheets variables
-    google_service_sheets = None
-    google_service_drive = None
-    google_sheets_id = None
-    google_sheets_summary_sheet_id = None
+        # cooldown between query-runs to prevent google api exhaustion
 
-    def __init__(self, query_collection_data_object):
+        cooldown = query_collection_data_object.cooldown_between_queries
+        number_queries =  len(query_collection_data_object.query_collection_module.queries)
+        if cooldown > 0 and query_data_object.id < number_queries and not query_data_object.results_restored:
 
-        def main():
+            print("\nSleep for " + str(query_collection_data_object.cooldown_between_queries) + " seconds.")
+            with query_data_object.measure_stage('cooldown'):
+                time.sleep(query_collection_data_object.cooldown_between_queries)
 
-            message = "\n\n################################\n" + \
-            "Setting up output destination: " + query_collection_data_object.output_destination + "\n"
-            logging.info(message)
-            print(message)
 
-            self.summary_sample_limit = query_collection_data_object.summary_sample_limit
-            self.write_empty_results = query_collection_data_object.write_empty_results
+        # done with executing query; add its data_object to the collection_data_object
 
+        query_collection_data_object.queries.append(query_data_object)
+        query_collection_data_object.report_progress('query_written', query_data_object)
 
-            # output_destination_type, interpret from string
 
-            if "google.com/drive/folders" in query_collection_data_object.output_destination:
-                self.output_destination_type = "google_folder"
-                logging.info("deduced output_destination_type: " + self.output_destination_type)
-                init_google_folder()
 
-            elif "google.com/spreadsheets" in query_collection_data_object.output_destination:
-                self.output_destination_type = "google_sheets"
-                logging.info("deduced output_destination_type: " + self.output_destination_type)
-                init_google_sheets()
+    def get_query_for_count(query_string):
+        """Creates a query for counting the results of a given query
 
-            elif query_collection_data_object.output_format == "XLSX" :
-                self.output_destination_type = "local_xlsx"
-                logging.info("deduced output_destination_type: " + self.output_destination_type)
-                init_local_xlsx()
+        For this, search for the first select statement, and replace it with
+        select count(*) where ... and add a '}' to the end, to make the original select
+        a sub-query
 
-            else:
-                self.output_destination_type = "local_folder"
-                logging.info("deduced output_destination_type: " + self.output_destination_type)
-                init_local_folder()
+        This requires a non-standard regex module to use variable length negative look behind
+        which are needed to detect only 'select' statements, where there are no '#'
+        before, which would make it a comment and thus not necesseray to replace"""
 
+        logging.info("Creating query for counting results.")
 
-        def init_local_xlsx():
-            """Creates a xlsx file in the respective folder"""
+        return get_query_as_sub_query(query_string, "SELECT COUNT(*) WHERE { \nSELECT", "\n}")
 
-            # if locally saved, then "/" needs to be replaced with "-", since otherwise "/" would be interpreted as subfolder
-            file_name = query_collection_data_object.title.replace("/", "-")
 
-            # get or create folder for xlsx file
-            self.folder = Path(str(query_collection_data_object.output_destination))
-            self.folder.mkdir(parents=True, exist_ok=True)
+    def get_query_for_page(query_string, page_size, page_number):
+        """Creates a query for getting one page of the results of a given query, by making the original select a
+        sub-query the same way as for counting the results, and limiting the outer select to the page. The pages are
+        only consistent if the query is ordered (see 'is_query_ordered')"""
 
-            # create xlsx file
-            self.file_xlsx = Path(
-                self.folder / str(query_collection_data_object.timestamp_start + " - " + file_name + ".xlsx") )
-            self.xlsx_workbook = xlsxwriter.Workbook(self.file_xlsx.open('wb'))
-            self.xlsx_worksheet_summary = self.xlsx_workbook.add_worksheet("0. Summary")
+        return get_query_as_sub_query(
+            query_string,
+            "SELECT * WHERE { \nSELECT",
+            "\n}\nLIMIT " + str(page_size) + "\nOFFSET " + str(page_size * page_number))
 
-            message = "Created local file: " + str(self.file_xlsx)
-            logging.info(message)
-            print(message)
 
+    def is_query_ordered(query_string):
+        """Returns whether a query contains an ORDER BY (which is not commented out)"""
 
-        def init_local_folder():
-            """Creates a folder (for the raw ouput) and a xlsx file (for the summary) in the respective folder"""
+        import regex
 
-            # if locally saved, then "/" needs to be replaced with "-", since otherwise "/" would be interpreted as subfolder
-            folder_name = query_collection_data_object.title.replace("/", "-")
+        return regex.search(r"(?<!#.*)order\s+by", query_string, regex.IGNORECASE | regex.MULTILINE) is not None
 
 
-            # create folder for queries and summary
+    def get_query_as_sub_query(query_string, replacement_select, appendix):
+        """Replaces the first select statement (which is not commented out) in a query with replacement_select
+        and attaches appendix to the end"""
 
-            self.folder = Path(str(
-                query_collection_data_object.output_destination + "/" +
-                query_collection_data_object.timestamp_start + " - " +
-                folder_name))
+        # the variable-length lookbehind is not supported by the standard library's re
+        import regex
 
-            self.folder.mkdir(parents=True, exist_ok=False)
+        pattern = regex.compile(r"(?<!#.*)select", regex.IGNORECASE | regex.MULTILINE)
+        query_as_sub_query = pattern.sub(
+            replacement_select,
+            query_string,
+            1)
+        query_as_sub_query += appendix
 
-            self.output_format = query_collection_data_object.output_format
+        return query_as_sub_query
 
 
-            # Create xlsx file for summary
+    def execute_query( query_string, endpoint, results_format, query_data_object=None, stage=None ):
+        """executes a query provided as string and returns the results in the asked-for format.
+        Also returns duration of execution.
+        If a query_data_object is given, its timeout and retry_policy are used and its attempts and the durations of
+        the stages of its requests are recorded (or the whole duration as the given stage instead)."""
 
-            self.file_xlsx = Path(self.folder / "0. Summary.xlsx")
-            self.xlsx_workbook = xlsxwriter.Workbook(self.file_xlsx.open('wb'))
-            self.xlsx_worksheet_summary = self.xlsx_workbook.add_worksheet("0. Summary")
+        return execute_with_retries(
+            send_query, query_data_object, query_string, endpoint, results_format, stage=stage)
 
-            message = "Created local folder: " + str(self.folder)
-            logging.info(message)
-            print(message)
 
+    def execute_with_retries(send_function, query_data_object, *args, stage=None):
+        """Calls a function sending a request to the endpoint, once the rate limiter of the endpoint allows it.
 
-        def init_google_services():
-            """Instantiates all necessary services for writing results to a specified google folder / sheets-file"""
+        If the endpoint responds that too many requests were sent (HTTP 429), the rate limiter is paused for as long
+        as the endpoint asks for, and the request is sent again.
+        If the request fails otherwise, it is sent again according to the retry policy (of the query_data_object if
+        given, otherwise of the query collection), waiting exponentially longer (with random jitter) after every
+        attempt. Timeouts and connection errors are always retried, HTTP errors only if their status code is
+        listed in the retry policy.
 
-            SCOPES = "https://www.googleapis.com/auth/drive"
+        The send function records the durations of connecting, waiting for the first byte and downloading into the
+        dictionary passed to it, which are added to the stage durations of the query_data_object. If a stage is
+        given, the whole duration (including retries) is recorded as this stage instead."""
 
-            # Hardwired credentials
-            #
-            # !!! CAUTION !!!
-            #
-            # POSSIBILITY OF GRANTING FULL ACCESS TO YOUR PRIVATE GOOGLE DRIVE
-            #
-            # For ease of usage on your local machine, you can hardwire your credentials here
-            # BUT ONLY DO THIS IF YOU NEVER SHARE THIS MODIFIED SCRIPT
-            #
-            # NEVER INSERT YOUR CREDENTIALS IF YOU WILL SHARE THIS SCRIPT!!
+        rate_limiter = query_collection_data_object.endpoint_rate_limiter
 
+        if query_data_object is not None:
+            timeout = query_data_object.timeout
+            retry_policy = query_data_object.retry_policy
+        else:
+            timeout = query_collection_data_object.query_timeout
+            retry_policy = query_collection_data_object.retry_policy
 
-            # UNCOMMENT THE FOLLOWING LINES AND INSERT CONTENT OF CREDENTIALS.JSON FILE THERE
-            # creds_hardcoded = json.loads("""
-            #
-            # """)
+        attempt = 0
+        too_many_requests_count = 0
+        retry_duration = 0
+        startTime = time.time()
 
-            # COMMENT OR DELETE THIS LINE
-            creds_hardcoded = None
+        try:
 
+            while True:
 
-            # use credentials file if available
+                rate_limiter.acquire()
+                attempt += 1
+                stage_durations = {}
 
-            if query_collection_data_object.credentials_path:
-                creds = client.GoogleCredentials.from_json(open(query_collection_data_object.credentials_path).read())
+                try:
+                    return send_function(*args, timeout, stage_durations)
 
-            # if no credentials file is available, then create one using client_secret
-            elif query_collection_data_object.client_secret_path:
-                store = file.Storage('credentials.json')
-                flow = client.flow_from_clientsecrets(query_collection_data_object.client_secret_path, SCOPES)
+                except SPARQLExceptions.SPARQLWrapperException as ex:
 
-                # note: adding 'tools.argparser.parse_args(args=[])' here is important, otherwise
-                # oauth2client.tools would parse the main command line arguments
-                creds = tools.run_flow(flow, store, tools.argparser.parse_args(args=[]))
+                    retryStartTime = time.time()
 
-            elif creds_hardcoded:
+                    if isinstance(ex, Endpoint_http_error) and ex.code == 429 and \
+                            too_many_requests_count < rate_limiter.max_retries:
+                        too_many_requests_count += 1
+                        rate_limiter.pause_after_too_many_requests(ex.retry_after)
 
-                creds = GoogleCredentials(
-                    creds_hardcoded['access_token'],
-                    creds_hardcoded['client_id'],
-                    creds_hardcoded['client_secret'],
-                    creds_hardcoded['refresh_token'],
-                    creds_hardcoded['token_expiry'],
-                    creds_hardcoded['token_uri'],
-                    creds_hardcoded['user_agent'],
-                    creds_hardcoded['revoke_uri']
-                )
+                    elif attempt < retry_policy['max_attempts'] and is_retryable(ex, retry_policy):
+                        backoff = min(retry_policy['backoff'] * 2 ** (attempt - 1), retry_policy['max_backoff'])
+                        backoff *= random.uniform(0.5, 1.5)
+                        message = "EXCEPTION OCCURED WHEN EXECUTING QUERY: " + str(ex) + \
+                                  "\n Retrying in " + str(backoff) + " seconds (attempt " + str(attempt + 1) + \
+                                  " of " + str(retry_policy['max_attempts']) + ")."
+                        print(message)
+                        logging.error(message)
+                        time.sleep(backoff)
 
-            # if neither is available, abort
-            else:
-                message = "\nERROR: No client_secret.json or credentials.json provided nor found in local folder!."
-                logging.error(message)
-                sys.exit(message)
+                    else:
+                        raise
 
-            # create services to be used by write functions
-            if not creds.invalid:
-                self.google_service_drive = discovery.build('drive', 'v3', http=creds.authorize(Http()))
-                self.google_service_sheets = discovery.build('sheets', 'v4', http=creds.authorize(Http()))
-            else:
-                message = "\nERROR: Invalid credentials!"
-                logging.error(message)
-                sys.exit(message)
+                    retry_duration += time.time() - retryStartTime
 
+                finally:
+                    if query_data_object is not None and stage is None:
+                        query_data_object.add_stage_durations(stage_durations)
 
-        def init_google_sheets():
-            """Formats the give google sheets file, deletes old content and creates a summary-sheet"""
+        finally:
+            if query_data_object is not None:
+                query_data_object.add_attempts(attempt, retry_duration, stage == 'count_query')
+                if stage is not None:
+                    query_data_object.add_stage_durations({ stage: time.time() - startTime })
 
-            init_google_services()
 
+    def is_retryable(exception, retry_policy):
+        """Returns whether a failed request should be sent again according to the retry policy"""
 
-            # get id of google sheets file by extracting it from the url
+        if isinstance(exception, Endpoint_connection_error):
+            return True
+        elif isinstance(exception, Endpoint_http_error):
+            return exception.code in retry_policy['status_codes']
+        elif isinstance(exception, SPARQLExceptions.EndPointInternalError):
+            return 500 in retry_policy['status_codes']
+        else:
+            return False
 
-            self.google_sheets_id = query_collection_data_object.output_destination\
-                .split("docs.google.com/spreadsheets/d/",1)[1]\
-                .split("/",1)[0]
-            logging.info("ID of google sheets : " + str(self.google_sheets_id))
 
-            # get list of existing sheets in sheets file
-            google_sheets_metadata = self.google_service_sheets.spreadsheets().get(
-                spreadsheetId=self.google_sheets_id).execute()
-            all_sheet = google_sheets_metadata['sheets']
+    def get_sparql_wrapper_timeout(timeout):
+        """Returns the timeout for SPARQLWrapper, which only takes whole seconds (and would turn a timeout below one
+        second into no timeout at all), so fractions of seconds are rounded up"""
 
+        if timeout == int(timeout):
+            return int(timeout)
 
-            # create new sheet reserved for summary
+        rounded_timeout = math.ceil(timeout)
+        logging.warning("Timeout of " + str(timeout) + " seconds rounded up to " + str(rounded_timeout) +
+                        " seconds, since SPARQLWrapper only takes whole seconds (unlike max_connections_per_endpoint > 0)")
 
-            body_create_summary_page = {
-                "requests": [
-                    {
-                        "addSheet": {
-                            "properties": {
-                                "gridProperties": {
-                                    "columnCount": 26
-                                }
-                            }
-                        }
-                    }
-                ]
-            }
+        return rounded_timeout
 
-            result = self.google_service_sheets.spreadsheets().batchUpdate(
-                spreadsheetId=self.google_sheets_id, body=body_create_summary_page).execute()
-            self.google_sheets_summary_sheet_id = result['replies'][0]['addSheet']['properties']['sheetId']
 
+    def send_query( query_string, endpoint, results_format, timeout, stage_durations ):
+        """sends a query provided as string to the endpoint and returns the results in the asked-for format.
+        Also returns duration of execution, the durations of its stages are recorded in stage_durations"""
 
-            # delete all sheets except summary
+        logging.info("Executing query: " + query_string)
 
-            body_sheet_to_delete = { 'requests' : [] }
-            for sheet in all_sheet:
-                tmp = {
-                    "deleteSheet": {
-                        "sheetId": sheet['properties']['sheetId']
-                    }
-                }
-                body_sheet_to_delete['requests'].append(tmp)
+        # if set, use the pooled keep-alive connections of the asyncio based client instead of SPARQLWrapper
+        max_connections = query_collection_data_object.max_connections_per_endpoint
+        if max_connections > 0:
+            return sparql_http_client.execute_query(
+                query_string, endpoint, results_format, max_connections, timeout, stage_durations)
 
-            self.google_service_sheets.spreadsheets().batchUpdate(
-                spreadsheetId=self.google_sheets_id, body=body_sheet_to_delete).execute()
+        # Currently onyl accepts formats: CSV, TSV, XML, JSON
+        # Other formats such as rdf-xml, turtle, and n-triples could be possible with a bit of tweaking.
+        # Problems encountered so far are summarized here:
+        # https://github.com/RDFLib/sparqlwrapper/issues/107
+        sparql_wrapper = SPARQLWrapper(endpoint)
+        sparql_wrapper.setQuery( query_string )
+        sparql_wrapper.setReturnFormat( results_format )
+        if timeout > 0:
+            sparql_wrapper.setTimeout( get_sparql_wrapper_timeout(timeout) )
 
+        startTime = time.time()
+        try:
+            # results are kept as the raw bytes received, xml and json results are parsed incrementally when
+            # harmonizing them
+            response = sparql_wrapper.query().response
+            stage_durations['first_byte'] = time.time() - startTime
+            results = response.read()
+        except urllib.error.HTTPError as ex:
+            raise Endpoint_http_error.from_http_error(ex)
+        except (urllib.error.URLError, OSError) as ex:
+            raise Endpoint_connection_error(str(ex))
+        execution_duration = time.time() - startTime
+        stage_durations['download'] = execution_duration - stage_durations['first_byte']
 
-            # rename summary sheet to '0. Summary'
+        return results, execution_duration
 
-            body_to_rename = {
-                "requests" : [
-                    {
-                        "updateSheetProperties": {
-                            "properties": {
-                                "sheetId": self.google_sheets_summary_sheet_id,
-                                "title": "0. Summary",
-                            },
-                            "fields": "title",
-                        }
-                    },
-                    {
-                        "updateDimensionProperties": {
-                            "range": {
-                                "sheetId": self.google_sheets_summary_sheet_id,
-                                "dimension": "COLUMNS",
-                                "startIndex": 0,
-                                "endIndex":26
-                            },
-                            "properties": {
-                                "pixelSize": 350
-                            },
-                            "fields": "pixelSize"
-                        }
-                    }
-                ]
-            }
-            self.google_service_sheets.spreadsheets().batchUpdate(
-                spreadsheetId=self.google_sheets_id, body=body_to_rename).execute()
 
+    def execute_query_with_cache( query_string, endpoint, results_format, query_data_object=None, stage=None ):
+        """Returns the results of a query from the result cache if there are valid ones, otherwise executes the query
+        and saves its results in the cache. Also returns duration of execution and the timestamp of the cached results
+        (None if not taken from cache)"""
 
-        # google folder
-        def init_google_folder():
-            """Creates a new google sheets file inside the specified google folder"""
+        result_cache = query_collection_data_object.result_cache
 
-            init_google_services()
+        cache_entry = result_cache.get(query_string, endpoint, results_format)
+        if cache_entry is not None:
+            return cache_entry
 
-            # get id of google folder by extracting it from the url
-            self.google_folder_id = query_collection_data_object.output_destination\
-                .split("drive.google.com/drive/folders/",1)[1]\
-                .split("?",1)[0]
-            logging.info("ID of google folder : " + str(self.google_folder_id))
+        results, execution_duration = execute_query(query_string, endpoint, results_format, query_data_object, stage)
+        result_cache.put(query_string, endpoint, results_format, results, execution_duration)
 
-            # Create google sheets file in folder
-            body_spreadsheet = {
-                'name': query_collection_data_object.timestamp_start + " - " + query_collection_data_object.title,
-                'mimeType': 'application/vnd.google-apps.spreadsheet',
-                'parents': [self.google_folder_id]
-            }
-            sheets =  self.google_service_drive.files().create(body=body_spreadsheet).execute()
-            self.google_sheets_id = sheets['id']
-            self.google_sheets_summary_sheet_id = 0
+        return results, execution_duration, None
 
-            # Sets name of first sheet to summary, sets up column width
-            body_to_rename = {
-                "requests": [
-                    {
-                        "updateSheetProperties": {
-                            "properties": {
-                                "sheetId": self.google_sheets_summary_sheet_id,
-                                "title": "0. Summary",
-                            },
-                            "fields": "title",
-                        }
-                    },
-                    {
-                        "updateDimensionProperties": {
-                            "range": {
-                                "sheetId": self.google_sheets_summary_sheet_id,
-                                "dimension": "COLUMNS",
-                                "startIndex": 0,
-                                "endIndex":26
-                            },
-                            "properties": {
-                                "pixelSize": 300
-                            },
-                            "fields": "pixelSize"
-                        }
-                    }
-                ]
-            }
-            self.google_service_sheets.spreadsheets().batchUpdate(
-                spreadsheetId=self.google_sheets_id, body=body_to_rename).execute()
 
-            message = "Created google sheets at: " + "docs.google.com/spreadsheets/d/" + self.google_sheets_id
-            logging.info(message)
-            print(message)
+    def is_streamed_to_disk(results_format):
+        """Returns whether the results of queries are to be streamed directly to disk, which is only possible for
+        results written into a local folder"""
 
-        main()
+        return query_collection_data_object.stream_results_to_disk and \
+            query_collection_data_object.output_writer.output_destination_type == "local_folder"
 
 
-    def write_header_summary(self, query_collection_data_object):
-        """Writes the initial header to the summary sheet"""
+    def execute_query_to_file( query_string, endpoint, results_format, local_file, query_data_object=None ):
+        """executes a query provided as string and writes its results in chunks into the given file,
+        without keeping them in memory. Returns duration of execution"""
 
-        def main(query_collection_data_object):
+        return execute_with_retries(
+            send_query_to_file, query_data_object, query_string, endpoint, results_format, local_file)
 
-            if self.output_destination_type == 'local_folder' or self.output_destination_type == 'local_xlsx':
-                write_header_summary_xlsx_file(query_collection_data_object)
 
-            elif self.output_destination_type == 'google_folder' or self.output_destination_type == 'google_sheets':
-                write_header_summary_google_sheet(query_collection_data_object)
+    def send_query_to_file( query_string, endpoint, results_format, local_file, timeout, stage_durations ):
+        """sends a query provided as string to the endpoint and writes its results in chunks into the given file.
+        Returns duration of execution, the durations of its stages are recorded in stage_durations"""
 
+        logging.info("Executing query and streaming results to: " + str(local_file))
 
-        def write_header_summary_xlsx_file(query_collection_data_object):
-            """Writes header to xlsx file"""
+        max_connections = query_collection_data_object.max_connections_per_endpoint
+        if max_connections > 0:
+            return sparql_http_client.execute_query_to_file(
+                query_string, endpoint, results_format, max_connections, local_file, timeout, stage_durations)
 
-            message = "Writing header to summary in local xslx"
-            logging.info(message)
-            print(message)
+        sparql_wrapper = SPARQLWrapper(endpoint)
+        sparql_wrapper.setQuery( query_string )
+        sparql_wrapper.setReturnFormat( results_format )
+        if timeout > 0:
+            sparql_wrapper.setTimeout( get_sparql_wrapper_timeout(timeout) )
 
-            # setup and formats
-            self.xlsx_worksheet_summary.set_column('A:Z', 70)
-            self.title_format = self.xlsx_workbook.add_format({'bold': True})
-            self.title_format.set_font_size(16)
-            self.title_2_format = self.xlsx_workbook.add_format({'bold': True})
-            self.title_2_format.set_font_size(12)
-            self.query_text_format = self.xlsx_workbook.add_format({'text_wrap': True})
-            self.bold_format = self.xlsx_workbook.add_format({'bold': True})
+        startTime = time.time()
+        try:
+            response = sparql_wrapper.query().response
+            stage_durations['first_byte'] = time.time() - startTime
+            with local_file.open('wb') as fw:
+                shutil.copyfileobj(response, fw, Sparql_http_client.stream_chunk_size)
+        except urllib.error.HTTPError as ex:
+            raise Endpoint_http_error.from_http_error(ex)
+        except (urllib.error.URLError, OSError) as ex:
+            raise Endpoint_connection_error(str(ex))
+        execution_duration = time.time() - startTime
+        stage_durations['download'] = execution_duration - stage_durations['first_byte']
 
-            # Write header to xlsx
-            self.xlsx_worksheet_summary.set_row(0, 20)
-            self.line_number = 0
-            self.xlsx_worksheet_summary.write(self.line_number, 0, query_collection_data_object.title, self.title_format)
-            if query_collection_data_object.description is not None:
-                self.xlsx_worksheet_summary.write(self.line_number + 1, 0, query_collection_data_object.description)
-                self.line_number += 1
-            self.line_number += 2
-            self.xlsx_worksheet_summary.write(self.line_number, 0, "Execution timestamp of script: " + query_collection_data_object.timestamp_start)
-            self.line_number += 1
-            if query_collection_data_object.header_error_message is None:
-                self.xlsx_worksheet_summary.write(self.line_number, 0, "Endpoint: " + query_collection_data_object.endpoint)
-                self.line_number += 1
-                self.xlsx_worksheet_summary.write(self.line_number, 0, "Total count of triples in endpoint: " + query_collection_data_object.count_triples_in_endpoint)
-            else:
-                self.xlsx_worksheet_summary.write(self.line_number, 0, query_collection_data_object.header_error_message)
-            self.line_number += 4
+        return execution_duration
 
 
-        def write_header_summary_google_sheet(query_collection_data_object):
-            """Writes header to google sheets file"""
+    def execute_query_in_pages(query_data_object, results_format, local_file):
+        """Executes a query in pages of page_size rows each (max_parallel_pages of them at the same time), until a page
+        with less rows is returned. Then joins the results of all pages in order. If local_file is given, the pages
+        are streamed to disk and joined into local_file.
+        Returns the joined results (or local_file) and the duration of execution"""
 
-            message = "Writing header to summary in google sheets"
-            logging.info(message)
-            print(message)
+        def execute_page(page_number):
+            """Executes the query for a page, retries it if it fails. Returns the results of the page
+            (or the path of the file it was streamed into), its number of rows and its duration of execution"""
 
-            # create header info
-            self.line_number = 0
-            header = []
-            header.append([query_collection_data_object.title])
-            if query_collection_data_object.description is not None:
-                header.append([query_collection_data_object.description])
-            header.append([])
-            header.append(
-                ["Execution timestamp of script: " +
-                 query_collection_data_object.timestamp_start])
-            if query_collection_data_object.header_error_message is None:
-                header.append(["endpoint: " + query_collection_data_object.endpoint])
-                header.append(
-                    ["Total count of triples in endpoint: " +
-                     query_collection_data_object.count_triples_in_endpoint])
-            else:
-                header.append([query_collection_data_object.header_error_message])
+            query_for_page = get_query_for_page(query_data_object.query, page_size, page_number)
 
+            attempt = 0
+            while True:
+                try:
+                    if local_file is None:
+                        results, execution_duration, cache_timestamp = execute_query_with_cache(
+                            query_for_page, query_collection_data_object.endpoint, results_format,
+                            query_data_object)
+                    else:
+                        results = get_page_file(page_number)
+                        execution_duration = execute_query_to_file(
+                            query_for_page, query_collection_data_object.endpoint, results_format, results,
+                            query_data_object)
+                    break
 
-            # get range for header
-            range = self.get_range_from_matrix(self.line_number, 0, header)
-            range = "0. Summary!" + range
-            self.line_number += len(header) + 3
+                except SPARQLExceptions.SPARQLWrapperException as ex:
+                    attempt += 1
+                    if attempt > query_collection_data_object.page_retries:
+                        raise
+                    message = "EXCEPTION OCCURED WHEN EXECUTING PAGE " + str(page_number + 1) + ": " + str(ex) + \
+                              "\n Retrying page (" + str(attempt) + " of " + \
+                              str(query_collection_data_object.page_retries) + ")."
+                    print(message)
+                    logging.error(message)
 
-            # write header to sheet
-            self.google_service_sheets.spreadsheets().values().update(
-                    spreadsheetId=self.google_sheets_id, range=range,
-                    valueInputOption="RAW", body= { 'values': header } ).execute()
+            logging.info("Executed page " + str(page_number + 1) + " of query " + str(query_data_object.id) +
+                         " in seconds: " + str(execution_duration))
 
-        main(query_collection_data_object)
+            return results, get_rows_count_of_page(results, results_format), execution_duration
 
 
-    def write_query_result(self, query_data_object):
-        """Writes results of query to the respective output destination"""
+        def get_page_file(page_number):
+            return local_file.with_name(local_file.name + ".page" + str(page_number))
 
-        def main(query_data_object):
 
-            if len(query_data_object.results_matrix) > 1 or self.write_empty_results:
-                message = "Writing results to output_destination"
-                logging.info(message)
-                print(message)
+        page_size = query_data_object.page_size
+        max_parallel_pages = query_collection_data_object.max_parallel_pages
+        pages = []
 
-                if self.output_destination_type == 'local_xlsx':
-                    write_query_result_to_xlsx_file(query_data_object)
+        if not is_query_ordered(query_data_object.query):
+            message = "WARNING: Query " + str(query_data_object.id) + " is executed in pages, but has no ORDER BY. " + \
+                      "Its results may not be returned in the same order for every page, so that pages could " + \
+                      "overlap or miss rows."
+            logging.warning(message)
+            print(message)
 
-                elif self.output_destination_type == 'local_folder':
-                    write_query_result_to_local_folder(query_data_object)
+        startTime = time.time()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_parallel_pages)
 
-                elif self.output_destination_type == 'google_sheets' or self.output_destination_type == 'google_folder':
-                    write_query_result_to_google_sheets(query_data_object)
+        try:
 
+            # execute pages in rounds of max_parallel_pages, until a page is not full
 
-        def write_query_result_to_xlsx_file(query_data_object):
-            """Writes results as harmonized two-dimensional list into a separate sheet in the xlsl file"""
+            page_number = 0
+            is_last_page_found = False
 
-            # create new worksheet and write into it
-            sanitized_query_title = query_data_object.title\
-                .replace("["," ") \
-                .replace("]"," ") \
-                .replace(":"," ") \
-                .replace("*"," ") \
-                .replace("?"," ") \
-                .replace("/"," ") \
-                .replace("\\"," ")
+            while not is_last_page_found:
 
-            sanitized_query_title = str(query_data_object.id) + sanitized_query_title
+                futures = [ executor.submit(execute_page, page_number + i) for i in range(max_parallel_pages) ]
+                page_number += max_parallel_pages
 
-            if len(sanitized_query_title) > 30:
-                sanitized_query_title = sanitized_query_title[:29]
+                for future in futures:
+                    page = future.result()
+                    if not is_last_page_found:
+                        pages.append(page)
+                        is_last_page_found = page[1] < page_size
 
-            worksheet = self.xlsx_workbook.add_worksheet( sanitized_query_title )
-            for y in range(0, len(query_data_object.results_matrix)):
-                for x in range(0, len(query_data_object.results_matrix[y])):
-                    column = query_data_object.results_matrix[y][x]
-                    if len(str(column)) > 255:
-                        column = str(column)[:255]
-                    worksheet.write(y, x, column)
+            message = "Executed query in " + str(len(pages)) + " pages"
+            logging.info(message)
+            print(message)
 
+            query_data_object.results_pages_durations = [ page[2] for page in pages ]
+            results = join_pages([ page[0] for page in pages ], results_format, local_file)
 
-        def write_query_result_to_local_folder(query_data_object):
-            """Writes raw output using the respective data format into the specified local folder"""
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            if local_file is not None:
+                for i in range(page_number):
+                    if get_page_file(i).exists():
+                        get_page_file(i).unlink()
 
+        execution_duration = time.time() - startTime
 
-            # create file for query result
-            # (and replace "/" with "-" because the file-writer interprets "/" as subdirectory)
+        return results, execution_duration
 
-            file_name = \
-                str(query_data_object.id) + ". " + \
-                query_data_object.title.replace("/", "-") + \
-                "." + self.output_format
-            local_file = Path(self.folder / file_name)
 
+    def get_rows_count_of_page(results, results_format):
+        """Returns the number of result rows (without header) of a page"""
 
-            ## differentiate between different result-types which require different write-methods
+        if isinstance(results, Path) and (results_format == XML or results_format == JSON):
+            with results.open('rb') as fr:
+                return get_rows_count_of_results(fr.read(), results_format)
 
-            # csv and tsv files need to be written as bytes
-            if self.output_format == CSV or self.output_format == TSV:
-                with local_file.open('wb') as fw:
-                    fw.write(query_data_object.results_raw)
+        elif isinstance(results, Path):
+            with results.open('r', encoding='utf-8', newline='') as fr:
+                if results_format == TSV:
+                    return sum(1 for row in csv.reader(fr, delimiter="\t")) - 1
+                else:
+                    return sum(1 for row in csv.reader(fr)) - 1
 
-            # xml document is passed a writer object
-            elif self.output_format == XML:
-                with local_file.open('w') as fw:
-                    query_data_object.results_raw.writexml(fw)
+        elif results_format == CSV or results_format == TSV:
+            if results_format == TSV:
+                reader = csv.reader(results.decode('utf-8').splitlines(), delimiter="\t")
+            else:
+                reader = csv.reader(results.decode('utf-8').splitlines())
+            return sum(1 for row in reader) - 1
 
-            # json needs json.dump() method
-            elif self.output_format == JSON:
-                with local_file.open('w') as fw:
-                    json.dump(query_data_object.results_raw, fw)
+        elif results_format == XML or results_format == JSON:
+            return get_rows_count_of_results(results, results_format)
 
 
-        def write_query_result_to_google_sheets(query_data_object):
-            """Writes results as harmonized two-dimensional list into a separate sheet in the google sheets file"""
+    def get_results_parser(results_format, limit=None):
+        """Returns a parser reading xml or json results incrementally (see Xml_results_parser, Json_results_parser)"""
 
-            sanitized_query_title = query_data_object.title
-            if len(sanitized_query_title) > 100:
-                sanitized_query_title = sanitized_query_title[:99]
+        if results_format == XML:
+            return Xml_results_parser(limit)
+        else:
+            return Json_results_parser(limit)
 
-            sanitized_query_title = str(query_data_object.id) + ". " + sanitized_query_title
 
-            # create sheet
-            body_new_sheet = {
-                'requests' : [
-                    {
-                        'addSheet': {
-                            'properties': {
-                                'title': sanitized_query_title,
-                                'gridProperties': {
-                                    'rowCount': len(query_data_object.results_matrix),
-                                    'columnCount': len(query_data_object.results_matrix[0])
-                                }
-                            }
-                        }
-                    }
-                ]
-            }
-            result = self.google_service_sheets.spreadsheets().batchUpdate(
-                spreadsheetId=self.google_sheets_id,
-                body=body_new_sheet
-            ).execute()
-            google_sheet_id = result['replies'][0]['addSheet']['properties']['sheetId']
-            body_change_columns = {
-                'requests': [
-                    {
-                        "updateDimensionProperties": {
-                            "range": {
-                                "sheetId": google_sheet_id,
-                                "dimension": "COLUMNS",
-                                "startIndex": 0,
-                                "endIndex": 26
-                            },
-                            "properties": {
-                                "pixelSize": 300
-                            },
-                            "fields": "pixelSize"
-                        }
-                    }
-                ]
-            }
-            self.google_service_sheets.spreadsheets().batchUpdate(
-                spreadsheetId=self.google_sheets_id,
-                body=body_change_columns
-            ).execute()
-
-            # get range of harmonized results
-            google_sheet_range = \
-                sanitized_query_title + "!" + \
-                self.get_range_from_matrix(0, 0, query_data_object.results_matrix)
-
-            # write into sheet
-            self.google_service_sheets.spreadsheets().values().update(
-                spreadsheetId=self.google_sheets_id,
-                range=google_sheet_range,
-                valueInputOption="RAW",
-                body={ 'values': query_data_object.results_matrix}
-            ).execute()
+    def get_rows_count_of_results(results, results_format):
+        """Returns the number of result rows of xml or json results given as bytes"""
 
-        main(query_data_object)
+        parser = get_results_parser(results_format, limit=0)
+        parser.feed(results)
+        parser.close()
 
+        return parser.rows_count
 
-    def write_query_summary(self, query_data_object):
-        """Writes the gist of the results of an executed query to a summary sheet"""
 
-        def main(query_data_object):
+    def get_harmonized_result_from_file(local_file, format, limit, count_rows, query_data_object):
+        """Reads the first rows (header and up to 'limit' rows) of a csv, tsv, xml or json file into a Results_matrix,
+        used for writing summaries. If count_rows is set, the rest of the file is read for counting its rows too.
+        Returns the Results_matrix and the number of rows read (including header).
+        Reading the file is recorded as stage 'parse' of the query_data_object, converting the values of the rows read
+        as stage 'harmonize'."""
 
-            message = "Writing to summary"
-            logging.info(message)
-            print(message)
+        # xml / json: parse the file in chunks, stop after the chunk containing the last row needed
+        if format == XML or format == JSON:
 
-            if self.output_destination_type == 'local_xlsx' or self.output_destination_type == 'local_folder' :
-                write_query_summary_xlsx_file(query_data_object)
+            parser = get_results_parser(format, limit)
 
-            elif self.output_destination_type == 'google_sheets' or self.output_destination_type == 'google_folder':
-                write_query_summary_google_sheets(query_data_object)
+            with query_data_object.measure_stage('parse'), local_file.open('rb') as fr:
+                for chunk in iter(lambda: fr.read(parser.chunk_size), b""):
+                    parser.feed(chunk)
+                    if parser.is_limit_reached() and not count_rows:
+                        break
+                else:
+                    parser.close()
 
+            with query_data_object.measure_stage('harmonize'):
+                return parser.get_results_matrix(), parser.rows_count + 1
 
-        def write_query_summary_xlsx_file(query_data_object):
-            """Writes the gist of the results of an executed query to the summary sheet in the xlsx file"""
+        rows = []
+        rows_count = 0
 
-            # query_title
-            self.xlsx_worksheet_summary.write(
-                self.line_number,
-                0,
-                str(query_data_object.id) + ". " + str(query_data_object.title),
-                self.title_2_format)
-            self.line_number += 1
+        with query_data_object.measure_stage('parse'), local_file.open('r', encoding='utf-8', newline='') as fr:
 
-            # query description
-            if not (query_data_object.description is None or
-                    query_data_object.description.isspace() or
-                    query_data_object.description == "") :
+            if format == TSV:
+                reader = csv.reader(fr, delimiter="\t")
+            else:
+                reader = csv.reader(fr)
 
-                self.xlsx_worksheet_summary.write(self.line_number, 0, query_data_object.description)
-                self.line_number += 1
+            for row in reader:
 
-            # query_text
-            size_of_query_text_row = 15 * (query_data_object.query.count("\n") + 2)
-            self.xlsx_worksheet_summary.set_row(self.line_number, size_of_query_text_row)
-            self.xlsx_worksheet_summary.write(self.line_number, 0, query_data_object.query, self.query_text_format)
-            self.line_number += 1
+                rows_count += 1
 
-            # results_execution_duration
-            self.xlsx_worksheet_summary.write(self.line_number, 0, "Duration of execution in seconds: " + str(query_data_object.results_execution_duration))
-            self.line_number += 1
+                if rows_count <= limit + 1:
+                    rows.append(row)
 
-            if query_data_object.results_raw is None:
-                self.line_number += 1
-                self.xlsx_worksheet_summary.write(self.line_number, 0, "NO RESULTS DUE TO ERROR: " + query_data_object.error_message)
-                self.line_number += 1
+                elif not count_rows:
+                    break
 
-            else:
-                # results_lines_count
-                if query_data_object.results_lines_count is not None:
-                    self.xlsx_worksheet_summary.write(self.line_number, 0, "Total count of lines in results: " + str(query_data_object.results_lines_count))
-                    self.line_number += 2
-                else:
-                    self.line_number += 1
+        with query_data_object.measure_stage('harmonize'):
+            return Results_matrix.from_rows(rows), rows_count
 
-                # results
-                limit = self.summary_sample_limit
-                if limit != 0:
 
-                    self.xlsx_worksheet_summary.write(self.line_number, 0, "Sample results: ", self.bold_format)
-                    self.line_number += 1
-                    harmonized_rows = query_data_object.results_matrix
+    def get_harmonized_result(result, format, query_data_object):
+        """Transforms the result data from its varying data formats into a Results_matrix (which also behaves like a
+        two-dimensional list), used for writing summaries or into xlsx / google sheets files.
+        Reading the result data into rows or columns of strings is recorded as stage 'parse' of the query_data_object,
+        converting these values into their types as stage 'harmonize'."""
 
-                    limit += 1
-                    if len(harmonized_rows) < limit:
-                        limit = len(harmonized_rows)
+        if result is None:
+            return None
+        else:
 
-                    y = 0
-                    for y in range(0, limit):
-                        for x in range(0, len(harmonized_rows[y])):
 
-                            column = harmonized_rows[y][x]
+            # CSV, TSV, XLSX (since XLSX means CSV is internally used for querying the endpoint)
 
-                            if len(str(column)) > 255:
-                                column = str(column)[:255]
-                            self.xlsx_worksheet_summary.write(y + self.line_number, x, column)
+            if format == CSV or format == TSV or format == "XLSX":
 
-                    self.line_number += 1
+                with query_data_object.measure_stage('parse'):
 
-                self.line_number += limit
+                    result = result.decode('utf-8').splitlines()
 
-            self.line_number += 2
+                    if format == TSV:
+                        reader = csv.reader(result, delimiter="\t")
+                    else:
+                        reader = csv.reader(result)
 
+                    rows = list(reader)
 
-        def write_query_summary_google_sheets(query_data_object):
-            """Writes the gist of the results of an executed query to the summary sheet in the google sheets file"""
+                # check validity of results
+                if len(set(map(len, rows))) > 1:
+                    row = [ row for row in rows if len(row) != len(rows[0]) ][0]
+                    message = "\nERROR: INVALID ROW LENGTH! " + str(row) + " has length " + str(len(row)) + ", while valid length is " + str(len(rows[0]))
+                    logging.error(message)
+                    sys.exit(message)
 
-            # creating header
-            query_stats = []
-            query_stats.append([str(query_data_object.id) + ". " + query_data_object.title])
-            if not (query_data_object.description.isspace() or query_data_object.description == "") :
-                query_stats.append([query_data_object.description])
-            query_stats.append([query_data_object.query])
-            query_stats.append(
-                ["Duration of execution in seconds: " +
-                 str(query_data_object.results_execution_duration)])
+                with query_data_object.measure_stage('harmonize'):
+                    return Results_matrix.from_rows(rows)
 
 
-            if query_data_object.results_raw is None:
-                query_stats.append([])
-                query_stats.append(["NO RESULTS DUE TO ERROR: " + query_data_object.error_message])
+            # XML, JSON
 
-            else:
+            elif format == XML or format == JSON:
 
-                if query_data_object.results_lines_count is not None:
-                    query_stats.append(
-                        ["Total count of lines in results: " +
-                         str(query_data_object.results_lines_count)])
+                # parse the raw bytes in chunks, collecting the values of every variable in a column of their own
+                # row by row (see Xml_results_parser, Json_results_parser)
 
-                # get sample results
-                limit = self.summary_sample_limit
-                if limit != 0:
+                parser = get_results_parser(format)
 
-                    query_stats.append([])
-                    query_stats.append(["Sample results: "])
-                    harmonized_rows = query_data_object.results_matrix
+                with query_data_object.measure_stage('parse'):
+                    result = memoryview(result)
+                    for start in range(0, len(result), parser.chunk_size):
+                        parser.feed(result[start:start + parser.chunk_size])
+                    parser.close()
 
-                    # set limit as defined, readjust if results should be less than it or if it exceeds gsheets-capacities
-                    limit += 1
-                    if len(harmonized_rows) < limit:
-                        limit = len(harmonized_rows)
+                with query_data_object.measure_stage('harmonize'):
+                    return parser.get_results_matrix()
 
-                    for y in range(0, limit):
-                        query_stats.append(harmonized_rows[y])
+    return main(query_collection_data_object)
 
-            # write header and sample results to sheet
-            google_sheet_range = self.get_range_from_matrix(self.line_number, 0, query_stats)
-            google_sheet_range = "0. Summary!" + google_sheet_range
-            self.line_number += len(query_stats) + 3
 
-            self.google_service_sheets.spreadsheets().values().update(
-                spreadsheetId=self.google_sheets_id,
-                range=google_sheet_range,
-                valueInputOption="RAW",
-                body= { 'values': query_stats }
-            ).execute()
 
-        main(query_data_object)
+def split_results(results, results_format):
+    """Splits xml results given as bytes into the part up to and including the opening tag of its 'results'
+    element, the result elements and the rest, so that the result elements of several pages can be joined.
+    Json results are split the same way around their array of bindings."""
 
+    if results_format == JSON:
+        return Json_results_parser.split_bindings(results)
 
-    def get_range_from_matrix(self, start_y, start_x, matrix):
-        """Input: starting y- and x-coordinates and a matrix.
-        Output: Coordinates of the matrix (left upper cell and lower right cell) in A1-notation for updating google sheets"""
+    results_match = re.search(rb"<results\s*(/?)>", results)
 
-        max_len_x = 0
-        for row in matrix:
-            if len(row) > max_len_x:
-                max_len_x = len(row)
+    # empty results element, e.g. '<results/>'
+    if results_match.group(1) == b"/":
+        return results[:results_match.start()] + b"<results>", b"", b"</results>" + results[results_match.end():]
 
-        max_len_y = len(matrix)
+    results_end = results.rindex(b"</results>")
+    return results[:results_match.end()], results[results_match.end():results_end], results[results_end:]
 
-        range_start = chr(64 + start_x + 1) + str(start_y + 1)
 
-        range_end = chr(64 + start_x + max_len_x) + str(start_y + max_len_y)
 
-        return range_start + ":" + range_end
+def join_pages(pages, results_format, local_file):
+    """Joins the results of several pages in order into the results of the first page (or into local_file)"""
 
+    # xml / json pages streamed to disk: write the result elements / bindings of all pages into one file,
+    # enclosed by the rest of the first page (pages are read one at a time)
+    if local_file is not None and (results_format == XML or results_format == JSON):
 
-    def close(self):
-        """Closes the xlsx writer object"""
+        with local_file.open('wb') as fw:
+            is_first_binding = True
+            for i in range(0, len(pages)):
+                with pages[i].open('rb') as fr:
+                    head, results, tail = split_results(fr.read(), results_format)
+                if i == 0:
+                    fw.write(head)
+                    first_tail = tail
+                if results_format == JSON and results != b"":
+                    if not is_first_binding:
+                        fw.write(b",")
+                    is_first_binding = False
+                fw.write(results)
+            fw.write(first_tail)
 
-        if self.output_destination_type == "local_xlsx" or self.output_destination_type == 'local_folder' :
-            logging.info("close writer")
-            self.xlsx_workbook.close()
+        return local_file
 
+    # pages streamed to disk: copy them into one file, skipping the header line of all but the first page
+    # (and ending the last row of the previous page if it was not)
+    elif local_file is not None:
 
+        with local_file.open('wb') as fw:
+            last_byte = b""
+            for i in range(0, len(pages)):
+                with pages[i].open('rb') as fr:
+                    if i > 0:
+                        fr.readline()
+                        if last_byte != b"\n":
+                            fw.write(b"\n")
+                            last_byte = b"\n"
+                    for chunk in iter(lambda: fr.read(Sparql_http_client.stream_chunk_size), b""):
+                        fw.write(chunk)
+                        last_byte = chunk[-1:]
 
+        return local_file
 
-class Query_collection_data_object:
-    """Data object encapsulating all data around a query collection file,
-    while also providing some logic (especially regarding multi values)
+    # csv / tsv: attach rows, skipping the header line of all but the first page
+    if results_format == CSV or results_format == TSV:
 
-    Attributes provided by end-user:
-        title: title of the whole query collection (optional)
-        description: description of the whole query collection (optional)
-        output_destination: where to save the results (optional, default: current folder)
-        output_format: what format should the results be saved in (optional, default: csv)
-        summary_sample_limit: how many rows from the results should be used as sample (optional, default: 5)
-        cooldown_between_queries: how many seconds should the execution be paused between queries (optional)
+        joined_pages = [ pages[0] ]
+        for page in pages[1:]:
+            if not joined_pages[-1].endswith(b"\n"):
+                joined_pages.append(b"\n")
+            joined_pages.append(page.split(b"\n", 1)[1] if b"\n" in page else b"")
+
+        return b"".join(joined_pages)
+
+    # json: attach bindings, enclosed by the rest of the first page
+    elif results_format == JSON:
+
+        split_pages = [ split_results(page, results_format) for page in pages ]
+        bindings = b",".join([ split_page[1] for split_page in split_pages if split_page[1] != b"" ])
+
+        return split_pages[0][0] + bindings + split_pages[0][2]
+
+    # xml: attach result elements, enclosed by the rest of the first page
+    elif results_format == XML:
+
+        split_pages = [ split_results(page, results_format) for page in pages ]
+
+        return b"".join(
+            [ split_pages[0][0] ] + [ split_page[1] for split_page in split_pages ] + [ split_pages[0][2] ])
+
+
+
+def get_result_rows(results_matrix, start=0, stop=None):
+    """Returns the rows from start to stop of harmonized results, which are either a Results_matrix (whose rows are
+    then not all constructed, see 'Results_matrix.iter_rows') or plain rows (e.g. restored from a checkpoint journal)"""
+
+    if isinstance(results_matrix, Results_matrix):
+        return list(results_matrix.iter_rows(start, stop))
+    return results_matrix[start:stop]
+
+
+
+def create_template():
+    """Creates a template for the query collection file in the relative folder, where the script is executed"""
+
+    template = """
+
+
+# NOTE: Instead of a python file like this one, a query collection file can also be a declarative json, toml or
+# yaml file (ending with .json, .toml, .yaml or .yml) with the same settings as keys, e.g. in toml:
+#   endpoint = "https://dbpedia.org/sparql"
+#   [[queries]]
+#   title = "Some triples"
+#   query = "SELECT * WHERE { ?s ?p ?o } LIMIT 5"
+# Such files are validated before any query is executed, but can not define the custom functions described below.
+
+
+# -------------------- OPTIONAL SETTINGS -------------------- 
+
+# title
+# defines the title of the whole set of queries
+# OPTIONAL, if not set, timestamp will be used
+title = \"TEST QUERIES\"
+
+
+# description
+# defines the textual and human-intended description of the purpose of these queries
+# OPTIONAL, if not set, nothing will be used or displayed
+description = \"This set of queries is used as a template for showcasing a valid query collection file.\"
+
+
+# output_destination
+# defines where to save the results, input can be: 
+# * a local path to a folder 
+# * a URL for a google sheets document  
+# * a URL for a google folder
+# NOTE: On windows, folders in a path use backslashes, in such a case it is mandatory to attach a 'r' in front of the quotes, e.g. r\"C:\\Users\\sresch\\..\"
+# In the other cases the 'r' is simply ignored; thus best would be to always leave it there.
+# OPTIONAL, if not set, folder of executed script will be used
+output_destination = r\".\"
+
+
+# output_format
+# defines the format in which the result data shall be saved (currently available: csv, tsv, xml, json, xlsx)
+# OPTIONAL, if not set, csv will be used
+output_format = \"csv\"
+
+
+# summary_sample_limit
+# defines how many rows shall be displayed in the summary
+# OPTIONAL, if not set, 5 will be used
+summary_sample_limit = 3
+
+
+# cooldown_between_queries
+# defines how many seconds should be waited between execution of individual queries in order to prevent exhaustion of Google API due to too many writes per time-interval
+# NOTE: google_rate_limit (see below) only waits when necessary and should be preferred
+# OPTIONAL, if not set, 0 will be used
+cooldown_between_queries = 0
+
+
+# write_empty_results
+# Should tabs be created in a summary file for queries which did not return results? Possible values are python boolean values: True, False
+# OPTIONAL, if not set, False will be used
+write_empty_results = False
+
+
+# count_from_downloaded_results
+# Should the results be counted from the downloaded results, instead of sending a separate query for counting them?
+# Saves a query per query, but only use this if the endpoint does not truncate its results. Possible values are python boolean values: True, False
+# OPTIONAL, if not set, False will be used
+count_from_downloaded_results = False
+
+
+# stream_results_to_disk
+# Should results be written in chunks directly into the local folder while downloading them, instead of keeping them
+# in memory? Only the rows needed for the summary are read then. Only applies to a local folder as output_destination
+# and csv, tsv, xml or json as output_format. Possible values are python boolean values: True, False
+# OPTIONAL, if not set, False will be used
+stream_results_to_disk = False
+
+
+# xlsx_constant_memory
+# Should xlsx files be written row by row in constant memory, instead of keeping all their cells in memory until the
+# end? Useful for large results in a local xlsx file. The count of all triples in the endpoint is then waited for
+# before executing the queries, since rows can not be changed once written. Possible values are python boolean values:
+# True, False
+# OPTIONAL, if not set, False will be used
+xlsx_constant_memory = False
+
+
+# max_parallel_queries
+# defines how many queries should be executed at the same time. Their results are still written in the order of the queries.
+# Queries having a custom_meta_function are waited for, before any further queries are executed.
+# OPTIONAL, if not set, 1 will be used (i.e. one query after another)
+max_parallel_queries = 1
+
+
+# pipeline_queue_size
+# defines how many queries may wait between the stages of executing queries, harmonizing their results and writing them.
+# These stages run at the same time (e.g. the next query is already executed while the results of the previous one are
+# written), and a stage waits once this many queries are waiting for the next stage, which limits the results kept in
+# memory. If set to 0, every query is executed, harmonized and written before the next one is executed (unless
+# max_parallel_queries is greater than 1).
+# NOTE: if set, queries are executed while earlier ones are still written, so that cooldown_between_queries does not
+# space the requests to the endpoint anymore.
+# OPTIONAL, if not set, 0 will be used
+pipeline_queue_size = 0
+
+
+# max_parallel_iterations
+# defines how many multi-value iterations (e.g. the same queries against several endpoints) should be run at the same
+# time, each in a separate process writing its own output. Can not be a multi value itself.
+# NOTE: custom_meta_function and custom_post_processing are then run in these processes, so they can not change anything
+# used by the other iterations
+# OPTIONAL, if not set, 1 will be used (i.e. one multi-value iteration after another)
+max_parallel_iterations = 1
+
+
+# max_parallel_pages
+# defines how many pages of a query are executed at the same time, for queries which have a page_size set
+# OPTIONAL, if not set, 1 will be used (i.e. one page after another)
+max_parallel_pages = 1
+
+
+# page_retries
+# defines how often a page of a query is executed again if it failed, for queries which have a page_size set
+# OPTIONAL, if not set, 0 will be used
+page_retries = 0
+
+
+# max_connections_per_endpoint
+# defines how many connections to an endpoint are kept open and reused for the queries (and how many are used at most at
+# the same time), which saves setting up a new connection for every query. If 0, a new connection is opened for every query.
+# OPTIONAL, if not set, 0 will be used
+max_connections_per_endpoint = 0
+
+
+# endpoint_rate_limit
+# defines how many requests may be sent to the endpoint within an interval of seconds, e.g. { 'requests': 60, 'interval': 60 }.
+# Requests are only delayed when this limit is reached. If the endpoint responds with 'too many requests' (HTTP 429),
+# querPy waits as long as the endpoint asks for and retries.
+# OPTIONAL, if not set, requests are not limited
+endpoint_rate_limit = None
+
+
+# google_rate_limit
+# defines how many requests may be sent to the google api within an interval of seconds, e.g. { 'requests': 60, 'interval': 60 }.
+# Requests are only delayed when this limit is reached. If google responds with 'too many requests' (HTTP 429),
+# querPy waits as long as google asks for and retries.
+# OPTIONAL, if not set, requests are not limited
+google_rate_limit = None
+
+
+# query_timeout
+# defines after how many seconds a request to the endpoint is cancelled if it has not been answered yet. A cancelled
+# request counts as failed and is retried according to the retry_policy. If 0, querPy waits for each query as long as it takes.
+# Fractions of seconds are rounded up to whole seconds, unless max_connections_per_endpoint is greater than 0.
+# Can be overriden per query (see 'timeout' below)
+# OPTIONAL, if not set, 0 will be used
+query_timeout = 0
+
+
+# retry_policy
+# defines how often requests to the endpoint are sent again if they failed, e.g.
+# { 'max_attempts': 3, 'backoff': 1, 'max_backoff': 60, 'status_codes': [ 500, 502, 503, 504 ] }
+# 'max_attempts' is the number of attempts in total, 'backoff' the seconds waited before the first retry, which double with
+# every further retry (up to 'max_backoff', randomized by +/- 50 %). Timeouts and connection errors are always retried, HTTP
+# errors only if their status code is listed in 'status_codes'. Keys which are not set are taken from the example above,
+# except 'max_attempts', which defaults to 1 (i.e. no retries).
+# Can be overriden per query (see 'retry_policy' below)
+# OPTIONAL, if not set, failed requests are not retried
+retry_policy = None
+
+
+# cache_max_age
+# defines for how many seconds the results of queries are saved in a cache (in the folder 'querPy_cache'), so that
+# identical queries against the same endpoint are not executed again within that time. Use '--no-cache' or
+# '--refresh-cache' when running querPy to ignore or renew the cache. If 0, no cache is used.
+# OPTIONAL, if not set, 0 will be used
+cache_max_age = 0
+
+
+# cache_max_size
+# defines how many megabytes the cache may use at most; if exceeded, the least recently used results are deleted
+# OPTIONAL, if not set, 1000 will be used
+cache_max_size = 1000
+
+
+# count_triples_max_age
+# defines for how many seconds the count of all triples in an endpoint is reused (also across several runs of querPy),
+# instead of counting them again, which can be expensive on large triplestores. If 0, they are counted on every run.
+# OPTIONAL, if not set, 0 will be used
+count_triples_max_age = 0
+
+
+# -------------------- MANDATORY SETTINGS -------------------- 
+
+# endpoint
+# defines the SPARQL endpoint against which all the queries are run
+# MANDATORY
+endpoint = \"http://dbpedia.org/sparql\"
+
+# queries
+# defines the set of queries to be run. 
+# MANDATAORY
+queries = [
+    {
+        # title
+        # OPTIONAL, if not set, timestamp will be used
+        \"title\" : \"Optional title of first query\" ,
+
+        # description
+        # OPTIONAL, if not set, nothing will be used or displayed
+        \"description\" : \"Optional description of first query, used to describe the purpose of the query.\" ,
+
+        # page_size
+        # if set, the query is executed in pages of this many rows each (using LIMIT and OFFSET), whose results are
+        # joined afterwards. Useful for endpoints which limit the size of results or time out on large results.
+        # NOTE: SPARQL does not guarantee that results are returned in the same order by every request, so without an
+        # ORDER BY in the query, pages could overlap or miss rows and the joined results would be wrong. Thus a query
+        # with page_size should contain an ORDER BY (over variables which identify each row), otherwise a warning is
+        # printed when it is executed.
+        # OPTIONAL, if not set, the query is executed as a whole
+        # \"page_size\" : 10000 ,
+
+        # timeout
+        # overrides query_timeout (see above) for this query
+        # OPTIONAL, if not set, query_timeout is used
+        # \"timeout\" : 600 ,
+
+        # retry_policy
+        # overrides retry_policy (see above) for this query
+        # OPTIONAL, if not set, retry_policy is used
+        # \"retry_policy\" : { 'max_attempts': 3 } ,
+
+        # query
+        # the sparql query itself
+        # NOTE: best practise is to attach a 'r' before the string so that python would not interpret some characters as metacharacters, e.g. \"\\n\"
+        # MANDATORY
+        \"query\" : r\"\"\"
+            SELECT * WHERE {
+                ?s ?p ?o
+            }
+            LIMIT 50
+        \"\"\"
+    },   
+    {    
+        \"title\" : \"Second query\" , 
+        \"description\" : \"This query returns all triples which have a label associated\" , 
+        \"query\" : r\"\"\"
+            SELECT * WHERE {
+                ?s <http://www.w3.org/2000/01/rdf-schema#label> ?o
+            }
+            LIMIT 50
+        \"\"\"
+    },
+    {    
+        \"query\" : r\"\"\"
+            SELECT * WHERE {
+                ?s ?p ?o . 
+                FILTER ( ?p = <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> )
+            }
+            LIMIT 50
+        \"\"\"
+    },
+]
+
+# Each query is itself encoded as a python dictionary, and together these dictionaries are collected in a python list. 
+# Beginner's note on such syntax as follows:
+# * the set of queries is enclosed by '[' and ']'
+# * individual queries are enclosed by '{' and '},'
+# * All elements of a query (title, description, query) need to be defined using quotes as well as their contents, and both need to be separated by ':'
+# * All elements of a query (title, description, query) need to be separated from each other using quotes ','
+# * The content of a query needs to be defined using triple quotes, e.g. \"\"\" SELECT * WHERE .... \"\"\"
+# * Any indentation (tabs or spaces) do not influence the queries-syntax, they are merely syntactic sugar.
+
+
+
+# --------------- CUSTOM POST-PROCESSING METHOD --------------- 
+'''
+The method 'custom_post_processing(results)' is a stump for custom post processing which is always called if present and to which
+result data from the query execution is passed. This way you can implement your own post-processing steps there.
+
+The incoming 'results' argument is a list, where each list-element is a dictionary represting all data of a query.
+
+This dictionary has the following keys and respective values:
+
+* most likely to be needed are these two keys and values:
+'query_title' - title of an individual query, as defined above.
+'results_matrix' - the result data organized as a two dimensional list, where the first row contains the headers. 
+This value is what you would most likely need to post process the result data.  
+Its values are converted into int, float, bool, date or datetime where possible, one type per column. The columns
+themselves are available as 'results_matrix.columns' (with their types in 'results_matrix.column_types'), which is
+faster than going through the rows on large results.
+Its rows can be changed like those of a list (also appending, inserting or deleting rows). All rows are constructed
+once they are accessed, after which the columns are taken from the rows (so changing the columns themselves only has
+an effect as long as no row was accessed).
+
+* other than these two, each query dictionary also contains data from and for querPy, which might be of use:
+'query_description' - description of an individual query, as defined above.
+'query_text' - the sparql query itself.
+'results_execution_duration' - the duration it took to run the sparql query.
+'results_stage_durations' - how many seconds were spent in each stage of the query (e.g. 'first_byte', 'download', 'parse', 'harmonize', 'write_result').
+'results_lines_count' - the number of lines the sparql query produced at the triplestore.
+'results_raw' - the result data in the specified format, as the raw bytes received from the endpoint (or the path of the file they were streamed into).
+'query_for_count' - an infered query from the original query, is used to get number of result lines at the triplestore.
+
+As an example to print the raw data from the second query defined above, write:
+print(results[1].results_matrix)
+'''
+
+# UNCOMMENT THE FOLLOWING LINES FOR A QUICKSTART:
+'''    
+def custom_post_processing(results):
+
+    print(\"\\n\\Samples from the raw data:\\n\")
+
+    for result in results:
+
+        print(\"some results of query: \" + result.title)
+
+        limit = 5 if len(result.results_matrix) > 5 else len(result.results_matrix)
+        for i in range(0, limit):
+            print(result.results_matrix[i])
+
+        print()
+'''
+"""
+
+    with open('template.py', 'w') as f:
+        f.write(template)
+
+
+
+def import_google_libraries():
+    """Imports the libraries for the google api into the module's namespace. Only done once results are written into
+    google sheets / folders, since importing them takes longer than everything else querPy imports."""
+
+    global Http, discovery, errors, client, tools, file, GoogleCredentials
+
+    from httplib2 import Http
+    from googleapiclient import discovery, errors
+    from oauth2client import client, tools, file
+    from oauth2client.client import GoogleCredentials
+
+
+
+class Output_writer:
+    """the Output_writer Class encapsulates all technical details which vary due to the specified output destinations"""
+
+    # general variables
+    output_destination_type = None
+    summary_sample_limit = None
+    line_number = None
+
+    # local folder and xlsx variables
+    folder = None
+    file_xlsx = None
+    xlsx_workbook = None
+    xlsx_worksheet_summary = None
+    xlsx_constant_memory = False
+    xlsx_max_rows = 1048576
+    output_format = None
+    bold_format = None
+    title_2_format = None
+    query_text_format = None
+
+    # google folder and sheets variables
+    google_service_sheets = None
+    google_service_drive = None
+    google_sheets_id = None
+    google_sheets_summary_sheet_id = None
+    google_sheets_resumed_sheets = {}
+    google_sheets_next_sheet_id = None
+    google_sheets_batch = None
+    google_sheets_summary_grid = None
+    google_credentials = None
+    google_services_key = None
+
+    # services for the google api which are not in use by any output writer, by the credentials they were created
+    # with. Creating them takes long, so they are reused by later output writers of the same process (see '--serve').
+    # Each output writer uses services of its own, since they are not thread-safe.
+    google_services_cache = {}
+    google_services_cache_lock = threading.Lock()
+
+    def __init__(self, query_collection_data_object):
+
+        def main():
+
+            message = "\n\n################################\n" + \
+            "Setting up output destination: " + query_collection_data_object.output_destination + "\n"
+            logging.info(message)
+            print(message)
+
+            self.summary_sample_limit = query_collection_data_object.summary_sample_limit
+            self.write_empty_results = query_collection_data_object.write_empty_results
+            self.google_rate_limiter = Rate_limiter("google", query_collection_data_object.google_rate_limit)
+
+            # if an interrupted run is resumed, its output is reopened (otherwise None)
+            self.output_location_resumed = query_collection_data_object.checkpoint_journal.get_output_location()
+
+
+            # output_destination_type, interpret from string
+
+            if "google.com/drive/folders" in query_collection_data_object.output_destination:
+                self.output_destination_type = "google_folder"
+                logging.info("deduced output_destination_type: " + self.output_destination_type)
+                init_google_folder()
+
+            elif "google.com/spreadsheets" in query_collection_data_object.output_destination:
+                self.output_destination_type = "google_sheets"
+                logging.info("deduced output_destination_type: " + self.output_destination_type)
+                init_google_sheets()
+
+            elif query_collection_data_object.output_format == "XLSX" :
+                self.output_destination_type = "local_xlsx"
+                logging.info("deduced output_destination_type: " + self.output_destination_type)
+                init_local_xlsx()
+
+            else:
+                self.output_destination_type = "local_folder"
+                logging.info("deduced output_destination_type: " + self.output_destination_type)
+                init_local_folder()
+
+            query_collection_data_object.checkpoint_journal.set_output_location({
+                'output_destination_type': self.output_destination_type,
+                'file_xlsx': str(self.file_xlsx) if self.file_xlsx is not None else None,
+                'folder': str(self.folder) if self.folder is not None else None,
+                'google_sheets_id': self.google_sheets_id,
+            })
+
+
+        def init_local_xlsx():
+            """Creates a xlsx file in the respective folder"""
+
+            # if locally saved, then "/" needs to be replaced with "-", since otherwise "/" would be interpreted as subfolder
+            file_name = query_collection_data_object.title.replace("/", "-")
+
+            # get or create folder for xlsx file
+            self.folder = Path(str(query_collection_data_object.output_destination))
+            self.folder.mkdir(parents=True, exist_ok=True)
+
+            # create xlsx file
+            self.file_xlsx = Path(
+                self.folder / str(query_collection_data_object.timestamp_start + " - " + file_name + ".xlsx") )
+            init_xlsx_workbook()
+
+            message = "Created local file: " + str(self.file_xlsx)
+            logging.info(message)
+            print(message)
+
+
+        def init_local_folder():
+            """Creates a folder (for the raw ouput) and a xlsx file (for the summary) in the respective folder"""
+
+            # if locally saved, then "/" needs to be replaced with "-", since otherwise "/" would be interpreted as subfolder
+            folder_name = query_collection_data_object.title.replace("/", "-")
+
+
+            # create folder for queries and summary
+
+            self.folder = Path(str(
+                query_collection_data_object.output_destination + "/" +
+                query_collection_data_object.timestamp_start + " - " +
+                folder_name))
+
+            # the folder may only exist already if an interrupted run writing into it is resumed
+            self.folder.mkdir(parents=True, exist_ok=self.output_location_resumed is not None)
+
+            self.output_format = query_collection_data_object.output_format
+
+
+            # Create xlsx file for summary
+
+            self.file_xlsx = Path(self.folder / "0. Summary.xlsx")
+            init_xlsx_workbook()
+
+            message = "Created local folder: " + str(self.folder)
+            logging.info(message)
+            print(message)
+
+
+        def init_xlsx_workbook():
+            """Creates the workbook of the xlsx file with its summary sheet. In constant memory mode, xlsxwriter flushes
+            every row to a temporary file once a later row is written, so rows must be written in order."""
+
+            import xlsxwriter
+
+            self.xlsx_constant_memory = query_collection_data_object.xlsx_constant_memory
+            self.xlsx_workbook = xlsxwriter.Workbook(self.file_xlsx.open('wb'), {
+                'constant_memory': self.xlsx_constant_memory,
+                'nan_inf_to_errors': True,
+            })
+            self.xlsx_worksheet_summary = self.xlsx_workbook.add_worksheet("0. Summary")
+
+
+        def init_google_services():
+            """Instantiates all necessary services for writing results to a specified google folder / sheets-file"""
+
+            import_google_libraries()
+
+            # reuse services created for an earlier output writer with the same credentials, if any
+            self.google_services_key = \
+                (query_collection_data_object.credentials_path, query_collection_data_object.client_secret_path)
+
+            with Output_writer.google_services_cache_lock:
+                google_services = Output_writer.google_services_cache.get(self.google_services_key, [])
+                if len(google_services) > 0:
+                    self.google_credentials, self.google_service_drive, self.google_service_sheets = \
+                        google_services.pop()
+
+            if self.google_credentials is not None and not self.google_credentials.invalid:
+                logging.info("Reusing services for google api")
+                return
+
+            SCOPES = "https://www.googleapis.com/auth/drive"
+
+            # Hardwired credentials
+            #
+            # !!! CAUTION !!!
+            #
+            # POSSIBILITY OF GRANTING FULL ACCESS TO YOUR PRIVATE GOOGLE DRIVE
+            #
+            # For ease of usage on your local machine, you can hardwire your credentials here
+            # BUT ONLY DO THIS IF YOU NEVER SHARE THIS MODIFIED SCRIPT
+            #
+            # NEVER INSERT YOUR CREDENTIALS IF YOU WILL SHARE THIS SCRIPT!!
+
+
+            # UNCOMMENT THE FOLLOWING LINES AND INSERT CONTENT OF CREDENTIALS.JSON FILE THERE
+            # creds_hardcoded = json.loads("""
+            #
+            # """)
+
+            # COMMENT OR DELETE THIS LINE
+            creds_hardcoded = None
+
+
+            # use credentials file if available
+
+            if query_collection_data_object.credentials_path:
+                creds = client.GoogleCredentials.from_json(open(query_collection_data_object.credentials_path).read())
+
+            # if no credentials file is available, then create one using client_secret
+            elif query_collection_data_object.client_secret_path:
+                store = file.Storage('credentials.json')
+                flow = client.flow_from_clientsecrets(query_collection_data_object.client_secret_path, SCOPES)
+
+                # note: adding 'tools.argparser.parse_args(args=[])' here is important, otherwise
+                # oauth2client.tools would parse the main command line arguments
+                creds = tools.run_flow(flow, store, tools.argparser.parse_args(args=[]))
+
+            elif creds_hardcoded:
+
+                creds = GoogleCredentials(
+                    creds_hardcoded['access_token'],
+                    creds_hardcoded['client_id'],
+                    creds_hardcoded['client_secret'],
+                    creds_hardcoded['refresh_token'],
+                    creds_hardcoded['token_expiry'],
+                    creds_hardcoded['token_uri'],
+                    creds_hardcoded['user_agent'],
+                    creds_hardcoded['revoke_uri']
+                )
+
+            # if neither is available, abort
+            else:
+                message = "\nERROR: No client_secret.json or credentials.json provided nor found in local folder!."
+                logging.error(message)
+                sys.exit(message)
+
+            # create services to be used by write functions
+            if not creds.invalid:
+                self.google_credentials = creds
+                self.google_service_drive = discovery.build('drive', 'v3', http=creds.authorize(Http()))
+                self.google_service_sheets = discovery.build('sheets', 'v4', http=creds.authorize(Http()))
+            else:
+                message = "\nERROR: Invalid credentials!"
+                logging.error(message)
+                sys.exit(message)
+
+
+        def init_google_sheets_batch():
+            """Creates the batch collecting all writes into the google sheets file (see Google_sheets_batch)"""
+
+            self.google_sheets_batch = Google_sheets_batch(
+                self.execute_google_request, self.google_service_sheets, self.google_sheets_id,
+                lambda: self.google_credentials.authorize(Http()))
+
+
+        def init_google_sheets():
+            """Formats the give google sheets file, deletes old content and creates a summary-sheet"""
+
+            init_google_services()
+
+
+            # get id of google sheets file by extracting it from the url
+
+            self.google_sheets_id = query_collection_data_object.output_destination\
+                .split("docs.google.com/spreadsheets/d/",1)[1]\
+                .split("/",1)[0]
+            logging.info("ID of google sheets : " + str(self.google_sheets_id))
+
+            # if an interrupted run is resumed, keep the sheets it wrote
+            if self.output_location_resumed is not None:
+                init_google_sheets_resumed()
+                return
+
+            # get list of existing sheets in sheets file
+            google_sheets_metadata = self.execute_google_request(self.google_service_sheets.spreadsheets().get(
+                spreadsheetId=self.google_sheets_id))
+            all_sheet = google_sheets_metadata['sheets']
+
+            # ids of new sheets are chosen here (instead of by google), so that the requests creating sheets can be
+            # batched together with further requests on them
+            self.google_sheets_next_sheet_id = max(sheet['properties']['sheetId'] for sheet in all_sheet) + 1
+            init_google_sheets_batch()
+
+
+            # create new sheet reserved for summary, delete all other sheets, then rename summary sheet to '0. Summary'
+
+            self.google_sheets_summary_sheet_id = self.get_new_google_sheet_id()
+            self.google_sheets_summary_grid = [ 1000, 26 ]
+
+            requests = [
+                {
+                    "addSheet": {
+                        "properties": {
+                            "sheetId": self.google_sheets_summary_sheet_id,
+                            "gridProperties": {
+                                "rowCount": self.google_sheets_summary_grid[0],
+                                "columnCount": self.google_sheets_summary_grid[1]
+                            }
+                        }
+                    }
+                }
+            ]
+
+            for sheet in all_sheet:
+                requests.append({
+                    "deleteSheet": {
+                        "sheetId": sheet['properties']['sheetId']
+                    }
+                })
+
+            requests.extend([
+                {
+                    "updateSheetProperties": {
+                        "properties": {
+                            "sheetId": self.google_sheets_summary_sheet_id,
+                            "title": "0. Summary",
+                        },
+                        "fields": "title",
+                    }
+                },
+                {
+                    "updateDimensionProperties": {
+                        "range": {
+                            "sheetId": self.google_sheets_summary_sheet_id,
+                            "dimension": "COLUMNS",
+                            "startIndex": 0,
+                            "endIndex":26
+                        },
+                        "properties": {
+                            "pixelSize": 350
+                        },
+                        "fields": "pixelSize"
+                    }
+                }
+            ])
+            self.google_sheets_batch.add_requests(requests)
+
+
+        def init_google_sheets_resumed():
+            """Reopens the google sheets file written by an interrupted run. Its sheets are kept, except the ones of
+            queries which were not recorded as completed, which are replaced when the queries are written again."""
+
+            google_sheets_metadata = self.execute_google_request(self.google_service_sheets.spreadsheets().get(
+                spreadsheetId=self.google_sheets_id))
+
+            self.google_sheets_resumed_sheets = {}
+            for sheet in google_sheets_metadata['sheets']:
+                if sheet['properties']['title'] == "0. Summary":
+                    self.google_sheets_summary_sheet_id = sheet['properties']['sheetId']
+                    self.google_sheets_summary_grid = [
+                        sheet['properties']['gridProperties']['rowCount'],
+                        sheet['properties']['gridProperties']['columnCount'] ]
+                else:
+                    self.google_sheets_resumed_sheets[sheet['properties']['title']] = sheet['properties']['sheetId']
+
+            self.google_sheets_next_sheet_id = \
+                max(sheet['properties']['sheetId'] for sheet in google_sheets_metadata['sheets']) + 1
+            init_google_sheets_batch()
+
+            message = "Reopened google sheets at: " + "docs.google.com/spreadsheets/d/" + self.google_sheets_id
+            logging.info(message)
+            print(message)
+
+
+        # google folder
+        def init_google_folder():
+            """Creates a new google sheets file inside the specified google folder"""
+
+            init_google_services()
+
+            # if an interrupted run is resumed, reopen the google sheets file it created
+            if self.output_location_resumed is not None:
+                self.google_sheets_id = self.output_location_resumed['google_sheets_id']
+                init_google_sheets_resumed()
+                return
+
+            # get id of google folder by extracting it from the url
+            self.google_folder_id = query_collection_data_object.output_destination\
+                .split("drive.google.com/drive/folders/",1)[1]\
+                .split("?",1)[0]
+            logging.info("ID of google folder : " + str(self.google_folder_id))
+
+            # Create google sheets file in folder
+            body_spreadsheet = {
+                'name': query_collection_data_object.timestamp_start + " - " + query_collection_data_object.title,
+                'mimeType': 'application/vnd.google-apps.spreadsheet',
+                'parents': [self.google_folder_id]
+            }
+            sheets =  self.execute_google_request(self.google_service_drive.files().create(body=body_spreadsheet))
+            self.google_sheets_id = sheets['id']
+            self.google_sheets_summary_sheet_id = 0
+            self.google_sheets_summary_grid = [ 1000, 26 ]
+            self.google_sheets_next_sheet_id = 1
+            init_google_sheets_batch()
+
+            # Sets name of first sheet to summary, sets up column width
+            self.google_sheets_batch.add_requests([
+                {
+                    "updateSheetProperties": {
+                        "properties": {
+                            "sheetId": self.google_sheets_summary_sheet_id,
+                            "title": "0. Summary",
+                        },
+                        "fields": "title",
+                    }
+                },
+                {
+                    "updateDimensionProperties": {
+                        "range": {
+                            "sheetId": self.google_sheets_summary_sheet_id,
+                            "dimension": "COLUMNS",
+                            "startIndex": 0,
+                            "endIndex":26
+                        },
+                        "properties": {
+                            "pixelSize": 300
+                        },
+                        "fields": "pixelSize"
+                    }
+                }
+            ])
+
+            message = "Created google sheets at: " + "docs.google.com/spreadsheets/d/" + self.google_sheets_id
+            logging.info(message)
+            print(message)
+
+        main()
+
+
+    def write_header_summary(self, query_collection_data_object):
+        """Writes the initial header to the summary sheet"""
+
+        def main(query_collection_data_object):
+
+            if self.output_destination_type == 'local_folder' or self.output_destination_type == 'local_xlsx':
+                write_header_summary_xlsx_file(query_collection_data_object)
+
+            elif self.output_destination_type == 'google_folder' or self.output_destination_type == 'google_sheets':
+                write_header_summary_google_sheet(query_collection_data_object)
+
+
+        def write_header_summary_xlsx_file(query_collection_data_object):
+            """Writes header to xlsx file"""
+
+            message = "Writing header to summary in local xslx"
+            logging.info(message)
+            print(message)
+
+            # setup and formats
+            self.xlsx_worksheet_summary.set_column('A:Z', 70)
+            self.title_format = self.xlsx_workbook.add_format({'bold': True})
+            self.title_format.set_font_size(16)
+            self.title_2_format = self.xlsx_workbook.add_format({'bold': True})
+            self.title_2_format.set_font_size(12)
+            self.query_text_format = self.xlsx_workbook.add_format({'text_wrap': True})
+            self.bold_format = self.xlsx_workbook.add_format({'bold': True})
+            self.date_format = self.xlsx_workbook.add_format({'num_format': 'yyyy-mm-dd'})
+            self.datetime_format = self.xlsx_workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+
+            # Write header to xlsx
+            self.xlsx_worksheet_summary.set_row(0, 20)
+            self.line_number = 0
+            self.xlsx_worksheet_summary.write(self.line_number, 0, query_collection_data_object.title, self.title_format)
+            if query_collection_data_object.description is not None:
+                self.xlsx_worksheet_summary.write(self.line_number + 1, 0, query_collection_data_object.description)
+                self.line_number += 1
+            self.line_number += 2
+            self.xlsx_worksheet_summary.write(self.line_number, 0, "Execution timestamp of script: " + query_collection_data_object.timestamp_start)
+            self.line_number += 1
+            self.xlsx_worksheet_summary.write(self.line_number, 0, "Endpoint: " + query_collection_data_object.endpoint)
+            self.line_number += 1
+
+            # line reserved for count of all triples, written once it is done
+            self.line_number_triple_count = self.line_number
+            self.line_number += 4
+
+
+        def write_header_summary_google_sheet(query_collection_data_object):
+            """Writes header to google sheets file"""
+
+            message = "Writing header to summary in google sheets"
+            logging.info(message)
+            print(message)
+
+            # create header info
+            self.line_number = 0
+            header = []
+            header.append([query_collection_data_object.title])
+            if query_collection_data_object.description is not None:
+                header.append([query_collection_data_object.description])
+            header.append([])
+            header.append(
+                ["Execution timestamp of script: " +
+                 query_collection_data_object.timestamp_start])
+            header.append(["endpoint: " + query_collection_data_object.endpoint])
+
+            # line reserved for count of all triples, written once it is done
+            self.line_number_triple_count = self.line_number + len(header)
+            header.append([])
+
+
+            # get range for header
+            range = self.get_google_range("0. Summary", self.line_number, 0, header)
+            self.resize_google_summary(self.line_number + len(header), 1)
+            self.line_number += len(header) + 3
+
+            # write header to sheet
+            self.google_sheets_batch.add_values(range, header)
+
+        main(query_collection_data_object)
+
+
+    def write_header_triple_count(self, query_collection_data_object):
+        """Writes the count of all triples in the endpoint (or the error encountered when counting them) into the
+        line reserved for it in the header of the summary sheet"""
+
+        if query_collection_data_object.header_error_message is None:
+            line = "Total count of triples in endpoint: " + query_collection_data_object.count_triples_in_endpoint
+            if query_collection_data_object.count_triples_in_endpoint_timestamp is not None:
+                line += " (counted at: " + time.strftime(
+                    '%Y-%m-%d %H:%M:%S',
+                    time.localtime(query_collection_data_object.count_triples_in_endpoint_timestamp)) + ")"
+        else:
+            line = query_collection_data_object.header_error_message
+
+        if self.output_destination_type == 'local_folder' or self.output_destination_type == 'local_xlsx':
+            self.xlsx_worksheet_summary.write(self.line_number_triple_count, 0, line)
+
+        elif self.output_destination_type == 'google_folder' or self.output_destination_type == 'google_sheets':
+            range = self.get_google_range("0. Summary", self.line_number_triple_count, 0, [[line]])
+            self.google_sheets_batch.add_values(range, [[line]])
+
+
+    def write_query_result(self, query_data_object):
+        """Writes results of query to the respective output destination"""
+
+        def main(query_data_object):
+
+            # results restored from the checkpoint journal are already in the output, except for xlsx files, which
+            # are written anew when resuming, and except results reused from the previous run
+            if query_data_object.results_restored and not query_data_object.results_reused and \
+                    self.output_destination_type != 'local_xlsx':
+                return
+
+            if len(query_data_object.results_matrix) > 1 or self.write_empty_results:
+                message = "Writing results to output_destination"
+                logging.info(message)
+                print(message)
+
+                if self.output_destination_type == 'local_xlsx':
+                    write_query_result_to_xlsx_file(query_data_object)
+
+                elif self.output_destination_type == 'local_folder':
+                    write_query_result_to_local_folder(query_data_object)
+
+                elif self.output_destination_type == 'google_sheets' or self.output_destination_type == 'google_folder':
+                    write_query_result_to_google_sheets(query_data_object)
+
+            # results which were streamed to disk during execution, but are empty and should not be written
+            elif query_data_object.results_file is not None:
+                query_data_object.results_file.unlink()
+
+
+        def write_query_result_to_xlsx_file(query_data_object):
+            """Writes results as harmonized two-dimensional list into a separate sheet in the xlsl file"""
+
+            # create new worksheet and write into it
+            sanitized_query_title = query_data_object.title\
+                .replace("["," ") \
+                .replace("]"," ") \
+                .replace(":"," ") \
+                .replace("*"," ") \
+                .replace("?"," ") \
+                .replace("/"," ") \
+                .replace("\\"," ")
+
+            sanitized_query_title = str(query_data_object.id) + sanitized_query_title
+
+            if len(sanitized_query_title) > 30:
+                sanitized_query_title = sanitized_query_title[:29]
+
+            results_matrix = query_data_object.results_matrix
+
+            # results restored from only a sample in the checkpoint journal (e.g. errors) are plain rows
+            if not isinstance(results_matrix, Results_matrix):
+                worksheet = self.xlsx_workbook.add_worksheet( sanitized_query_title )
+                for y, row in enumerate(results_matrix):
+                    for x, column in enumerate(row):
+                        self.write_xlsx_cell(worksheet, y, x, column)
+                return
+
+            # prepare all values column by column, then write them row by row. Results exceeding the rows of a
+            # worksheet are continued in further worksheets, each starting with the variables again.
+            column_types = results_matrix.column_types
+            columns = [
+                self.get_xlsx_column(column, column_types[x]) for x, column in enumerate(results_matrix.columns) ]
+            rows_per_worksheet = self.xlsx_max_rows - 1
+
+            for start in range(0, max(results_matrix.rows_count, 1), rows_per_worksheet):
+
+                if start == 0:
+                    worksheet = self.xlsx_workbook.add_worksheet( sanitized_query_title )
+                else:
+                    suffix = " (" + str(start // rows_per_worksheet + 1) + ")"
+                    worksheet = self.xlsx_workbook.add_worksheet( sanitized_query_title[:31 - len(suffix)] + suffix )
+
+                for x in range(0, len(columns)):
+                    if column_types[x] is datetime.datetime:
+                        worksheet.set_column(x, x, None, self.datetime_format)
+                    elif column_types[x] is datetime.date:
+                        worksheet.set_column(x, x, None, self.date_format)
+
+                worksheet.write_row(0, 0, results_matrix.variables)
+                rows = zip(*[ column[start:start + rows_per_worksheet] for column in columns ])
+                for y, row in enumerate(rows, 1):
+                    worksheet.write_row(y, 0, row)
+
+
+        def write_query_result_to_local_folder(query_data_object):
+            """Writes raw output using the respective data format into the specified local folder"""
+
+
+            # results which were streamed to disk during execution are already written
+
+            if query_data_object.results_file is not None:
+                return
+
+
+            # create file for query result
+
+            local_file = self.get_local_file_path(query_data_object)
+
+
+            # results reused from the previous run are hard-linked from its output (or copied, if not possible)
+
+            if query_data_object.results_reused:
+                if local_file.exists():
+                    local_file.unlink()
+                try:
+                    os.link(query_data_object.results_raw, str(local_file))
+                except OSError:
+                    shutil.copyfile(query_data_object.results_raw, str(local_file))
+                return
+
+
+            # results of all formats are written as the raw bytes received from the endpoint
+            with local_file.open('wb') as fw:
+                fw.write(query_data_object.results_raw)
+
+
+        def write_query_result_to_google_sheets(query_data_object):
+            """Writes results as harmonized two-dimensional list into a separate sheet in the google sheets file"""
+
+            sanitized_query_title = query_data_object.title
+            if len(sanitized_query_title) > 100:
+                sanitized_query_title = sanitized_query_title[:99]
+
+            sanitized_query_title = str(query_data_object.id) + ". " + sanitized_query_title
+
+            # create sheet (replacing one written by an interrupted run which did not complete the query)
+            google_sheet_id = self.get_new_google_sheet_id()
+            requests = [
+                {
+                    'addSheet': {
+                        'properties': {
+                            'sheetId': google_sheet_id,
+                            'title': sanitized_query_title,
+                            'gridProperties': {
+                                'rowCount': len(query_data_object.results_matrix),
+                                'columnCount': max(len(get_result_rows(query_data_object.results_matrix, 0, 1)[0]), 1)
+                            }
+                        }
+                    }
+                },
+                {
+                    "updateDimensionProperties": {
+                        "range": {
+                            "sheetId": google_sheet_id,
+                            "dimension": "COLUMNS",
+                            "startIndex": 0,
+                            "endIndex": 26
+                        },
+                        "properties": {
+                            "pixelSize": 300
+                        },
+                        "fields": "pixelSize"
+                    }
+                }
+            ]
+            if sanitized_query_title in self.google_sheets_resumed_sheets:
+                requests.insert(0, {
+                    'deleteSheet': { 'sheetId': self.google_sheets_resumed_sheets.pop(sanitized_query_title) }
+                })
+            self.google_sheets_batch.add_requests(requests)
+
+            # write into sheet (sized for all results already, so that chunks of them can be written in any order)
+            self.add_google_values(
+                sanitized_query_title, 0,
+                [ self.get_google_values(row) for row in get_result_rows(query_data_object.results_matrix) ])
+
+        main(query_data_object)
+
+
+    def execute_google_request(self, request, http=None):
+        """Executes a request to the google api, once the rate limiter for google allows it (using the given http
+        connection, if it is executed outside of the main thread).
+        If google responds that too many requests were sent (HTTP 429), the rate limiter is paused for as long
+        as google asks for, and the request is executed again."""
+
+        attempt = 0
+
+        while True:
+
+            self.google_rate_limiter.acquire()
+
+            try:
+                if http is None:
+                    return request.execute()
+                else:
+                    return request.execute(http=http)
+
+            except errors.HttpError as ex:
+                if ex.resp.status != 429 or attempt >= self.google_rate_limiter.max_retries:
+                    raise
+                attempt += 1
+                self.google_rate_limiter.pause_after_too_many_requests(ex.resp.get('retry-after'))
+
+
+    def write_xlsx_cell(self, worksheet, y, x, value):
+        """Writes a value of a harmonized result into a cell of a xlsx worksheet. Dates are written as such (or as
+        text before 1900, which excel does not support), other values longer than 255 characters are cut off."""
+
+        if isinstance(value, datetime.datetime) and value.year >= 1900:
+            worksheet.write_datetime(y, x, value.replace(tzinfo=None), self.datetime_format)
+        elif isinstance(value, datetime.date) and value.year >= 1900:
+            worksheet.write_datetime(y, x, value, self.date_format)
+        elif isinstance(value, datetime.date):
+            worksheet.write_string(y, x, value.isoformat())
+        elif isinstance(value, str) and len(value) > 255:
+            worksheet.write(y, x, value[:255])
+        else:
+            worksheet.write(y, x, value)
+
+
+    def get_xlsx_column(self, column, column_type):
+        """Returns the values of a column of a Results_matrix prepared at once for writing them into a xlsx worksheet
+        (see write_xlsx_cell): text longer than 255 characters is cut off, dates before 1900 are turned into text
+        and time zones are removed. Dates are then written with the format of their column."""
+
+        if column_type is str:
+            if any(isinstance(value, str) and len(value) > 255 for value in column):
+                return [ value[:255] if isinstance(value, str) else value for value in column ]
+
+        elif column_type is datetime.datetime:
+            return [
+                (value.replace(tzinfo=None) if value.year >= 1900 else value.isoformat()) if value != "" else ""
+                for value in column ]
+
+        elif column_type is datetime.date:
+            return [ (value if value.year >= 1900 else value.isoformat()) if value != "" else "" for value in column ]
+
+        return column
+
+
+    def get_google_values(self, row):
+        """Returns a row of a harmonized result with all values as the google api accepts them (dates as text)"""
+
+        google_values = []
+        for value in row:
+            if isinstance(value, datetime.date):
+                value = value.isoformat()
+            elif isinstance(value, float) and not math.isfinite(value):
+                value = str(value)
+            google_values.append(value)
+
+        return google_values
+
+
+    def get_local_file_path(self, query_data_object):
+        """Returns the path of the file for the results of a query in the local folder
+        (and replaces "/" with "-" because the file-writer interprets "/" as subdirectory)"""
+
+        file_name = \
+            str(query_data_object.id) + ". " + \
+            query_data_object.title.replace("/", "-") + \
+            "." + self.output_format
+
+        return Path(self.folder / file_name)
+
+
+    def write_query_summary(self, query_data_object):
+        """Writes the gist of the results of an executed query to a summary sheet"""
+
+        def main(query_data_object):
+
+            message = "Writing to summary"
+            logging.info(message)
+            print(message)
+
+            if self.output_destination_type == 'local_xlsx' or self.output_destination_type == 'local_folder' :
+                write_query_summary_xlsx_file(query_data_object)
+
+            elif self.output_destination_type == 'google_sheets' or self.output_destination_type == 'google_folder':
+                write_query_summary_google_sheets(query_data_object)
+
+
+        def write_query_summary_xlsx_file(query_data_object):
+            """Writes the gist of the results of an executed query to the summary sheet in the xlsx file"""
+
+            # query_title
+            self.xlsx_worksheet_summary.write(
+                self.line_number,
+                0,
+                str(query_data_object.id) + ". " + str(query_data_object.title),
+                self.title_2_format)
+            self.line_number += 1
+
+            # query description
+            if not (query_data_object.description is None or
+                    query_data_object.description.isspace() or
+                    query_data_object.description == "") :
+
+                self.xlsx_worksheet_summary.write(self.line_number, 0, query_data_object.description)
+                self.line_number += 1
+
+            # query_text
+            size_of_query_text_row = 15 * (query_data_object.query.count("\n") + 2)
+            self.xlsx_worksheet_summary.set_row(self.line_number, size_of_query_text_row)
+            self.xlsx_worksheet_summary.write(self.line_number, 0, query_data_object.query, self.query_text_format)
+            self.line_number += 1
+
+            # results_execution_duration
+            self.xlsx_worksheet_summary.write(self.line_number, 0, "Duration of execution in seconds: " + str(query_data_object.results_execution_duration))
+            self.line_number += 1
+
+            # results_stage_durations
+            if len(query_data_object.results_stage_durations) > 0:
+                self.xlsx_worksheet_summary.write(self.line_number, 0, self.get_stages_message(query_data_object))
+                self.line_number += 1
+
+            # results_pages_durations
+            if query_data_object.results_pages_durations is not None:
+                self.xlsx_worksheet_summary.write(self.line_number, 0, self.get_pages_message(query_data_object))
+                self.line_number += 1
+
+            # results_cache_timestamp
+            if query_data_object.results_cache_timestamp is not None:
+                self.xlsx_worksheet_summary.write(self.line_number, 0, self.get_cache_message(query_data_object))
+                self.line_number += 1
+
+            # results_attempts
+            if query_data_object.results_retry_duration > 0:
+                self.xlsx_worksheet_summary.write(self.line_number, 0, self.get_retries_message(query_data_object))
+                self.line_number += 1
+
+            if query_data_object.results_raw is None:
+                self.line_number += 1
+                self.xlsx_worksheet_summary.write(self.line_number, 0, "NO RESULTS DUE TO ERROR: " + query_data_object.error_message)
+                self.line_number += 1
+
+            else:
+                # results_lines_count
+                if query_data_object.results_lines_count is not None:
+                    self.xlsx_worksheet_summary.write(self.line_number, 0, "Total count of lines in results: " + str(query_data_object.results_lines_count))
+                    self.line_number += 2
+                else:
+                    self.line_number += 1
+
+                # results
+                limit = self.summary_sample_limit
+                if limit != 0:
+
+                    self.xlsx_worksheet_summary.write(self.line_number, 0, "Sample results: ", self.bold_format)
+                    self.line_number += 1
+                    harmonized_rows = get_result_rows(query_data_object.results_matrix, 0, limit + 1)
+
+                    limit += 1
+                    if len(harmonized_rows) < limit:
+                        limit = len(harmonized_rows)
+
+                    y = 0
+                    for y in range(0, limit):
+                        for x, column in enumerate(harmonized_rows[y]):
+                            self.write_xlsx_cell(self.xlsx_worksheet_summary, y + self.line_number, x, column)
+
+                    self.line_number += 1
+
+                self.line_number += limit
+
+            self.line_number += 2
+
+
+        def write_query_summary_google_sheets(query_data_object):
+            """Writes the gist of the results of an executed query to the summary sheet in the google sheets file"""
+
+            # creating header
+            query_stats = []
+            query_stats.append([str(query_data_object.id) + ". " + query_data_object.title])
+            if not (query_data_object.description.isspace() or query_data_object.description == "") :
+                query_stats.append([query_data_object.description])
+            query_stats.append([query_data_object.query])
+            query_stats.append(
+                ["Duration of execution in seconds: " +
+                 str(query_data_object.results_execution_duration)])
+            if len(query_data_object.results_stage_durations) > 0:
+                query_stats.append([self.get_stages_message(query_data_object)])
+            if query_data_object.results_pages_durations is not None:
+                query_stats.append([self.get_pages_message(query_data_object)])
+            if query_data_object.results_cache_timestamp is not None:
+                query_stats.append([self.get_cache_message(query_data_object)])
+            if query_data_object.results_retry_duration > 0:
+                query_stats.append([self.get_retries_message(query_data_object)])
+
+
+            if query_data_object.results_raw is None:
+                query_stats.append([])
+                query_stats.append(["NO RESULTS DUE TO ERROR: " + query_data_object.error_message])
+
+            else:
+
+                if query_data_object.results_lines_count is not None:
+                    query_stats.append(
+                        ["Total count of lines in results: " +
+                         str(query_data_object.results_lines_count)])
+
+                # get sample results
+                limit = self.summary_sample_limit
+                if limit != 0:
+
+                    query_stats.append([])
+                    query_stats.append(["Sample results: "])
+                    harmonized_rows = get_result_rows(query_data_object.results_matrix, 0, limit + 1)
+
+                    # set limit as defined, readjust if results should be less than it or if it exceeds gsheets-capacities
+                    limit += 1
+                    if len(harmonized_rows) < limit:
+                        limit = len(harmonized_rows)
+
+                    for y in range(0, limit):
+                        query_stats.append(self.get_google_values(harmonized_rows[y]))
+
+            # write header and sample results to sheet
+            google_sheet_range = self.get_google_range("0. Summary", self.line_number, 0, query_stats)
+            self.resize_google_summary(self.line_number + len(query_stats), max(len(row) for row in query_stats))
+            self.line_number += len(query_stats) + 3
+
+            self.google_sheets_batch.add_values(google_sheet_range, query_stats)
+
+        main(query_data_object)
+
+
+    def get_stages_message(self, query_data_object):
+        """Returns the line for the summary stating how long the stages of the query took so far"""
+
+        stage_durations = query_data_object.results_stage_durations
+
+        return "Duration of stages in seconds: " + ", ".join(
+            name + ": " + str(stage_durations[stage])
+            for stage, name in Query_data_object.stages.items() if stage in stage_durations)
+
+
+    def get_pages_message(self, query_data_object):
+        """Returns the line for the summary stating in how many pages the results were fetched"""
+
+        durations = query_data_object.results_pages_durations
+
+        return "Results fetched in " + str(len(durations)) + " pages of " + str(query_data_object.page_size) + \
+            " rows; duration of execution per page in seconds: average " + str(sum(durations) / len(durations)) + \
+            ", maximum " + str(max(durations))
+
+
+    def get_cache_message(self, query_data_object):
+        """Returns the line for the summary stating that the results were taken from the cache"""
+
+        return "Results taken from cache, executed at: " + \
+            time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(query_data_object.results_cache_timestamp))
+
+
+    def get_retries_message(self, query_data_object):
+        """Returns the line for the summary stating how often requests for the query had to be retried"""
+
+        message = "Requests sent to endpoint (including retries): " + str(query_data_object.results_attempts)
+        if query_data_object.results_count_attempts > 0:
+            message += "; for counting the results: " + str(query_data_object.results_count_attempts)
+
+        return message + "; time spent waiting for retries in seconds: " + str(query_data_object.results_retry_duration)
+
+
+    def get_new_google_sheet_id(self):
+        """Returns an id for a new sheet in the google sheets file, not used by any of its sheets yet"""
+
+        google_sheet_id = self.google_sheets_next_sheet_id
+        self.google_sheets_next_sheet_id += 1
+
+        return google_sheet_id
+
+
+    def call_when_written(self, function, *args):
+        """Calls a function once everything written so far is actually in the output, i.e. right away, or for
+        google sheets after the requests queued so far were sent (see Google_sheets_batch)"""
+
+        if self.google_sheets_batch is not None:
+            self.google_sheets_batch.add_callback(lambda: function(*args))
+        else:
+            function(*args)
+
+
+    def flush(self):
+        """Sends all requests queued for google sheets"""
+
+        if self.google_sheets_batch is not None:
+            self.google_sheets_batch.flush()
+
+
+    def add_google_values(self, title, start_y, rows):
+        """Queues rows to be written into a sheet from row start_y on, split into chunks of rows fitting into one
+        request each (see Google_sheets_batch)"""
+
+        max_request_size = self.google_sheets_batch.max_request_size
+        chunk = []
+        chunk_size = 0
+
+        for row in rows:
+
+            row_size = Google_sheets_batch.get_size([ row ])
+
+            if chunk_size + row_size > max_request_size and len(chunk) > 0:
+                self.google_sheets_batch.add_values(self.get_google_range(title, start_y, 0, chunk), chunk, chunk_size)
+                start_y += len(chunk)
+                chunk = []
+                chunk_size = 0
+
+            chunk.append(row)
+            chunk_size += row_size
+
+        if len(chunk) > 0:
+            self.google_sheets_batch.add_values(self.get_google_range(title, start_y, 0, chunk), chunk, chunk_size)
+
+
+    def resize_google_summary(self, rows_count, columns_count):
+        """Queues appending rows and columns to the summary sheet, if it is too small for values up to the given
+        row and column count. Rows are appended in steps of 1000, so that this is rarely needed."""
+
+        requests = []
+
+        if rows_count > self.google_sheets_summary_grid[0]:
+            length = max(rows_count - self.google_sheets_summary_grid[0], 1000)
+            requests.append({ 'appendDimension': {
+                'sheetId': self.google_sheets_summary_sheet_id, 'dimension': "ROWS", 'length': length } })
+            self.google_sheets_summary_grid[0] += length
+
+        if columns_count > self.google_sheets_summary_grid[1]:
+            length = columns_count - self.google_sheets_summary_grid[1]
+            requests.append({ 'appendDimension': {
+                'sheetId': self.google_sheets_summary_sheet_id, 'dimension': "COLUMNS", 'length': length } })
+            self.google_sheets_summary_grid[1] += length
+
+        if len(requests) > 0:
+            self.google_sheets_batch.add_requests(requests)
+
+
+    def get_google_range(self, title, start_y, start_x, matrix):
+        """Returns the range of a matrix in a sheet in A1-notation, with the title of the sheet quoted"""
+
+        return "'" + title.replace("'", "''") + "'!" + self.get_range_from_matrix(start_y, start_x, matrix)
+
+
+    def get_range_from_matrix(self, start_y, start_x, matrix):
+        """Input: starting y- and x-coordinates and a matrix.
+        Output: Coordinates of the matrix (left upper cell and lower right cell) in A1-notation for updating google sheets"""
+
+        max_len_x = 1
+        for row in matrix:
+            if len(row) > max_len_x:
+                max_len_x = len(row)
+
+        max_len_y = len(matrix)
+
+        range_start = self.get_column_letters(start_x) + str(start_y + 1)
+
+        range_end = self.get_column_letters(start_x + max_len_x - 1) + str(start_y + max_len_y)
+
+        return range_start + ":" + range_end
+
+
+    @staticmethod
+    def get_column_letters(x):
+        """Returns the letters of a column in A1-notation, e.g. 'A' for 0, 'Z' for 25, 'AA' for 26"""
+
+        letters = ""
+        x += 1
+        while x > 0:
+            x, remainder = divmod(x - 1, 26)
+            letters = chr(65 + remainder) + letters
+
+        return letters
+
+
+    def close(self):
+        """Closes the xlsx writer object, or sends the requests still queued for google sheets"""
+
+        if self.output_destination_type == "local_xlsx" or self.output_destination_type == 'local_folder' :
+            logging.info("close writer")
+            self.xlsx_workbook.close()
+
+        else:
+            self.flush()
+            logging.info("Calls sent to google sheets for writing: " + str(self.google_sheets_batch.calls_count))
+
+            # the services can be reused by later output writers
+            with Output_writer.google_services_cache_lock:
+                Output_writer.google_services_cache.setdefault(self.google_services_key, []).append(
+                    (self.google_credentials, self.google_service_drive, self.google_service_sheets))
+
+
+
+
+class Google_sheets_batch:
+    """The Google_sheets_batch Class collects the requests for writing into a google sheets file and sends them in as
+    few calls to the google api as possible: all queued requests changing sheets (e.g. addSheet) at once in
+    spreadsheets().batchUpdate, then all queued values in spreadsheets().values().batchUpdate calls of up to
+    max_request_size bytes each, up to max_parallel_uploads of them at the same time (ranges of values never overlap,
+    so their order does not matter).
+    The queue is flushed once it holds max_requests requests or values for max_parallel_uploads full requests, once
+    its oldest request waited for max_delay seconds (by a timer, so also while nothing else is queued, e.g. during a
+    long query), and at the end. Functions which must only be called once the queued requests are in the file (e.g.
+    recording a query in the checkpoint journal) are called after the next flush. Errors of a flush by the timer are
+    raised when something is queued or flushed next."""
+
+    max_requests = 100
+    max_delay = 30
+
+    # google recommends payloads of at most 2 MB per request
+    max_request_size = 2 * 1024 * 1024
+    max_parallel_uploads = 4
+
+    def __init__(self, execute_request, service_sheets, spreadsheet_id, create_http):
+
+        self.execute_request = execute_request
+        self.service_sheets = service_sheets
+        self.spreadsheet_id = spreadsheet_id
+
+        # httplib2 connections are not thread-safe, so every thread uploading values uses its own
+        self.create_http = create_http
+        self.thread_local = threading.local()
+
+        self.requests = []
+        self.values = []
+        self.callbacks = []
+        self.cells_count = 0
+        self.values_size = 0
+        self.time_first_queued = None
+        self.calls_count = 0
+
+        # the queue is flushed from the thread of the timer as well as from the one queueing
+        self.lock = threading.RLock()
+        self.timer = None
+        self.timer_error = None
+
+
+    @staticmethod
+    def get_size(values):
+        """Returns the estimated size in bytes of values when sent as json"""
+
+        return sum(len(str(value)) + 4 for row in values for value in row) + 3 * len(values)
+
+
+    def add_requests(self, requests):
+        """Queues requests for spreadsheets().batchUpdate, e.g. addSheet or updateDimensionProperties"""
+
+        with self.lock:
+            self.requests.extend(requests)
+            self.queued()
+
+
+    def add_values(self, range, values, size=None):
+        """Queues values to be written into the given range (in A1-notation, including the sheet's title). Values
+        larger than max_request_size must be split by the caller (see Output_writer.add_google_values)."""
+
+        if size is None:
+            size = self.get_size(values)
+
+        with self.lock:
+            self.values.append({ 'range': range, 'values': values, 'size': size })
+            self.cells_count += sum(len(row) for row in values)
+            self.values_size += size
+            self.queued()
+
+
+    def add_callback(self, callback):
+        """Queues a function to be called after the next flush"""
+
+        with self.lock:
+            self.callbacks.append(callback)
+            self.queued()
+
+
+    def queued(self):
+
+        if self.timer_error is not None:
+            self.flush()
+
+        if self.time_first_queued is None:
+            self.time_first_queued = time.time()
+            self.timer = threading.Timer(self.max_delay, self.flush_when_due)
+            self.timer.daemon = True
+            self.timer.start()
+
+        if len(self.requests) + len(self.values) >= self.max_requests or \
+                self.values_size >= self.max_parallel_uploads * self.max_request_size or \
+                time.time() - self.time_first_queued >= self.max_delay:
+            self.flush()
+
+
+    def flush_when_due(self):
+        """Flushes the queue once its oldest request waited for max_delay seconds, called by the timer"""
+
+        with self.lock:
+
+            if self.time_first_queued is None or time.time() - self.time_first_queued < self.max_delay:
+                return
+
+            try:
+                self.flush()
+            except BaseException as ex:
+                self.timer_error = ex
+
+
+    def flush(self):
+        """Sends all queued requests, then calls all queued functions"""
+
+        with self.lock:
+
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+            if self.timer_error is not None:
+                timer_error = self.timer_error
+                self.timer_error = None
+                raise timer_error
+
+            self.send()
+
+
+    def send(self):
+        """Sends the queued requests and values, then calls the queued functions (see 'flush')"""
+
+        if len(self.requests) > 0:
+            logging.info("Sending batch of " + str(len(self.requests)) + " requests to google sheets")
+            self.execute_request(self.service_sheets.spreadsheets().batchUpdate(
+                spreadsheetId=self.spreadsheet_id, body={ 'requests': self.requests }), self.get_http())
+            self.calls_count += 1
+            self.requests = []
+
+        if len(self.values) > 0:
+
+            # group ranges of values into requests of up to max_request_size bytes
+            uploads = [ [] ]
+            upload_size = 0
+            for value_range in self.values:
+                if upload_size + value_range['size'] > self.max_request_size and len(uploads[-1]) > 0:
+                    uploads.append([])
+                    upload_size = 0
+                uploads[-1].append({ 'range': value_range['range'], 'values': value_range['values'] })
+                upload_size += value_range['size']
+
+            logging.info("Sending " + str(len(self.values)) + " ranges (" + str(self.cells_count) + \
+                " cells) to google sheets in " + str(len(uploads)) + " requests")
+
+            if len(uploads) == 1:
+                self.upload(uploads[0])
+            else:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_parallel_uploads) as executor:
+                    for future in [ executor.submit(self.upload, upload) for upload in uploads ]:
+                        future.result()
+
+            self.calls_count += len(uploads)
+            self.values = []
+            self.cells_count = 0
+            self.values_size = 0
+
+        self.time_first_queued = None
+
+        callbacks = self.callbacks
+        self.callbacks = []
+        for callback in callbacks:
+            callback()
+
+
+    def get_http(self):
+        """Returns the http connection to send requests with in the current thread (None for the one of the service)"""
+
+        if threading.current_thread() is threading.main_thread():
+            return None
+
+        if not hasattr(self.thread_local, 'http'):
+            self.thread_local.http = self.create_http()
+        return self.thread_local.http
+
+
+    def upload(self, data):
+        """Sends ranges of values in one spreadsheets().values().batchUpdate"""
+
+        self.execute_request(self.service_sheets.spreadsheets().values().batchUpdate(
+            spreadsheetId=self.spreadsheet_id, body={ 'valueInputOption': "RAW", 'data': data }), self.get_http())
+
+
+
+
+class Endpoint_http_error(SPARQLExceptions.SPARQLWrapperException):
+    """Raised for HTTP errors of an endpoint for which SPARQLWrapper has no exception of its own (e.g. 429, 503).
+    Keeps the status code and the value of a 'Retry-After' header (or None)."""
+
+    def __init__(self, code, response, retry_after=None):
+
+        self.code = code
+        self.retry_after = retry_after
+        self.msg = "HTTP Error code " + str(code)
+        super().__init__(response)
+
+
+    @classmethod
+    def from_http_error(cls, http_error):
+        """Creates an Endpoint_http_error from an urllib HTTPError, as raised by SPARQLWrapper"""
+
+        try:
+            response = http_error.read()
+        except Exception:
+            response = None
+
+        return cls(http_error.code, response, http_error.headers.get('Retry-After'))
+
+
+
+
+class Endpoint_connection_error(SPARQLExceptions.SPARQLWrapperException):
+    """Raised if the endpoint could not be reached or did not respond within the timeout of a query"""
+
+    def __init__(self, response=None):
+
+        self.msg = "Connection error or timeout"
+        super().__init__(response)
+
+
+
+
+class Rate_limiter:
+    """The Rate_limiter Class is a token bucket allowing a number of requests per interval (in seconds).
+    acquire() only blocks if there are no tokens left, tokens are refilled continuously over the interval.
+    A limit of None means no limit, but a rate limiter can always be paused, e.g. after a HTTP 429 response."""
+
+    # how often a request is tried again after HTTP 429 responses
+    max_retries = 5
+
+    # how many seconds to pause after a HTTP 429 response without 'Retry-After' header
+    default_retry_after = 5
+
+    def __init__(self, name, limit):
+
+        self.name = name
+        self.lock = threading.Lock()
+        self.paused_until = 0
+
+        if limit is None:
+            self.capacity = None
+        else:
+            self.capacity = limit['requests']
+            self.tokens = float(limit['requests'])
+            self.refill_rate = limit['requests'] / limit['interval']
+            self.refilled_at = time.monotonic()
+
+
+    def acquire(self):
+        """Takes a token, waits until there is one if the bucket is empty (or the rate limiter is paused)"""
+
+        while True:
+
+            with self.lock:
+
+                now = time.monotonic()
+                wait = self.paused_until - now
+
+                if wait <= 0:
+
+                    if self.capacity is None:
+                        return
+
+                    self.tokens = min(self.capacity, self.tokens + (now - self.refilled_at) * self.refill_rate)
+                    self.refilled_at = now
+
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+
+                    wait = (1 - self.tokens) / self.refill_rate
+
+            logging.info("Rate limit for " + self.name + " reached; waiting for " + str(wait) + " seconds.")
+            time.sleep(wait)
+
+
+    def pause_after_too_many_requests(self, retry_after):
+        """Pauses the rate limiter for as many seconds as given in the 'Retry-After' header of a HTTP 429 response"""
+
+        seconds = self.parse_retry_after(retry_after)
+
+        message = "Too many requests to " + self.name + "; pausing for " + str(seconds) + " seconds."
+        logging.info(message)
+        print(message)
+
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            if self.capacity is not None:
+                self.tokens = 0
+
+
+    def parse_retry_after(self, retry_after):
+        """Returns the seconds to wait, given as number or as HTTP date in a 'Retry-After' header"""
+
+        if retry_after is None:
+            return self.default_retry_after
+
+        try:
+            return max(float(retry_after), 0)
+        except ValueError:
+            pass
+
+        try:
+            return max(email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return self.default_retry_after
+
+
+
+
+class Sparql_http_client:
+    """The Sparql_http_client Class is an asyncio based alternative to SPARQLWrapper for executing queries.
+
+    It keeps a pool of keep-alive connections per endpoint, so that not every query needs to set up a new
+    TCP / TLS connection. The event loop runs in a background thread, so that the synchronous 'execute_query'
+    can be called from anywhere (also from several threads at once) as a drop-in replacement for the
+    SPARQLWrapper-based execution, while 'execute_query_async' can be awaited natively."""
+
+    # mime types to ask for in the accept header, for each of the supported return formats
+    accept_headers = {
+        CSV: "text/csv",
+        TSV: "text/tab-separated-values",
+        JSON: "application/sparql-results+json",
+        XML: "application/sparql-results+xml",
+    }
+
+    # queries longer than this are sent via POST instead of GET, to prevent too long URIs
+    max_get_query_length = 2000
+
+    # redirects of the endpoint are followed (with the same request, so that the query is not lost) up to this many times
+    redirect_status_codes = (301, 302, 303, 307, 308)
+    max_redirects = 5
+
+    # size of chunks in bytes, in which response bodies are read
+    stream_chunk_size = 1024 * 1024
+
+    def __init__(self):
+
+        self.loop = None
+        self.loop_thread = None
+        self.loop_lock = threading.Lock()
+
+        # dictionary of pools, keyed by (scheme, host, port); only accessed from within the event loop
+        self.pools = {}
+
+
+    def get_loop(self):
+        """Returns the event loop running in the background thread, starts it if not running yet"""
+
+        with self.loop_lock:
+
+            if self.loop is None:
+
+                self.loop = asyncio.new_event_loop()
+                self.loop_thread = threading.Thread(
+                    target=self.loop.run_forever, name="querPy-http-client", daemon=True)
+                self.loop_thread.start()
+
+            return self.loop
+
+
+    def execute_query(self, query_string, endpoint, results_format, max_connections, timeout=0, stage_durations=None):
+        """Executes a query provided as string and returns the results in the asked-for format, converted the same
+        way as SPARQLWrapper would. Also returns duration of execution. If a dictionary stage_durations is given, the
+        durations of connecting, waiting for the first byte and downloading are recorded in it (see 'send')"""
+
+        future = asyncio.run_coroutine_threadsafe(
+            self.execute_query_async(query_string, endpoint, results_format, max_connections, timeout, stage_durations),
+            self.get_loop())
+
+        return self.get_result(future)
+
+
+    def execute_query_to_file(
+            self, query_string, endpoint, results_format, max_connections, file_path, timeout=0, stage_durations=None):
+        """Executes a query and writes the response body in chunks directly into a file, without keeping it in memory.
+        Returns duration of execution"""
+
+        future = asyncio.run_coroutine_threadsafe(
+            self.execute_query_to_file_async(
+                query_string, endpoint, results_format, max_connections, file_path, timeout, stage_durations),
+            self.get_loop())
+
+        return self.get_result(future)
+
+
+    def get_result(self, future):
+        """Waits for the result of a request, timeouts and failed connections are raised as Endpoint_connection_error"""
+
+        try:
+            return future.result()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError) as ex:
+            raise Endpoint_connection_error(str(ex) or type(ex).__name__)
+
+
+    async def execute_query_to_file_async(
+            self, query_string, endpoint, results_format, max_connections, file_path, timeout=0, stage_durations=None):
+        """Coroutine executing a query and writing the response body in chunks into a file.
+        Returns duration of execution"""
+
+        startTime = time.time()
+        with file_path.open('wb') as fw:
+            status, headers, body = await self.request_with_timeout(
+                query_string, endpoint, results_format, max_connections, timeout, fw.write, stage_durations)
+        if not 200 <= status < 300:
+            self.convert(status, headers, body, results_format)
+        execution_duration = time.time() - startTime
+
+        return execution_duration
+
+
+    async def execute_query_async(
+            self, query_string, endpoint, results_format, max_connections, timeout=0, stage_durations=None):
+        """Coroutine executing a query using a pooled connection to the endpoint.
+        Returns the converted results and the duration of execution"""
+
+        startTime = time.time()
+        status, headers, body = await self.request_with_timeout(
+            query_string, endpoint, results_format, max_connections, timeout, None, stage_durations)
+        results = self.convert(status, headers, body, results_format)
+        execution_duration = time.time() - startTime
+
+        return results, execution_duration
+
+
+    async def request_with_timeout(
+            self, query_string, endpoint, results_format, max_connections, timeout, sink=None, stage_durations=None):
+        """Sends a query (see 'request'), cancels it if no complete response arrived within timeout seconds.
+        A timeout of 0 means no timeout"""
+
+        coroutine = self.request(query_string, endpoint, results_format, max_connections, sink, stage_durations)
+
+        if timeout > 0:
+            return await asyncio.wait_for(coroutine, timeout)
+        else:
+            return await coroutine
+
+
+    async def request(self, query_string, endpoint, results_format, max_connections, sink=None, stage_durations=None):
+        """Sends a query to the endpoint (see 'request_once'), following its redirects as SPARQLWrapper does.
+        Returns status, headers and body of the last response."""
+
+        for redirects_count in range(self.max_redirects + 1):
+
+            status, response_headers, response_body = await self.request_once(
+                query_string, endpoint, results_format, max_connections, sink, stage_durations)
+
+            if status not in self.redirect_status_codes or 'location' not in response_headers:
+                break
+
+            endpoint = urllib.parse.urljoin(endpoint, response_headers['location'])
+            logging.info("Endpoint redirected (HTTP status code " + str(status) + ") to: " + endpoint)
+
+        return status, response_headers, response_body
+
+
+    async def request_once(
+            self, query_string, endpoint, results_format, max_connections, sink=None, stage_durations=None):
+        """Sends a query to the endpoint according to the SPARQL 1.1 protocol, returns status, headers and body.
+        If a sink is given, the body is passed to it in chunks instead (see 'send').
+        If a dictionary stage_durations is given, the durations of connecting (including waiting for a free connection
+        of the pool), waiting for the first byte and downloading the response are recorded in it"""
+
+        if stage_durations is None:
+            stage_durations = {}
+
+        url = urllib.parse.urlsplit(endpoint)
+        pool = self.get_pool(url, max_connections)
+
+        # construct request
+        query_parameters = urllib.parse.urlencode({ 'query': query_string })
+        path = url.path if url.path != "" else "/"
+        headers = {
+            'Host': url.netloc,
+            'Accept': self.accept_headers[results_format],
+            'User-Agent': "querPy",
+            'Connection': "keep-alive",
+        }
+        if len(query_parameters) <= self.max_get_query_length:
+            method = "GET"
+            target = path + "?" + (url.query + "&" if url.query != "" else "") + query_parameters
+            body = b""
+        else:
+            method = "POST"
+            target = path + ("?" + url.query if url.query != "" else "")
+            body = query_parameters.encode('utf-8')
+            headers['Content-Type'] = "application/x-www-form-urlencoded"
+            headers['Content-Length'] = str(len(body))
+
+        request = method + " " + target + " HTTP/1.1\r\n"
+        for key, value in headers.items():
+            request += key + ": " + value + "\r\n"
+        request = (request + "\r\n").encode('latin-1') + body
+
+
+        # the size of what was passed to the sink, since a response whose body was passed to it partly already can not
+        # be tried again (the sink can not take back what it got)
+        sink_size = 0
+        if sink is not None:
+            sink_given = sink
+
+            def sink(chunk):
+                nonlocal sink_size
+                sink_size += len(chunk)
+                sink_given(chunk)
+
+
+        # send request over a pooled connection. If a reused connection was closed by the server in the meantime,
+        # then try once again over a fresh connection
+
+        startTime = time.time()
+
+        async with pool.semaphore:
+
+            connection, is_reused = await pool.acquire()
+            stage_durations['connect'] = time.time() - startTime
+            try:
+                response = await self.send(connection, request, method, sink, stage_durations)
+            except (ConnectionError, asyncio.IncompleteReadError) as ex:
+                pool.discard(connection)
+                if not is_reused or sink_size > 0:
+                    raise
+                logging.info("Pooled connection to " + url.netloc + " was closed (" + str(ex) + "); reconnecting.")
+                startTime = time.time()
+                connection = await pool.open()
+                stage_durations['connect'] += time.time() - startTime
+                try:
+                    response = await self.send(connection, request, method, sink, stage_durations)
+                except BaseException:
+                    pool.discard(connection)
+                    raise
+            except BaseException:
+                pool.discard(connection)
+                raise
+
+            status, response_headers, response_body, keep_alive = response
+            if keep_alive:
+                pool.release(connection)
+            else:
+                pool.discard(connection)
+
+        return status, response_headers, response_body
+
+
+    async def send(self, connection, request, method, sink=None, stage_durations=None):
+        """Writes a request to a connection and reads the response of it.
+        Returns status, headers, body and whether the connection can be reused afterwards.
+        If a dictionary stage_durations is given, the time until the status line arrived is recorded in it as
+        'first_byte', the time reading the rest of the response as 'download'"""
+
+        if stage_durations is None:
+            stage_durations = {}
+
+        startTime = time.time()
+
+        reader, writer = connection
+        writer.write(request)
+        await writer.drain()
+
+        # status line and headers
+        status_line = await reader.readline()
+        stage_durations['first_byte'] = time.time() - startTime
+        startTime = time.time()
+        if status_line == b"":
+            raise ConnectionResetError("Connection closed by endpoint before response")
+        status_match = re.match(rb"HTTP/\d(?:\.\d)? +(\d{3})(?: |\r?\n|$)", status_line)
+        if status_match is None:
+            raise Endpoint_connection_error(
+                "Invalid status line in response of endpoint: " + status_line[:100].decode('latin-1').strip())
+        status = int(status_match.group(1))
+
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode('latin-1').partition(":")
+            response_headers[key.strip().lower()] = value.strip()
+
+        keep_alive = response_headers.get('connection', "").lower() != "close" and \
+            not status_line.startswith(b"HTTP/1.0")
+
+        # body, either chunked, with known length, or until the connection is closed.
+        # If a sink is given, the body of a successful response is passed to it in chunks instead of being returned
+        # (note that the sink is called within the event loop, thus should not block for long)
+
+        chunks = []
+        if sink is None or not 200 <= status < 300:
+            sink = chunks.append
+
+        if method == "HEAD" or status in (204, 304):
+            pass
+        elif "chunked" in response_headers.get('transfer-encoding', "").lower():
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0].strip(), 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                while size > 0:
+                    chunk = await reader.readexactly(min(size, self.stream_chunk_size))
+                    sink(chunk)
+                    size -= len(chunk)
+                await reader.readline()
+        elif 'content-length' in response_headers:
+            size = int(response_headers['content-length'])
+            while size > 0:
+                chunk = await reader.readexactly(min(size, self.stream_chunk_size))
+                sink(chunk)
+                size -= len(chunk)
+        else:
+            while True:
+                chunk = await reader.read(self.stream_chunk_size)
+                if chunk == b"":
+                    break
+                sink(chunk)
+            keep_alive = False
+
+        stage_durations['download'] = time.time() - startTime
+
+        return status, response_headers, b"".join(chunks), keep_alive
+
+
+    def convert(self, status, headers, body, results_format):
+        """Raises the same exceptions as SPARQLWrapper for erroneous status codes (any status other than 2xx, e.g. also
+        redirects which were not followed), otherwise returns the body as raw bytes (see send_query)"""
+
+        if not 200 <= status < 300:
+
+            message = body.decode('utf-8', errors='replace')
+            if status == 400:
+                raise SPARQLExceptions.QueryBadFormed(message)
+            elif status == 401:
+                raise SPARQLExceptions.Unauthorized(message)
+            elif status == 404:
+                raise SPARQLExceptions.EndPointNotFound(message)
+            elif status == 414:
+                raise SPARQLExceptions.URITooLong(message)
+            elif status == 500:
+                raise SPARQLExceptions.EndPointInternalError(message)
+            else:
+                raise Endpoint_http_error(status, message, headers.get('retry-after'))
+
+        return body
+
+
+    def get_pool(self, url, max_connections):
+        """Returns the connection pool for the given endpoint url, creates it if not existing yet"""
+
+        port = url.port
+        if port is None:
+            port = 443 if url.scheme == "https" else 80
+        key = (url.scheme, url.hostname, port)
+
+        if key not in self.pools:
+            logging.info(
+                "Creating connection pool with " + str(max_connections) + " connections to " + url.netloc)
+            self.pools[key] = Sparql_connection_pool(url.scheme, url.hostname, port, max_connections)
+
+        return self.pools[key]
+
+
+    def close(self):
+        """Closes all pooled connections and stops the event loop"""
+
+        with self.loop_lock:
+
+            if self.loop is not None:
+
+                async def close_pools():
+                    for pool in self.pools.values():
+                        pool.close()
+                    self.pools = {}
+
+                asyncio.run_coroutine_threadsafe(close_pools(), self.loop).result()
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.loop_thread.join()
+                self.loop.close()
+                self.loop = None
+                self.loop_thread = None
+
+
+
+
+class Sparql_connection_pool:
+    """Keep-alive connections to one endpoint (scheme, host, port), used by the Sparql_http_client.
+    The semaphore limits how many connections are in use at the same time."""
+
+    def __init__(self, scheme, host, port, max_connections):
+
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.semaphore = asyncio.Semaphore(max_connections)
+        self.idle_connections = collections.deque()
+
+
+    async def acquire(self):
+        """Returns an idle connection if there is one still open, otherwise opens a new one.
+        Also returns whether the connection is reused."""
+
+        while len(self.idle_connections) > 0:
+            reader, writer = self.idle_connections.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return (reader, writer), True
+            writer.close()
+
+        return await self.open(), False
+
+
+    async def open(self):
+        """Opens a new connection"""
+
+        if self.scheme == "https":
+            return await asyncio.open_connection(
+                self.host, self.port, ssl=ssl.create_default_context(), server_hostname=self.host)
+        else:
+            return await asyncio.open_connection(self.host, self.port)
+
+
+    def release(self, connection):
+        """Puts a connection back to the idle ones"""
+
+        self.idle_connections.append(connection)
+
+
+    def discard(self, connection):
+        """Closes a connection which can not be reused"""
+
+        reader, writer = connection
+        writer.close()
+
+
+    def close(self):
+        """Closes all idle connections"""
+
+        while len(self.idle_connections) > 0:
+            self.discard(self.idle_connections.pop())
+
+
+sparql_http_client = Sparql_http_client()
+
+
+
+
+class Result_cache:
+    """The Result_cache Class persists results of queries on disk, so that queries whose results rarely change do not
+    need to be sent to the endpoint again on every run.
+
+    Entries are keyed by a hash of the endpoint, the scrubbed query text and the return format. Each entry consists of
+    a data file holding the results and a json file holding its metadata. Entries older than max_age seconds are
+    ignored and deleted, and if the cache grows beyond max_size bytes, the least recently used entries are deleted.
+
+    mode can be 'use' (read from and write to cache), 'refresh' (only write to cache) or 'bypass' (ignore cache)."""
+
+    def __init__(self, folder, max_age, max_size, mode):
+
+        self.folder = Path(folder)
+        self.max_age = max_age
+        self.max_size = max_size
+        self.mode = mode
+        self.lock = threading.Lock()
+
+        if self.is_enabled():
+            self.folder.mkdir(parents=True, exist_ok=True)
+
+
+    def is_enabled(self):
+        return self.max_age > 0 and self.mode != "bypass"
+
+
+    def get_key(self, query_string, endpoint, results_format):
+        """Returns the hash of endpoint, query and format used as file name of a cache entry"""
+
+        key = endpoint + "\n" + query_string + "\n" + results_format
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+    def get(self, query_string, endpoint, results_format):
+        """Returns results, execution duration and timestamp of a cached entry,
+        or None if there is no valid entry or the cache is not to be read from"""
+
+        if not self.is_enabled() or self.mode == "refresh":
+            return None
+
+        key = self.get_key(query_string, endpoint, results_format)
+        file_metadata = self.folder / (key + ".json")
+        file_data = self.folder / (key + ".data")
+
+        try:
+
+            with file_metadata.open('r') as fr:
+                metadata = json.load(fr)
+
+            if time.time() - metadata['timestamp'] > self.max_age:
+                logging.info("Found outdated entry in cache; deleting it.")
+                self.delete(key)
+                return None
+
+            results = file_data.read_bytes()
+
+            # update time of last access, used for evicting the least recently used entries
+            os.utime(str(file_data))
+
+        except (OSError, ValueError, KeyError) as ex:
+            logging.info("No valid entry found in cache: " + str(ex))
+            return None
+
+        logging.info("Found entry in cache from: " + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(metadata['timestamp'])))
+
+        return results, metadata['execution_duration'], metadata['timestamp']
+
+
+    def put(self, query_string, endpoint, results_format, results, execution_duration):
+        """Saves results of a query in the cache, then evicts entries if the cache became too large"""
+
+        if not self.is_enabled():
+            return
+
+        key = self.get_key(query_string, endpoint, results_format)
+        data = results
+        metadata = {
+            'endpoint': endpoint,
+            'query': query_string,
+            'format': results_format,
+            'timestamp': time.time(),
+            'execution_duration': execution_duration,
+            'size': len(data),
+        }
+
+        # write to temporary files first and rename them afterwards, so that no half written entries can be read
+        self.write_atomically(self.folder / (key + ".data"), data)
+        self.write_atomically(self.folder / (key + ".json"), json.dumps(metadata).encode('utf-8'))
+
+        self.evict()
+
+
+    def write_atomically(self, path, data):
+
+        path_tmp = path.with_name(path.name + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp")
+        with path_tmp.open('wb') as fw:
+            fw.write(data)
+        os.replace(str(path_tmp), str(path))
+
+
+    def delete(self, key):
+
+        for suffix in (".data", ".json"):
+            try:
+                (self.folder / (key + suffix)).unlink()
+            except FileNotFoundError:
+                pass
+
+
+    def evict(self):
+        """Deletes the least recently used entries until the cache is not larger than max_size"""
+
+        with self.lock:
+
+            entries = []
+            total_size = 0
+            for file_data in self.folder.glob("*.data"):
+                try:
+                    stat = file_data.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, file_data.stem))
+                total_size += stat.st_size
+
+            entries.sort()
+            for mtime, size, key in entries:
+                if total_size <= self.max_size:
+                    break
+                logging.info("Evicting entry from cache: " + key)
+                self.delete(key)
+                total_size -= size
+
+
+
+
+
+
+class Triple_count_cache:
+    """The Triple_count_cache Class keeps the counts of all triples per endpoint, in memory and in a json file,
+    so that this often expensive count is not done again for every multi-value iteration and every run."""
+
+    def __init__(self, file_path):
+
+        self.file_path = Path(file_path)
+        self.counts = None
+        self.lock = threading.Lock()
+
+
+    def load(self):
+        """Reads the counts saved in the json file (only once)"""
+
+        if self.counts is None:
+            try:
+                with self.file_path.open('r') as fr:
+                    self.counts = json.load(fr)
+            except (OSError, ValueError):
+                self.counts = {}
+
+
+    def get(self, endpoint, max_age):
+        """Returns count and timestamp of the count for the endpoint if it is not older than max_age seconds,
+        otherwise None"""
+
+        if max_age <= 0:
+            return None
+
+        with self.lock:
+
+            self.load()
+            if endpoint in self.counts and time.time() - self.counts[endpoint]['timestamp'] <= max_age:
+                logging.info("Reusing count of all triples in endpoint from: " + time.strftime(
+                    '%Y-%m-%d %H:%M:%S', time.localtime(self.counts[endpoint]['timestamp'])))
+                return self.counts[endpoint]['count'], self.counts[endpoint]['timestamp']
+
+        return None
+
+
+    def put(self, endpoint, count):
+        """Saves the count for the endpoint"""
+
+        with self.lock:
+
+            self.load()
+            self.counts[endpoint] = { 'count': count, 'timestamp': time.time() }
+
+            try:
+                self.file_path.parent.mkdir(parents=True, exist_ok=True)
+                file_path_tmp = self.file_path.with_name(self.file_path.name + "." + str(os.getpid()) + ".tmp")
+                with file_path_tmp.open('w') as fw:
+                    json.dump(self.counts, fw)
+                os.replace(str(file_path_tmp), str(self.file_path))
+            except OSError as ex:
+                logging.error("Could not save count of all triples: " + str(ex))
+
+
+triple_count_cache = Triple_count_cache("querPy_cache/triple_counts.json")
+
+
+
+class Query_collection_loader:
+    """The Query_collection_loader Class loads query collection files as modules (the rest of querPy reads the settings
+    as their attributes), either python files or declarative json, toml or yaml files.
+
+    Python files are compiled into bytecode only once: the bytecode is kept in a folder together with the modification
+    time, size and hash of the source it was compiled from. If modification time and size are the same, the bytecode
+    is used without reading the source; otherwise it is still used if the hash of the source is the same.
+    Declarative files are never executed. Their settings are validated in one pass, which reports all invalid or
+    unknown settings at once (the values themselves are validated by Query_collection_data_object as for python files
+    later). Once valid, their parsed content is kept the same way as the bytecode of python files."""
+
+    # version of the files in the folder, part of their header
+    cache_format = 1
+
+    declarative_formats = { ".json": "json", ".toml": "toml", ".yaml": "yaml", ".yml": "yaml" }
+
+    # types of the values of the settings in declarative files, and whether they can be multi values (lists of such
+    # values, see Query_collection_data_object.construct_multi_values)
+    settings_types = {
+        'title': ((str,), True),
+        'description': ((str,), True),
+        'output_destination': ((str,), True),
+        'output_format': ((str,), True),
+        'summary_sample_limit': ((int,), True),
+        'cooldown_between_queries': ((int,), True),
+        'write_empty_results': ((bool,), True),
+        'count_the_results': ((bool,), True),
+        'count_from_downloaded_results': ((bool,), True),
+        'stream_results_to_disk': ((bool,), True),
+        'xlsx_constant_memory': ((bool,), True),
+        'max_parallel_queries': ((int,), True),
+        'pipeline_queue_size': ((int,), True),
+        'max_parallel_iterations': ((int,), False),
+        'max_parallel_pages': ((int,), True),
+        'page_retries': ((int,), True),
+        'max_connections_per_endpoint': ((int,), True),
+        'query_timeout': ((int, float), True),
+        'retry_policy': ((dict, type(None)), True),
+        'endpoint_rate_limit': ((dict, type(None)), True),
+        'google_rate_limit': ((dict, type(None)), True),
+        'cache_max_age': ((int,), True),
+        'cache_max_size': ((int,), True),
+        'count_triples_max_age': ((int,), True),
+        'endpoint': ((str,), True),
+        'queries': ((list,), False),
+    }
+
+    mandatory_settings = [ 'endpoint', 'queries' ]
+
+    query_settings_types = {
+        'title': ((str,), True),
+        'description': ((str,), True),
+        'query': ((str,), True),
+        'page_size': ((int, type(None)), False),
+        'timeout': ((int, float, type(None)), False),
+        'retry_policy': ((dict, type(None)), False),
+        'custom_data_container': ((object,), False),
+    }
+
+    def __init__(self, folder):
+
+        self.folder = Path(folder)
+
+        # content of the files in the folder which were read already (marshalled, so that every module loaded from them
+        # gets objects of its own), by their path; a process loading the same files repeatedly (see '--serve') then
+        # only needs to look at the modification time and size of the source
+        self.loaded = {}
+
+        # files are loaded one at a time, since their modules are registered under the same name (see 'load') and may
+        # be loaded from several threads at once (see '--serve' and '--api')
+        self.lock = threading.Lock()
+
+
+    def load(self, file_path, module_name='conf'):
+        """Returns the query collection file as module (registered as module_name, like a module imported by python)"""
+
+        with self.lock:
+            return self.load_module(file_path, module_name)
+
+
+    def load_module(self, file_path, module_name):
+        """Loads the query collection file as module, see 'load'"""
+
+        file_path = Path(file_path)
+        startTime = time.time()
+
+        declarative_format = self.declarative_formats.get(file_path.suffix.lower())
+
+        if declarative_format is None:
+            code, is_cached = self.get_cached_or_create(file_path, self.compile_source)
+            spec = importlib.util.spec_from_file_location(module_name, str(file_path))
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[module_name] = module
+            exec(code, module.__dict__)
+
+        else:
+            settings, is_cached = self.get_cached_or_create(
+                file_path, lambda source, file_path: self.read_declarative_source(source, file_path, declarative_format))
+            spec = importlib.util.spec_from_loader(module_name, loader=None, origin=str(file_path))
+            module = importlib.util.module_from_spec(spec)
+            module.__file__ = str(file_path)
+            module.__dict__.update(settings)
+            sys.modules[module_name] = module
+
+        logging.info("Loaded query collection file " + str(file_path) + (" (cached)" if is_cached else "") +
+                     " in seconds: " + str(time.time() - startTime))
+
+        return module
+
+
+    def get_cached_or_create(self, file_path, create):
+        """Returns what was created from the source of a file (bytecode or settings) as kept in the folder, if it was
+        created from the same source. Otherwise creates it with create(source, file_path) and keeps it.
+        Also returns whether it was taken from the folder."""
+
+        stat = file_path.stat()
+        cache_path = self.folder / (hashlib.sha256(str(file_path.resolve()).encode('utf-8')).hexdigest()[:16] + ".bin")
+        header = None
+
+        if cache_path in self.loaded:
+            header, content = self.loaded[cache_path]
+            if header['mtime'] == stat.st_mtime_ns and header['size'] == stat.st_size:
+                return marshal.loads(content), True
+
+        try:
+            with cache_path.open('rb') as fr:
+                header, content = marshal.load(fr)
+        except (OSError, EOFError, ValueError, TypeError):
+            header = None
+
+        is_valid_header = header is not None and \
+            header['format'] == self.cache_format and header['magic'] == importlib.util.MAGIC_NUMBER
+
+        if is_valid_header and header['mtime'] == stat.st_mtime_ns and header['size'] == stat.st_size:
+            self.loaded[cache_path] = (header, marshal.dumps(content))
+            return content, True
+
+        source = file_path.read_bytes()
+        source_hash = hashlib.sha256(source).hexdigest()
+
+        if not (is_valid_header and header['hash'] == source_hash):
+            content = create(source, file_path)
+
+        header = {
+            'format': self.cache_format,
+            'magic': importlib.util.MAGIC_NUMBER,
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'hash': source_hash,
+        }
+
+        try:
+            self.loaded[cache_path] = (header, marshal.dumps(content))
+            self.folder.mkdir(parents=True, exist_ok=True)
+            cache_path_tmp = cache_path.with_name(
+                cache_path.name + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp")
+            with cache_path_tmp.open('wb') as fw:
+                marshal.dump((header, content), fw)
+            os.replace(str(cache_path_tmp), str(cache_path))
+        except (OSError, ValueError) as ex:
+            # e.g. dates in toml files can not be kept
+            logging.info("Could not keep loaded query collection file: " + str(ex))
+
+        return content, False
+
+
+    def compile_source(self, source, file_path):
+        """Compiles the source of a python query collection file into bytecode"""
+
+        return compile(source, str(file_path), 'exec', dont_inherit=True)
+
+
+    def read_declarative_source(self, source, file_path, declarative_format):
+        """Parses the source of a declarative query collection file and validates its settings, returns them as
+        dictionary. Exits with all errors found, if any."""
+
+        try:
+            if declarative_format == "json":
+                settings = json.loads(source.decode('utf-8'))
+
+            elif declarative_format == "toml":
+                try:
+                    import tomllib
+                except ImportError:
+                    import tomli as tomllib
+                settings = tomllib.loads(source.decode('utf-8'))
+
+            else:
+                import yaml
+                settings = yaml.safe_load(source)
+
+        except ImportError as ex:
+            message = "\nERROR: Reading " + declarative_format + " files requires a further package (" + \
+                      ("tomli, or python 3.11" if declarative_format == "toml" else "pyyaml") + "): " + str(ex)
+            logging.error(message)
+            sys.exit(message)
+
+        except ValueError as ex:
+            # json, toml and yaml all raise subclasses of ValueError, or of yaml's own error class
+            settings = ex
+        except Exception as ex:
+            if type(ex).__module__.split(".")[0] != "yaml":
+                raise
+            settings = ex
+
+        if isinstance(settings, Exception):
+            message = "\nERROR: INVALID INPUT! Could not parse query collection file " + str(file_path) + ":\n" + \
+                      str(settings)
+            logging.error(message)
+            sys.exit(message)
+
+        errors = self.validate_settings(settings)
+
+        if len(errors) > 0:
+            message = "\nERROR: INVALID INPUT! Found " + str(len(errors)) + " errors in query collection file " + \
+                      str(file_path) + ":\n" + "\n".join(errors)
+            logging.error(message)
+            sys.exit(message)
+
+        return settings
+
+
+    def validate_settings(self, settings):
+        """Returns a list of all errors found in the settings of a declarative query collection file"""
+
+        if type(settings) is not dict:
+            return [ "Expected the settings as a mapping of names to values, found: " + type(settings).__name__ ]
+
+        errors = []
+
+        for name in self.mandatory_settings:
+            if name not in settings:
+                errors.append("Missing mandatory setting: " + name)
+
+        errors.extend(self.get_type_errors(settings, self.settings_types, ""))
+
+        if type(settings.get('queries')) is list:
+
+            for i, query in enumerate(settings['queries']):
+
+                location = "queries[" + str(i) + "]"
+
+                if type(query) is not dict:
+                    errors.append(location + ": expected a mapping of names to values, found: " + type(query).__name__)
+                    continue
+
+                if 'query' not in query:
+                    errors.append(location + ": missing mandatory setting: query")
+
+                errors.extend(self.get_type_errors(query, self.query_settings_types, location + "."))
+
+        return errors
+
+
+    def get_type_errors(self, settings, settings_types, location):
+        """Returns a list of the settings which are unknown or whose values are not of the expected types"""
+
+        errors = []
+
+        for name, value in settings.items():
+
+            if name not in settings_types:
+                if name in ("custom_post_processing", "custom_meta_function"):
+                    errors.append(location + name + ": functions are only possible in python query collection files")
+                else:
+                    errors.append(location + name + ": unknown setting")
+                continue
+
+            types, is_multi_value = settings_types[name]
+
+            if is_multi_value and type(value) is list:
+                values = self.flatten_multi_values(value)
+            else:
+                values = [ value ]
+
+            for element in values:
+                # bool is not accepted where int is expected (as in Query_collection_data_object)
+                if not isinstance(element, types) or (type(element) is bool and bool not in types and object not in types):
+                    errors.append(location + name + ": expected " + " or ".join(
+                        "null" if t is type(None) else t.__name__ for t in types) +
+                        (" (or a list of multi values)" if is_multi_value else "") +
+                        ", found " + type(element).__name__ + ": " + str(element))
+
+        return errors
+
+
+    def flatten_multi_values(self, values):
+        """Returns the values of a multi-value list, including those in its sub lists"""
+
+        flattened_values = []
+        for value in values:
+            if type(value) is list:
+                flattened_values.extend(self.flatten_multi_values(value))
+            else:
+                flattened_values.append(value)
+
+        return flattened_values
+
+
+query_collection_loader = Query_collection_loader("querPy_cache/collections")
+
+
+
+class Checkpoint_journal:
+    """The Checkpoint_journal Class records the progress of running a query collection in a json file, so that an
+    interrupted run can be resumed (with '--resume') instead of starting over.
+
+    For every multi-value iteration, the journal holds where its output was written to and, for every query which
+    completed, its id, a hash of its query text, where its results are and what was written about it into the
+    summary. On resume, completed queries are restored from the journal instead of being executed again, and their
+    summaries are written again into the reopened output. Since xlsx files can not be appended to, the results of
+    queries written into a xlsx file (or into google sheets) are additionally kept next to the journal, written row by
+    row as json lines (dates and datetimes encoded so that they are restored as such, see 'encode_value').
+
+    The journal of the previous run also serves as manifest for an incremental run (with '--incremental'): every
+    query is recorded with a fingerprint of what determines its results, and queries whose fingerprint did not
+    change are reused from the previous run instead of being executed again.
+
+    The journal of every multi-value iteration is kept in a file of its own (in a folder next to the journal, one per
+    run), so that iterations can be run in separate processes. Every change is appended to it as a json line (e.g.
+    when a query was completed), which is flushed right away; a line left incomplete by an interruption is ignored.
+    Once the iteration is completed, the file is replaced by one line holding its whole journal.
+
+    Journals are only kept if enabled (see '--checkpoint'; resuming and incremental runs enable it, too). Otherwise
+    nothing is written, so that runs which are never resumed are not slowed down by it."""
+
+    def __init__(self, file_path, is_enabled=True):
+
+        self.file_path = Path(file_path)
+        self.is_enabled = is_enabled
+        self.folder_results = self.file_path.with_suffix("")
+        self.lock = threading.Lock()
+        self.data = None
+        self.iteration = None
+        self.iteration_file_path = None
+
+        # entries of the previous run by their fingerprints, if run incrementally
+        self.previous_queries = {}
+
+
+    @classmethod
+    def for_query_collection(cls, query_collection_filename, is_enabled=True):
+        """Returns the journal of a query collection file, located in the folder 'querPy_checkpoints'"""
+
+        path = Path(query_collection_filename).resolve()
+        key = hashlib.sha256(str(path).encode('utf-8')).hexdigest()[:12]
+
+        return cls(Path("querPy_checkpoints") / (path.stem + "_" + key + ".json"), is_enabled)
+
+
+    def start(self, query_collection_filename, timestamp_start, incremental=False):
+        """Starts a new journal, replacing any earlier one of the query collection.
+        If incremental, the queries of the earlier one are kept to be reused (see 'get_unchanged_query')"""
+
+        if incremental and self.load():
+            for iteration_file_path in (self.folder_results / self.timestamp_start).glob("*.jsonl"):
+                iteration = self.load_iteration(iteration_file_path)
+                if iteration is None:
+                    continue
+                for entry in iteration['queries'].values():
+                    if 'fingerprint' in entry and entry['error_message'] is None:
+                        self.previous_queries[entry['fingerprint']] = entry
+
+            message = "Found " + str(len(self.previous_queries)) + " results of the previous run from " + \
+                      self.timestamp_start + " to be reused if their queries did not change."
+            logging.info(message)
+            print(message)
+
+        self.data = {
+            'query_collection_filename': query_collection_filename,
+            'timestamp_start': timestamp_start,
+        }
+
+        if not self.is_enabled:
+            return
+
+        self.save(self.file_path, self.data)
+
+        # journals of iterations of an earlier run started in the same second must not be taken for the ones of this
+        # run (the results kept for that run are left, since they may be reused if running incrementally)
+        for iteration_file_path in (self.folder_results / timestamp_start).glob("*.jsonl"):
+            iteration_file_path.unlink()
+
+
+    def clean_up(self):
+        """Deletes the results kept for earlier runs, once they are not needed anymore"""
+
+        if self.is_enabled and self.folder_results.is_dir():
+            for folder in self.folder_results.iterdir():
+                if folder.name != self.timestamp_start:
+                    shutil.rmtree(str(folder), ignore_errors=True)
+
+
+    def load(self):
+        """Reads the journal of an earlier run, returns False if there is none"""
+
+        try:
+            with self.file_path.open('r') as fr:
+                self.data = json.load(fr)
+            return True
+        except (OSError, ValueError) as ex:
+            logging.info("No valid checkpoint journal found: " + str(ex))
+            return False
+
+
+    @property
+    def timestamp_start(self):
+        return self.data['timestamp_start']
+
+
+    def start_iteration(self, multi_value_index, resume):
+        """Selects the journal of a multi-value iteration: the one of the interrupted run if it is resumed, otherwise a
+        new one. Returns False if this iteration was completed already by the interrupted run"""
+
+        self.iteration_file_path = self.folder_results / self.timestamp_start / (str(multi_value_index) + ".jsonl")
+        self.iteration = None
+
+        if resume:
+            self.iteration = self.load_iteration(self.iteration_file_path)
+
+        if self.iteration is None:
+            self.iteration = {
+                'complete': False,
+                'output_location': None,
+                'queries': {},
+            }
+            self.save_iteration()
+
+        return not self.iteration['complete']
+
+
+    def complete_iteration(self):
+
+        self.iteration['complete'] = True
+        self.save_iteration()
+
+
+    def load_iteration(self, iteration_file_path):
+        """Reads the journal of a multi-value iteration: its first line, with all changes of the following lines
+        applied to it (see 'append_to_iteration'). Returns None if there is none."""
+
+        iteration = None
+
+        try:
+            with iteration_file_path.open('r', encoding='utf-8') as fr:
+                for line in fr:
+                    try:
+                        record = json.loads(line, object_hook=self.decode_value)
+                    except ValueError:
+                        # the last line is incomplete, if querPy was interrupted while appending it
+                        break
+                    if iteration is None:
+                        iteration = record
+                    else:
+                        self.apply_to_iteration(iteration, record)
+        except OSError:
+            return None
+
+        return iteration
+
+
+    def apply_to_iteration(self, iteration, record):
+
+        for key, value in record.items():
+            if key == 'queries':
+                iteration['queries'].update(value)
+            else:
+                iteration[key] = value
+
+
+    def append_to_iteration(self, record):
+        """Applies a change to the journal of the current multi-value iteration, and appends it to its file"""
+
+        self.apply_to_iteration(self.iteration, record)
+
+        if not self.is_enabled:
+            return
+
+        with self.lock:
+            with self.iteration_file_path.open('a', encoding='utf-8') as fw:
+                fw.write(json.dumps(record, default=self.encode_value) + "\n")
+
+
+    def get_output_location(self):
+        """Returns where the output of the current iteration was written to by an earlier run, otherwise None"""
+
+        return self.iteration['output_location']
+
+
+    def set_output_location(self, output_location):
+
+        self.append_to_iteration({ 'output_location': output_location })
+
+
+    def get_query_hash(self, query_data_object):
+
+        return hashlib.sha256(query_data_object.query.encode('utf-8')).hexdigest()
+
+
+    def get_fingerprint(self, query_data_object):
+        """Returns a hash of everything determining the results of a query: its scrubbed text, the endpoint,
+        the output format and the index of the current multi-value iteration"""
+
+        query_collection_data_object = query_data_object._query_collection_data_object
+        key = \
+            query_data_object.query + "\n" + \
+            query_collection_data_object.endpoint + "\n" + \
+            query_collection_data_object.output_format + "\n" + \
+            str(query_collection_data_object._current_multi_value)
+
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+    def get_unchanged_query(self, query_data_object, output_destination_type):
+        """Returns the journal entry of the previous run for a query whose fingerprint did not change, if its results
+        can still be reused for the output destination, otherwise None"""
+
+        entry = self.previous_queries.get(self.get_fingerprint(query_data_object))
+
+        if entry is None:
+            return None
+
+        if output_destination_type == 'local_folder':
+            if entry['results_location'] is None or not Path(entry['results_location']).is_file():
+                return None
+        elif entry['results_file_json'] is None or not Path(entry['results_file_json']).is_file():
+            return None
+
+        return entry
+
+
+    def get_completed_query(self, query_data_object):
+        """Returns the journal entry of a query if it was completed by an earlier run with the same query text"""
+
+        entry = self.iteration['queries'].get(str(query_data_object.id))
+
+        if entry is None or entry['query_hash'] != self.get_query_hash(query_data_object):
+            return None
+
+        if entry['results_file_json'] is not None and not Path(entry['results_file_json']).is_file():
+            return None
+
+        return entry
+
+
+    def record_query(self, query_data_object, output_writer):
+        """Records a query which was completed and written into the output"""
+
+        if not self.is_enabled:
+            return
+
+        results_file_json = None
+        results_location = None
+
+        if query_data_object.results_raw is not None:
+
+            if output_writer.output_destination_type == 'local_folder':
+                results_location = str(output_writer.get_local_file_path(query_data_object))
+
+            else:
+                multi_value_index = query_data_object._query_collection_data_object._current_multi_value
+                results_file_json = self.folder_results / self.timestamp_start / str(multi_value_index) / \
+                    (str(query_data_object.id) + ".jsonl")
+                results_file_json.parent.mkdir(parents=True, exist_ok=True)
+                results_matrix = query_data_object.results_matrix
+                self.write_atomically(
+                    results_file_json,
+                    results_matrix.iter_rows() if isinstance(results_matrix, Results_matrix) else results_matrix)
+                results_file_json = str(results_file_json)
+
+                if output_writer.output_destination_type == 'local_xlsx':
+                    results_location = str(output_writer.file_xlsx)
+                else:
+                    results_location = "docs.google.com/spreadsheets/d/" + output_writer.google_sheets_id
+
+        # at least one row besides the header, so that it is known whether the results were empty
+        sample_limit = max(output_writer.summary_sample_limit, 1) + 1
+
+        entry = {
+            'id': query_data_object.id,
+            'query_hash': self.get_query_hash(query_data_object),
+            'fingerprint': self.get_fingerprint(query_data_object),
+            'completed_at': time.time(),
+            'results_location': results_location,
+            'results_file_json': results_file_json,
+            'results_sample': get_result_rows(query_data_object.results_matrix, 0, sample_limit),
+            'results_execution_duration': query_data_object.results_execution_duration,
+            'results_lines_count': query_data_object.results_lines_count,
+            'results_pages_durations': query_data_object.results_pages_durations,
+            'results_cache_timestamp': query_data_object.results_cache_timestamp,
+            'results_attempts': query_data_object.results_attempts,
+            'results_count_attempts': query_data_object.results_count_attempts,
+            'results_retry_duration': query_data_object.results_retry_duration,
+            'results_stage_durations': dict(query_data_object.results_stage_durations),
+            'error_message': query_data_object.error_message,
+        }
+
+        self.append_to_iteration({ 'queries': { str(query_data_object.id): entry } })
+
+
+    def restore_query(self, query_data_object, entry, reused=False):
+        """Sets the results of a query as recorded in its journal entry. results_raw then holds the location of the
+        results, and results_matrix all results if they were kept next to the journal, otherwise only a sample.
+        reused is set for results of the previous run, which still need to be written into the new output."""
+
+        query_data_object.results_restored = True
+        query_data_object.results_reused = reused
+        query_data_object.query_for_count = None
+        query_data_object.results_file = None
+        query_data_object.results_execution_duration = entry['results_execution_duration']
+        query_data_object.results_lines_count = entry['results_lines_count']
+        query_data_object.results_pages_durations = entry['results_pages_durations']
+        query_data_object.results_cache_timestamp = entry['results_cache_timestamp']
+        query_data_object.results_attempts = entry['results_attempts']
+        query_data_object.results_count_attempts = entry.get('results_count_attempts', 0)
+        query_data_object.results_retry_duration = entry['results_retry_duration']
+        query_data_object.results_stage_durations = entry.get('results_stage_durations', {})
+        query_data_object.error_message = entry['error_message']
+
+        if entry['error_message'] is not None:
+            query_data_object.results_raw = None
+            query_data_object.results_matrix = entry['results_sample']
+        elif entry['results_file_json'] is not None:
+            query_data_object.results_raw = entry['results_location']
+            with open(entry['results_file_json'], 'r', encoding='utf-8') as fr:
+                query_data_object.results_matrix = Results_matrix.from_typed_rows(
+                    json.loads(line, object_hook=self.decode_value) for line in fr)
+        else:
+            query_data_object.results_raw = entry['results_location']
+            query_data_object.results_matrix = entry['results_sample']
+
+
+    def save_iteration(self):
+        """Replaces the file of the current multi-value iteration with one line holding its whole journal"""
+
+        self.save(self.iteration_file_path, self.iteration)
+
+
+    def save(self, path, data):
+
+        if not self.is_enabled:
+            return
+
+        with self.lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.write_atomically(path, [ data ])
+
+
+    def write_atomically(self, path, records):
+        """Writes records as json lines to a temporary file first, flushed to disk, which then replaces the file"""
+
+        path_tmp = path.with_name(path.name + "." + str(os.getpid()) + ".tmp")
+        with path_tmp.open('w', encoding='utf-8') as fw:
+            for record in records:
+                fw.write(json.dumps(record, default=self.encode_value) + "\n")
+            fw.flush()
+            os.fsync(fw.fileno())
+        os.replace(str(path_tmp), str(path))
+
+
+    @staticmethod
+    def encode_value(value):
+        """Encodes values json has no type for: dates and datetimes so that they are decoded as such again (see
+        'decode_value'), anything else as text"""
+
+        if isinstance(value, datetime.datetime):
+            return { '__datetime__': value.isoformat() }
+        if isinstance(value, datetime.date):
+            return { '__date__': value.isoformat() }
+        return str(value)
+
+
+    @staticmethod
+    def decode_value(value):
+
+        if len(value) == 1:
+            if '__datetime__' in value:
+                return datetime.datetime.fromisoformat(value['__datetime__'])
+            if '__date__' in value:
+                return datetime.date.fromisoformat(value['__date__'])
+        return value
+
+
+
+
+class Cron_schedule:
+    """The Cron_schedule Class reads a schedule as in a crontab line and computes when it is due next.
+
+    A schedule consists of five fields: minute (0-59), hour (0-23), day of month (1-31), month (1-12) and day of week
+    (0-7, 0 and 7 being sunday), each either '*', a number, a range 'a-b' or a list of those separated by ',', each
+    optionally followed by a step '/n'. Like in cron, if both day fields are restricted, either of them needs to match.
+    Alternatively one of the shortcuts '@hourly', '@daily', '@weekly', '@monthly', '@yearly' can be used."""
+
+    shortcuts = {
+        "@hourly": "0 * * * *",
+        "@daily": "0 0 * * *",
+        "@midnight": "0 0 * * *",
+        "@weekly": "0 0 * * 0",
+        "@monthly": "0 0 1 * *",
+        "@yearly": "0 0 1 1 *",
+        "@annually": "0 0 1 1 *",
+    }
+
+    # names and ranges of the fields
+    fields = [ ("minute", 0, 59), ("hour", 0, 23), ("day of month", 1, 31), ("month", 1, 12), ("day of week", 0, 7) ]
+
+    def __init__(self, expression):
+
+        self.expression = expression
+        fields = self.shortcuts.get(expression, expression).split()
+
+        if len(fields) != 5:
+            raise ValueError("Expected five fields or a shortcut as schedule, found: " + expression)
+
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self.parse_field(field, *field_range) for field, field_range in zip(fields, self.fields) ]
+
+        self.weekdays = { weekday % 7 for weekday in self.weekdays }
+        self.is_days_restricted = fields[2] != "*"
+        self.is_weekdays_restricted = fields[4] != "*"
+
+        # schedules like '0 0 30 2 *' are never due
+        self.get_next(datetime.datetime(2000, 1, 1))
+
+
+    def parse_field(self, field, name, minimum, maximum):
+        """Returns the set of values a field of the schedule matches"""
+
+        values = set()
+
+        for part in field.split(","):
+
+            try:
+                if "/" in part:
+                    part, step = part.split("/", 1)
+                    step = int(step)
+                else:
+                    step = 1
+
+                if part == "*":
+                    start, end = minimum, maximum
+                elif "-" in part:
+                    start, end = [ int(value) for value in part.split("-", 1) ]
+                else:
+                    start = int(part)
+                    end = maximum if step > 1 else start
+
+            except ValueError:
+                raise ValueError("Invalid " + name + " in schedule: " + field)
+
+            if not minimum <= start <= end <= maximum or step < 1:
+                raise ValueError("Invalid " + name + " in schedule, expected values between " + str(minimum) +
+                                 " and " + str(maximum) + ", found: " + field)
+
+            values.update(range(start, end + 1, step))
+
+        return values
+
+
+    def is_day_matching(self, date):
+        """Returns whether the schedule is due on the day of the given date"""
+
+        # python counts days of the week from monday (0), cron from sunday (0)
+        is_day_matching = date.day in self.days
+        is_weekday_matching = (date.weekday() + 1) % 7 in self.weekdays
+
+        if self.is_days_restricted and self.is_weekdays_restricted:
+            return is_day_matching or is_weekday_matching
+
+        return is_day_matching and is_weekday_matching
+
+
+    def get_next(self, after):
+        """Returns the first (local) time after the given one at which the schedule is due. Skips whole months, days
+        and hours which do not match, instead of looking at every minute."""
+
+        next_time = after.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = next_time + datetime.timedelta(days=366 * 8)
+
+        while next_time < limit:
+
+            if next_time.month not in self.months:
+                next_time = (next_time.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)).replace(day=1)
+
+            elif not self.is_day_matching(next_time):
+                next_time = next_time.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+
+            elif next_time.hour not in self.hours:
+                next_time = next_time.replace(minute=0) + datetime.timedelta(hours=1)
+
+            elif next_time.minute not in self.minutes:
+                next_time = next_time + datetime.timedelta(minutes=1)
+
+            else:
+                return next_time
+
+        raise ValueError("Schedule is never due: " + self.expression)
+
+
+
+class Query_collection_scheduler:
+    """The Query_collection_scheduler Class keeps querPy running (see '--serve') and runs query collection files on
+    schedules, in threads of their own, so that later runs profit from what earlier runs set up already: the pooled
+    connections to endpoints (see Sparql_http_client), the services for the google api (see Output_writer), the loaded
+    query collection files (see Query_collection_loader) and the imported libraries.
+
+    The schedules are read from a file, with a line per query collection file in the form of a crontab line (see
+    Cron_schedule), optionally followed by '--no-cache', '--refresh-cache', '--incremental' or '--report FILE':
+        */15 * * * * collections/daily_counts.py --incremental
+    The file is read again whenever it is changed.
+
+    A query collection file is never run more than once at the same time: if it is due while still running, it is run
+    once more afterwards, no matter how often it was due in the meantime. If it was due while querPy was not running
+    (or was not able to run it in time), it is run once, as soon as possible, instead of for every time it was due."""
+
+    # longest time in seconds to wait before looking at the schedules again, so that changed schedule files and changed
+    # clocks (e.g. after a suspended computer woke up) are noticed
+    max_wait = 60
+
+    def __init__(self, schedule_filename, state_filename, run_settings):
+
+        self.schedule_file = Path(schedule_filename)
+        self.schedule_mtime = None
+        self.state_file = Path(state_filename)
+        self.run_settings = run_settings
+
+        # scheduled runs by their line in the schedule file
+        self.scheduled_runs = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.threads = []
+
+        # when the scheduled runs were last due, by their line, to find out about missed runs after a restart
+        try:
+            with self.state_file.open('r') as fr:
+                self.last_due_times = {
+                    line: datetime.datetime.fromisoformat(last_due_time) for line, last_due_time in json.load(fr).items() }
+        except (OSError, ValueError):
+            self.last_due_times = {}
+
+
+    def serve(self):
+        """Runs the query collection files on their schedules until stopped (by ctrl+c or a SIGTERM signal), then waits
+        for the runs still going on"""
+
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signal_number, frame: self.stop_event.set())
+
+        message = "\n\n################################\n" + \
+                  "Serving schedules of query collection files in: " + str(self.schedule_file)
+        logging.info(message)
+        print(message)
+
+        try:
+            while not self.stop_event.is_set():
+
+                self.load_schedule()
+                now = datetime.datetime.now()
+
+                for line, scheduled_run in self.scheduled_runs.items():
+
+                    if scheduled_run['next_time'] <= now:
+
+                        # however many times it was due since, it is run only once
+                        if scheduled_run['schedule'].get_next(scheduled_run['next_time']) <= now:
+                            message = "Missed schedule of " + scheduled_run['query_collection_filename'] + \
+                                      " since " + str(scheduled_run['next_time']) + ", running it once now"
+                            logging.warning(message)
+                            print(message)
+
+                        self.trigger(scheduled_run)
+                        scheduled_run['next_time'] = scheduled_run['schedule'].get_next(now)
+                        self.last_due_times[line] = now
+                        self.save_state()
+
+                next_time = min([ scheduled_run['next_time'] for scheduled_run in self.scheduled_runs.values() ] +
+                                [ now + datetime.timedelta(seconds=self.max_wait) ])
+                self.stop_event.wait(max(0, min((next_time - datetime.datetime.now()).total_seconds(), self.max_wait)))
+
+        except KeyboardInterrupt:
+            pass
+
+        message = "Stopping, waiting for " + str(sum(1 for thread in self.threads if thread.is_alive())) + \
+                  " runs still going on"
+        logging.info(message)
+        print(message)
+
+        with self.lock:
+            for scheduled_run in self.scheduled_runs.values():
+                scheduled_run['is_pending'] = False
+
+        for thread in self.threads:
+            thread.join()
+
+
+    def load_schedule(self):
+        """Reads the schedule file if it was changed since it was read last. Scheduled runs of lines which are still the
+        same keep their state; lines which can not be read are reported and left out."""
+
+        try:
+            schedule_mtime = self.schedule_file.stat().st_mtime_ns
+            if schedule_mtime == self.schedule_mtime:
+                return
+            lines = self.schedule_file.read_text().splitlines()
+        except OSError as ex:
+            if self.schedule_mtime is None:
+                message = "\nERROR: INVALID INPUT! Could not read schedule file: " + str(ex)
+                logging.error(message)
+                sys.exit(message)
+            logging.error("Could not read schedule file again, keeping the schedules read before: " + str(ex))
+            return
+
+        self.schedule_mtime = schedule_mtime
+        scheduled_runs = {}
+        now = datetime.datetime.now()
+
+        for line_number, line in enumerate(lines, 1):
+
+            line = line.strip()
+            if line == "" or line.startswith("#"):
+                continue
+
+            if line in self.scheduled_runs:
+                scheduled_runs[line] = self.scheduled_runs[line]
+                continue
+
+            try:
+                scheduled_run = self.parse_line(line)
+            except ValueError as ex:
+                message = "Invalid line " + str(line_number) + " in schedule file, leaving it out: " + str(ex)
+                logging.error(message)
+                print(message)
+                continue
+
+            # if it was due while querPy was not running, it is run once right away
+            if line in self.last_due_times and scheduled_run['schedule'].get_next(self.last_due_times[line]) <= now:
+                scheduled_run['next_time'] = scheduled_run['schedule'].get_next(self.last_due_times[line])
+            else:
+                scheduled_run['next_time'] = scheduled_run['schedule'].get_next(now)
+
+            scheduled_runs[line] = scheduled_run
+
+            message = "Scheduled " + scheduled_run['query_collection_filename'] + " (" + \
+                      scheduled_run['schedule'].expression + "), next run at: " + str(scheduled_run['next_time'])
+            logging.info(message)
+            print(message)
+
+        self.scheduled_runs = scheduled_runs
+
+
+    def parse_line(self, line):
+        """Returns the scheduled run described by a line of the schedule file"""
+
+        words = shlex.split(line)
+        schedule_length = 1 if words[0].startswith("@") else 5
+
+        parser = argparse.ArgumentParser(prog="schedule line", add_help=False)
+        parser.add_argument("query_collection_filename")
+        parser.add_argument("--no-cache", action='store_true')
+        parser.add_argument("--refresh-cache", action='store_true')
+        parser.add_argument("--incremental", action='store_true')
+        parser.add_argument("--report")
+
+        # argparse exits on invalid arguments, after printing why
+        try:
+            args = parser.parse_args(words[schedule_length:])
+        except SystemExit:
+            raise ValueError("Invalid query collection file or options: " + line)
+
+        if args.no_cache:
+            cache_mode = "bypass"
+        elif args.refresh_cache:
+            cache_mode = "refresh"
+        else:
+            cache_mode = "use"
+
+        return {
+            'schedule': Cron_schedule(" ".join(words[:schedule_length])),
+            'query_collection_filename': args.query_collection_filename,
+            'report': args.report,
+            'run_settings': dict(self.run_settings, cache_mode=cache_mode, incremental=args.incremental, resume=False),
+            'next_time': None,
+            'is_running': False,
+            'is_pending': False,
+        }
+
+
+    def trigger(self, scheduled_run):
+        """Runs the query collection file of a scheduled run in a new thread, or once more after it, if it is running
+        already"""
+
+        with self.lock:
+
+            if scheduled_run['is_running']:
+                scheduled_run['is_pending'] = True
+                message = scheduled_run['query_collection_filename'] + \
+                          " is due while still running, running it again once it is done"
+                logging.info(message)
+                print(message)
+                return
+
+            scheduled_run['is_running'] = True
+
+        thread = threading.Thread(target=self.run, args=(scheduled_run,),
+                                  name="run " + scheduled_run['query_collection_filename'])
+        self.threads = [ thread for thread in self.threads if thread.is_alive() ] + [ thread ]
+        thread.start()
+
+
+    def run(self, scheduled_run):
+        """Runs the query collection file of a scheduled run, as often as it was triggered while running"""
+
+        while True:
+
+            message = "\n\n################################\n" + \
+                      "Starting scheduled run of: " + scheduled_run['query_collection_filename']
+            logging.info(message)
+            print(message)
+
+            try:
+                query_collection_data_object, iterations_stats, failed_iterations, duration = \
+                    run_query_collection(scheduled_run['query_collection_filename'], scheduled_run['run_settings'])
+
+                if scheduled_run['report']:
+                    write_run_report(scheduled_run['report'], query_collection_data_object, iterations_stats, duration)
+
+                message = "Finished scheduled run of: " + scheduled_run['query_collection_filename'] + \
+                          " (" + str(sum(iteration_stats['errors_count'] for iteration_stats in iterations_stats)) + \
+                          " errors, " + str(len(failed_iterations)) + " failed multi-value iterations, " + \
+                          "duration in seconds: " + str(duration) + ")"
+                logging.info(message)
+                print(message)
+
+            except (Exception, SystemExit) as ex:
+                message = "EXCEPTION OCCURED IN SCHEDULED RUN OF " + scheduled_run['query_collection_filename'] + \
+                          ": " + str(ex) + "\n Continue with the other schedules."
+                logging.error(message)
+                print(message)
+
+            with self.lock:
+                if not scheduled_run['is_pending']:
+                    scheduled_run['is_running'] = False
+                    return
+                scheduled_run['is_pending'] = False
+
+
+    def save_state(self):
+        """Saves when the scheduled runs were last due"""
+
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            state_file_tmp = self.state_file.with_name(self.state_file.name + "." + str(os.getpid()) + ".tmp")
+            with state_file_tmp.open('w') as fw:
+                json.dump({ line: last_due_time.isoformat() for line, last_due_time in self.last_due_times.items() }, fw)
+            os.replace(str(state_file_tmp), str(self.state_file))
+        except OSError as ex:
+            logging.error("Could not save state of schedules: " + str(ex))
+
+
+
+class Query_collection_api:
+    """The Query_collection_api Class keeps querPy running (see '--api') as a local http server, to which query
+    collections can be submitted by other programs. Their runs share what earlier runs set up already (as with
+    '--serve', see Query_collection_scheduler), and their results are served right from the query data objects in
+    memory, instead of having to be read from the output destination.
+
+    POST /runs
+        runs a query collection, given as body in json, toml or yaml (see Query_collection_loader; the format is taken
+        from the content type, or from the parameter 'format'), or as the name of a query collection file in the
+        folder given by '--api-collections' in the parameter 'file' (which may also be a python file, in subfolders of
+        it, but never outside of it). The parameter 'cache_mode' can be 'use'
+        (default), 'refresh' or 'bypass' (see '--refresh-cache' and '--no-cache'). Returns the id of the run.
+    GET /runs
+        lists all runs
+    GET /runs/<run id>
+        returns the state of a run, its queries with results so far, and (once finished) its report (see '--report')
+    GET /runs/<run id>/events
+        streams the progress of a run as server-sent events, from its start on (or from the event after the one in
+        the header 'Last-Event-ID'): run_started, iteration_started, query_executing, query_executed, query_written,
+        iteration_finished and either run_finished or run_failed
+    GET /runs/<run id>/results/<query id>
+        returns the harmonized results of a query, once written, as json (default) or csv (parameter 'format'). The
+        multi-value iteration is chosen with the parameter 'iteration' (default 0). With the parameter 'limit', the
+        results are returned in pages of as many rows, starting at the row given by 'offset' (default 0), otherwise
+        all of them are streamed. Results streamed to disk (see 'stream_results_to_disk') are returned from their
+        file as they are.
+
+    Events and results are only available of multi-value iterations run in this process (see
+    'max_parallel_iterations'). Runs of the same query collection are run one after another, runs of different ones
+    at the same time. The results of the latest max_finished_runs runs are kept in memory."""
+
+    max_finished_runs = 20
+
+    # how many rows of results are written at once when streaming them
+    stream_rows_count = 1000
+
+    # seconds after which a comment is sent to event streams without events, so that they are not closed as idle
+    keep_alive_interval = 15
+
+    content_types = { "json": "application/json", "toml": "application/toml", "yaml": "application/yaml" }
+
+    def __init__(self, host, port, run_settings, collections_folder=None):
+
+        self.run_settings = run_settings
+
+        # folder of the query collection files which can be run by their name, if any
+        self.collections_folder = None
+        if collections_folder is not None:
+            self.collections_folder = Path(collections_folder).resolve()
+            if not self.collections_folder.is_dir():
+                raise ValueError("Folder of query collection files not found: " + str(collections_folder))
+
+        self.runs = collections.OrderedDict()
+        self.runs_count = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.threads = []
+
+        # locks of query collection files, so that their runs are not at the same time, and when they were run last
+        self.query_collection_locks = {}
+        self.query_collection_timestamps = {}
+
+        self.server = http.server.ThreadingHTTPServer((host, port), Query_collection_api_handler)
+        self.server.daemon_threads = True
+        self.server.api = self
+        self.server_thread = None
+
+
+    def serve(self):
+        """Serves until stopped (by ctrl+c or a SIGTERM signal)"""
+
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signal_number, frame: self.stop_event.set())
+
+        self.start()
+
+        try:
+            self.stop_event.wait()
+        except KeyboardInterrupt:
+            pass
+
+        self.stop()
+
+
+    def start(self):
+        """Starts serving in a background thread"""
+
+        self.server_thread = threading.Thread(target=self.server.serve_forever, name="api", daemon=True)
+        self.server_thread.start()
+
+        message = "\n\n################################\n" + \
+                  "Serving api for running query collections at: http://" + \
+                  self.server.server_address[0] + ":" + str(self.server.server_address[1]) + "/runs"
+        logging.info(message)
+        print(message)
+
+
+    def stop(self):
+        """Stops serving, then waits for the runs still going on"""
+
+        self.server.shutdown()
+        self.server.server_close()
+
+        message = "Stopping api, waiting for " + str(sum(1 for thread in self.threads if thread.is_alive())) + \
+                  " runs still going on"
+        logging.info(message)
+        print(message)
+
+        for thread in self.threads:
+            thread.join()
+
+
+    def get_query_collection_path(self, name):
+        """Returns the path of a query collection file in the folder of query collection files, by its name. Returns
+        None, if there is no such file in there (also if the name leads outside of it, e.g. by '..' or a link)."""
+
+        file_path = (self.collections_folder / name).resolve()
+
+        try:
+            file_path.relative_to(self.collections_folder)
+        except ValueError:
+            return None
+
+        return file_path if file_path.is_file() else None
+
+
+    def write_query_collection(self, body, declarative_format):
+        """Saves a submitted query collection as file, named by the hash of its content (so that submitting the same
+        one again reuses it as loaded already, see Query_collection_loader). Returns its path."""
+
+        folder = Path("querPy_cache/api")
+        folder.mkdir(parents=True, exist_ok=True)
+        file_path = folder / (hashlib.sha256(body).hexdigest()[:16] + "." + declarative_format)
+
+        if not file_path.exists():
+            file_path_tmp = file_path.with_name(
+                file_path.name + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp")
+            file_path_tmp.write_bytes(body)
+            os.replace(str(file_path_tmp), str(file_path))
+
+        return file_path
+
+
+    def submit(self, query_collection_filename, cache_mode):
+        """Loads a query collection file (so that invalid ones are reported right away, by a SystemExit as when run
+        from the command line) and runs it in a new thread. Returns the run."""
+
+        query_collection_loader.load(query_collection_filename)
+
+        with self.lock:
+
+            self.runs_count += 1
+            run = {
+                'id': str(self.runs_count),
+                'query_collection_file': str(query_collection_filename),
+                'status': "queued",
+                'submitted': datetime.datetime.now().isoformat(),
+                'error_message': None,
+                'events': [],
+                'condition': threading.Condition(),
+                'is_done': False,
+                'queries': collections.OrderedDict(),
+                'iterations': None,
+            }
+            self.runs[run['id']] = run
+
+        run_settings = dict(
+            self.run_settings, cache_mode=cache_mode, resume=False, incremental=False,
+            progress_listener=lambda event, query_collection_data_object, query_data_object:
+                self.listen(run, event, query_collection_data_object, query_data_object))
+
+        thread = threading.Thread(
+            target=self.run, args=(run, query_collection_filename, run_settings), name="api run " + run['id'])
+        self.threads = [ thread for thread in self.threads if thread.is_alive() ] + [ thread ]
+        thread.start()
+
+        return run
+
+
+    def run(self, run, query_collection_filename, run_settings):
+        """Runs a submitted query collection, after the runs of the same query collection submitted earlier"""
+
+        key = str(Path(query_collection_filename).resolve())
+        with self.lock:
+            query_collection_lock = self.query_collection_locks.setdefault(key, threading.Lock())
+
+        with query_collection_lock:
+
+            # runs of the same query collection started in the same second would have the same timestamp, thus
+            # the same output destination and checkpoint journal
+            while self.query_collection_timestamps.get(key) == time.strftime('%y%m%d_%H%M%S'):
+                time.sleep(0.1)
+            self.query_collection_timestamps[key] = time.strftime('%y%m%d_%H%M%S')
+
+            run['status'] = "running"
+            self.add_event(run, 'run_started', { 'query_collection_file': run['query_collection_file'] })
+
+            try:
+                query_collection_data_object, iterations_stats, failed_iterations, duration = \
+                    run_query_collection(query_collection_filename, run_settings)
+
+            except (Exception, SystemExit) as ex:
+                run['status'] = "failed"
+                run['error_message'] = str(ex.code if isinstance(ex, SystemExit) else ex).strip()
+                message = "EXCEPTION OCCURED IN RUN " + run['id'] + " SUBMITTED TO API: " + run['error_message']
+                logging.error(message)
+                print(message)
+                self.add_event(run, 'run_failed', { 'error_message': run['error_message'] }, is_done=True)
+
+            else:
+                run['status'] = "finished"
+                run['iterations'] = iterations_stats
+                self.add_event(run, 'run_finished', {
+                    'duration': duration,
+                    'queries_count': sum(iteration_stats['queries_count'] for iteration_stats in iterations_stats),
+                    'errors_count': sum(iteration_stats['errors_count'] for iteration_stats in iterations_stats),
+                    'failed_iterations': failed_iterations,
+                }, is_done=True)
+
+        # only the latest finished runs are kept
+        with self.lock:
+            finished_runs = [ run_id for run_id, run in self.runs.items() if run['is_done'] ]
+            for run_id in finished_runs[:max(0, len(finished_runs) - self.max_finished_runs)]:
+                del self.runs[run_id]
+
+
+    def listen(self, run, event, query_collection_data_object, query_data_object):
+        """Records an event of a run (see 'Query_collection_data_object.report_progress'), and the query data object
+        once its results are written, so that these can be served"""
+
+        data = { 'multi_value_index': query_collection_data_object._current_multi_value }
+
+        if event == 'iteration_started':
+            data['title'] = query_collection_data_object.title
+            data['endpoint'] = query_collection_data_object.endpoint
+
+        if query_data_object is not None:
+            data['id'] = query_data_object.id
+            data['title'] = query_data_object.title
+
+        if event == 'query_executed':
+            data['error_message'] = query_data_object.error_message
+            data['results_execution_duration'] = query_data_object.results_execution_duration
+
+        if event == 'query_written':
+            data['error_message'] = query_data_object.error_message
+            data['results_lines_count'] = query_data_object.results_lines_count
+            data['results_restored'] = query_data_object.results_restored
+            data['results'] = "/runs/" + run['id'] + "/results/" + str(query_data_object.id) + \
+                              "?iteration=" + str(data['multi_value_index'])
+
+            # the title and output format are taken now, since they depend on the current multi-value iteration
+            with run['condition']:
+                run['queries'][(data['multi_value_index'], query_data_object.id)] = dict(
+                    data, output_format=query_collection_data_object.output_format,
+                    query_data_object=query_data_object)
+
+        self.add_event(run, event, data)
+
+
+    def add_event(self, run, event, data, is_done=False):
+        """Adds an event to a run and wakes up its event streams"""
+
+        with run['condition']:
+            run['events'].append((event, json.dumps(data, default=str)))
+            run['is_done'] = is_done
+            run['condition'].notify_all()
+
+
+    def get_state(self, run):
+        """Returns what is known about a run so far"""
+
+        with run['condition']:
+            queries = [ { key: value for key, value in query.items() if key not in ('query_data_object', 'output_format') }
+                        for query in run['queries'].values() ]
+
+        return {
+            'id': run['id'],
+            'query_collection_file': run['query_collection_file'],
+            'status': run['status'],
+            'submitted': run['submitted'],
+            'error_message': run['error_message'],
+            'events_count': len(run['events']),
+            'events': "/runs/" + run['id'] + "/events",
+            'queries': queries,
+            'iterations': run['iterations'],
+        }
+
+
+    def get_value(self, value):
+        """Returns a value of harmonized results as it is written into json and csv"""
+
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+
+        if isinstance(value, float) and (math.isinf(value) or math.isnan(value)):
+            return str(value)
+
+        return value
+
+
+
+class Query_collection_api_handler(http.server.BaseHTTPRequestHandler):
+    """The Query_collection_api_handler Class handles the requests to the api (see Query_collection_api)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+
+        logging.info("api: " + self.address_string() + " " + (format % args))
+
+
+    def do_GET(self):
+
+        api = self.server.api
+        url = urllib.parse.urlparse(self.path)
+        parameters = urllib.parse.parse_qs(url.query)
+        path = url.path.rstrip("/").split("/")[1:]
+
+        if path == [ "runs" ]:
+            with api.lock:
+                runs = list(api.runs.values())
+            self.send_json(200, [ api.get_state(run) for run in runs ])
+            return
+
+        if len(path) < 2 or path[0] != "runs" or path[1] not in api.runs:
+            self.send_json(404, { 'error': "Not found: " + url.path })
+            return
+
+        run = api.runs[path[1]]
+
+        if len(path) == 2:
+            self.send_json(200, api.get_state(run))
+
+        elif len(path) == 3 and path[2] == "events":
+            self.send_events(run)
+
+        elif len(path) == 4 and path[2] == "results":
+            self.send_results(run, path[3], parameters)
+
+        else:
+            self.send_json(404, { 'error': "Not found: " + url.path })
+
+
+    def do_POST(self):
+
+        api = self.server.api
+        url = urllib.parse.urlparse(self.path)
+        parameters = urllib.parse.parse_qs(url.query)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        if url.path.rstrip("/") != "/runs":
+            self.send_json(404, { 'error': "Not found: " + url.path })
+            return
+
+        cache_mode = parameters.get('cache_mode', [ "use" ])[0]
+        if cache_mode not in ("use", "refresh", "bypass"):
+            self.send_json(400, { 'error': "Invalid cache_mode, expected use, refresh or bypass: " + cache_mode })
+            return
+
+        if 'file' in parameters:
+            if api.collections_folder is None:
+                self.send_json(403, { 'error': "Running query collection files by their name is not enabled " +
+                                               "(see '--api-collections')" })
+                return
+            query_collection_path = api.get_query_collection_path(parameters['file'][0])
+            if query_collection_path is None:
+                self.send_json(404, { 'error': "Query collection file not found: " + parameters['file'][0] })
+                return
+            query_collection_filename = str(query_collection_path)
+
+        else:
+            declarative_format = parameters.get('format', [ None ])[0]
+            if declarative_format is None:
+                content_type = self.headers.get('Content-Type', "")
+                declarative_format = next((declarative_format for declarative_format in ("json", "toml", "yaml")
+                                           if declarative_format in content_type), None)
+            if declarative_format not in api.content_types:
+                self.send_json(400, { 'error': "Expected a query collection in json, toml or yaml (as content type " +
+                                               "or parameter 'format'), or the parameter 'file'" })
+                return
+            query_collection_filename = str(api.write_query_collection(body, declarative_format))
+
+        try:
+            run = api.submit(query_collection_filename, cache_mode)
+        except SystemExit as ex:
+            self.send_json(400, { 'error': str(ex.code).strip() })
+            return
+
+        self.send_json(202, api.get_state(run))
+
+
+    def send_json(self, status, data):
+        """Sends data as json response"""
+
+        body = json.dumps(data, indent=2, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def send_stream_headers(self, content_type):
+        """Sends the headers of a response whose body is streamed until the connection is closed"""
+
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+
+    def send_events(self, run):
+        """Streams the events of a run as server-sent events, until the run is done or the client disconnects"""
+
+        api = self.server.api
+
+        try:
+            event_index = int(self.headers.get('Last-Event-ID', -1)) + 1
+        except ValueError:
+            event_index = 0
+
+        self.send_stream_headers("text/event-stream")
+
+        try:
+            while True:
+
+                with run['condition']:
+                    if event_index >= len(run['events']) and not run['is_done']:
+                        run['condition'].wait(api.keep_alive_interval)
+                    events = run['events'][event_index:]
+                    is_done = run['is_done']
+
+                if len(events) == 0:
+                    self.wfile.write(b": keep-alive\n\n")
+
+                for event, data in events:
+                    self.wfile.write(("id: " + str(event_index) + "\nevent: " + event + "\ndata: " + data + "\n\n")
+                                     .encode('utf-8'))
+                    event_index += 1
+
+                self.wfile.flush()
+
+                if is_done and event_index >= len(run['events']):
+                    return
+
+        except (BrokenPipeError, ConnectionResetError):
+            logging.info("api: client disconnected from events of run " + run['id'])
+
+
+    def send_results(self, run, query_id, parameters):
+        """Sends the harmonized results of a query, as page or streamed"""
+
+        api = self.server.api
+
+        try:
+            multi_value_index = int(parameters.get('iteration', [ 0 ])[0])
+            query_key = (multi_value_index, int(query_id))
+            offset = int(parameters.get('offset', [ 0 ])[0])
+            limit = int(parameters['limit'][0]) if 'limit' in parameters else None
+        except ValueError:
+            self.send_json(400, { 'error': "Expected numbers as query id, iteration, offset and limit" })
+            return
+
+        results_format = parameters.get('format', [ "json" ])[0]
+        if results_format not in ("json", "csv"):
+            self.send_json(400, { 'error': "Invalid format, expected json or csv: " + results_format })
+            return
+
+        if offset < 0 or (limit is not None and limit < 1):
+            self.send_json(400, { 'error': "Expected an offset of at least 0 and a limit of at least 1" })
+            return
+
+        with run['condition']:
+            query = run['queries'].get(query_key)
+
+        if query is None:
+            self.send_json(404, { 'error': "No results (yet) of query " + query_id + " in multi-value iteration " +
+                                           str(multi_value_index) + " of run " + run['id'] })
+            return
+
+        query_data_object = query['query_data_object']
+
+        if query_data_object.error_message is not None:
+            self.send_json(409, { 'error': "Query failed: " + query_data_object.error_message })
+            return
+
+        try:
+
+            # results streamed to disk are only in their file
+            if query_data_object.results_file is not None:
+                self.send_stream_headers(
+                    Sparql_http_client.accept_headers.get(query['output_format'], "application/octet-stream"))
+                with query_data_object.results_file.open('rb') as fr:
+                    shutil.copyfileobj(fr, self.wfile, Sparql_http_client.stream_chunk_size)
+                return
+
+            results_matrix = query_data_object.results_matrix
+            variables = list(get_result_rows(results_matrix, 0, 1)[0]) if len(results_matrix) > 0 else []
+            rows_count = max(len(results_matrix) - 1, 0)
+
+            if limit is not None:
+
+                rows = [ [ api.get_value(value) for value in row ]
+                         for row in get_result_rows(results_matrix, 1 + offset, 1 + offset + limit) ]
+
+                if results_format == "json":
+                    next_offset = offset + limit
+                    self.send_json(200, {
+                        'variables': variables,
+                        'rows': rows,
+                        'offset': offset,
+                        'limit': limit,
+                        'rows_count': rows_count,
+                        'next': "/runs/" + run['id'] + "/results/" + query_id + "?iteration=" +
+                                str(multi_value_index) + "&offset=" + str(next_offset) + "&limit=" + str(limit)
+                                if next_offset < rows_count else None,
+                    })
+
+                else:
+                    body = self.get_csv([ variables ] + rows).encode('utf-8')
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/csv")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                return
+
+            # otherwise all rows are streamed in chunks, only constructed when they are written
+
+            if results_format == "json":
+                self.send_stream_headers("application/json")
+                self.wfile.write(('{"variables": ' + json.dumps(variables) + ', "rows_count": ' + str(rows_count) +
+                                  ', "rows": [').encode('utf-8'))
+            else:
+                self.send_stream_headers("text/csv")
+                self.wfile.write(self.get_csv([ variables ]).encode('utf-8'))
+
+            for y in range(1 + offset, rows_count + 1, api.stream_rows_count):
+
+                rows = [ [ api.get_value(value) for value in row ]
+                         for row in get_result_rows(results_matrix, y, y + api.stream_rows_count) ]
+
+                if results_format == "json":
+                    chunk = ("," if y > 1 + offset else "") + json.dumps(rows, default=str)[1:-1]
+                else:
+                    chunk = self.get_csv(rows)
+
+                self.wfile.write(chunk.encode('utf-8'))
+
+            if results_format == "json":
+                self.wfile.write(b"]}")
+
+        except (BrokenPipeError, ConnectionResetError):
+            logging.info("api: client disconnected from results of run " + run['id'])
+
+
+    def get_csv(self, rows):
+        """Returns rows as csv"""
+
+        csv_string = io.StringIO()
+        csv.writer(csv_string).writerows(rows)
+
+        return csv_string.getvalue()
+
+
+
+class Results_matrix(collections.abc.MutableSequence):
+    """The Results_matrix Class holds the harmonized results of a query column by column, each column having one
+    type: int, float, bool, date, datetime or str. The type is taken from the datatypes annotated in json / xml
+    results if all values of a column have the same, otherwise it is inferred from the values themselves. Columns of
+    ints and floats are kept as compact arrays, and every column is parsed at once instead of value by value.
+    Values of unbound variables are kept as empty strings.
+
+    For backwards compatibility (e.g. with custom_post_processing functions) it also behaves like the former
+    two-dimensional list: the first row holds the variables, all others their values. Once its rows are accessed as
+    such (by index, slice or iterating over it), all of them are constructed, and from then on the results are held
+    in these rows instead of the columns, so that they can be changed like the rows of a list (which includes
+    appending, inserting or deleting rows). Variables, columns and their types are then taken from the rows whenever
+    asked for. querPy itself reads rows with 'iter_rows', which does not construct all of them."""
+
+    xsd = "http://www.w3.org/2001/XMLSchema#"
+
+    # python types of the xsd datatypes which are converted, any other datatype is kept as str
+    datatypes = {
+        xsd + "integer": int, xsd + "int": int, xsd + "long": int, xsd + "short": int, xsd + "byte": int,
+        xsd + "nonNegativeInteger": int, xsd + "positiveInteger": int,
+        xsd + "nonPositiveInteger": int, xsd + "negativeInteger": int,
+        xsd + "unsignedLong": int, xsd + "unsignedInt": int, xsd + "unsignedShort": int, xsd + "unsignedByte": int,
+        xsd + "decimal": float, xsd + "float": float, xsd + "double": float,
+        xsd + "boolean": bool,
+        xsd + "date": datetime.date,
+        xsd + "dateTime": datetime.datetime, xsd + "dateTimeStamp": datetime.datetime,
+    }
+
+    # order in which types are tried when inferring them from values without datatypes
+    inferred_types = [ int, float, bool, datetime.date, datetime.datetime ]
+
+    boolean_values = { "true": True, "false": False, "1": True, "0": False }
+
+    def __init__(self, variables, columns, column_types):
+
+        self._variables = variables
+        self._columns = columns
+        self._column_types = column_types
+        self._rows_count = len(columns[0]) if len(columns) > 0 else 0
+
+        # rows (first: variables), once they were accessed as such (see 'get_rows')
+        self.rows = None
+
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Creates a Results_matrix from a two-dimensional list of strings (first row: variables), as read from
+        csv / tsv results. Rows shorter than the variables (e.g. a truncated last line) are filled up with empty
+        strings."""
+
+        if len(rows) == 0:
+            return cls([], [], [])
+
+        variables = rows[0]
+        body = rows[1:]
+        columns = [ [ row[x] if x < len(row) else "" for row in body ] for x in range(0, len(variables)) ]
+
+        return cls.from_columns(variables, columns)
+
+
+    @classmethod
+    def from_columns(cls, variables, columns, columns_annotations=None):
+        """Creates a Results_matrix from lists of strings per variable. columns_annotations can hold a set per column
+        of the datatypes its values were annotated with (None for plain literals, 'uri' etc. for other terms)"""
+
+        parsed_columns = []
+        column_types = []
+
+        for x in range(0, len(columns)):
+
+            annotations = columns_annotations[x] if columns_annotations is not None else None
+            column, column_type = cls.parse_column(columns[x], annotations)
+            parsed_columns.append(column)
+            column_types.append(column_type)
+
+        return cls(list(variables), parsed_columns, column_types)
+
+
+    @classmethod
+    def from_typed_rows(cls, rows):
+        """Creates a Results_matrix from rows (first row: variables) whose values are converted already, e.g. as kept
+        by Checkpoint_journal. Rows can be given one by one (e.g. as generator), they are not kept as such."""
+
+        rows = iter(rows)
+        variables = next(rows, [])
+        columns = [ [] for variable in variables ]
+
+        for row in rows:
+            for x, column in enumerate(columns):
+                column.append(row[x] if x < len(row) else "")
+
+        return cls(list(variables), columns, [ cls.get_column_type(column) for column in columns ])
+
+
+    @classmethod
+    def parse_column(cls, values, annotations=None):
+        """Returns the values of a column converted into one type, and this type"""
+
+        if len(values) == 0:
+            return values, str
+
+        # all values annotated: use their datatype, if it is the same for all
+        if annotations is not None and None not in annotations:
+            column_types = { cls.datatypes.get(annotation, str) for annotation in annotations }
+            if len(column_types) == 1 and str not in column_types:
+                column_type = column_types.pop()
+                column = cls.convert_column(values, column_type, False)
+                if column is not None:
+                    return column, column_type
+            return values, str
+
+        # otherwise infer the type from the values
+        for column_type in cls.inferred_types:
+            column = cls.convert_column(values, column_type, True)
+            if column is not None:
+                return column, column_type
+
+        return values, str
+
+
+    @classmethod
+    def convert_column(cls, values, column_type, is_inferred):
+        """Converts all values of a column into the given type at once, returns None if not all of them can be.
+        Empty values (unbound variables) are kept as empty strings."""
+
+        if column_type is bool:
+            convert = cls.boolean_values.__getitem__
+        elif column_type is datetime.date:
+            convert = datetime.date.fromisoformat
+        elif column_type is datetime.datetime:
+            convert = datetime.datetime.fromisoformat
+        else:
+            convert = column_type
+
+        try:
+
+            if "" in values:
+                if all(value == "" for value in values):
+                    return None
+                column = [ convert(value) if value != "" else "" for value in values ]
+                converted = [ value for value in column if value != "" ]
+            else:
+                column = list(map(convert, values))
+                converted = column
+
+        except (ValueError, KeyError, OverflowError):
+            return None
+
+        # '1' and '0' are only taken as booleans if annotated so
+        if column_type is bool and is_inferred and ("1" in values or "0" in values):
+            return None
+
+        # 'nan', 'inf' etc. are only taken as floats if annotated so
+        if column_type is float and is_inferred and any(math.isinf(value) or math.isnan(value) for value in converted):
+            return None
+
+        # dates are only inferred from values in the extended format, e.g. '2020-01-31' (not '20200131')
+        if column_type in (datetime.date, datetime.datetime) and is_inferred and \
+                any(len(value) < 10 or value[4] != "-" for value in values if value != ""):
+            return None
+
+        if converted is column:
+            try:
+                if column_type is int:
+                    return array.array('q', column)
+                elif column_type is float:
+                    return array.array('d', column)
+            except OverflowError:
+                pass
+
+        return column
+
+
+    @classmethod
+    def get_column_type(cls, column):
+        """Returns the type of the values of a column taken from rows (changed ones, or restored ones, see
+        'from_typed_rows'), str if they are not all of one of the types of harmonized results"""
+
+        column_types = { type(value) for value in column if value != "" }
+        if len(column_types) == 1:
+            column_type = column_types.pop()
+            if column_type in cls.inferred_types:
+                return column_type
+
+        return str
+
+
+    @property
+    def variables(self):
+
+        if self.rows is None:
+            return self._variables
+        return list(self.rows[0]) if len(self.rows) > 0 else []
+
+
+    @property
+    def columns(self):
+
+        if self.rows is None:
+            return self._columns
+
+        columns_count = max([ len(row) for row in self.rows ], default=0)
+        return [ [ row[x] if x < len(row) else "" for row in self.rows[1:] ] for x in range(0, columns_count) ]
+
+
+    @property
+    def column_types(self):
+
+        if self.rows is None:
+            return self._column_types
+        return [ self.get_column_type(column) for column in self.columns ]
+
+
+    @property
+    def rows_count(self):
+
+        if self.rows is None:
+            return self._rows_count
+        return max(len(self.rows) - 1, 0)
+
+
+    def get_rows(self):
+        """Returns the rows (first: variables) as list of lists, which from then on hold the results"""
+
+        if self.rows is None:
+            self.rows = list(self.iter_rows())
+            self._variables = self._columns = self._column_types = None
+
+        return self.rows
+
+
+    def iter_rows(self, start=0, stop=None):
+        """Yields the rows from start to stop (first row: variables) as lists, constructing only one at a time"""
+
+        if self.rows is not None:
+            yield from self.rows[start:stop]
+            return
+
+        stop = len(self) if stop is None else min(stop, len(self))
+
+        if start == 0 and stop > 0:
+            yield list(self._variables)
+
+        for y in range(max(start, 1), stop):
+            yield [ column[y - 1] for column in self._columns ]
+
+
+    def __len__(self):
+
+        if self.rows is None:
+            return self._rows_count + 1
+        return len(self.rows)
+
+
+    def __getitem__(self, index):
+        return self.get_rows()[index]
+
+
+    def __setitem__(self, index, value):
+        self.get_rows()[index] = value
+
+
+    def __delitem__(self, index):
+        del self.get_rows()[index]
+
+
+    def insert(self, index, value):
+        self.get_rows().insert(index, value)
+
+
+    def __iter__(self):
+        return iter(self.get_rows())
+
+
+    def __eq__(self, other):
+
+        if isinstance(other, (Results_matrix, list)):
+            return list(self.iter_rows()) == list(other)
+        return NotImplemented
+
+
+    def __repr__(self):
+        return repr(list(self.iter_rows()))
+
+
+
+
+class Xml_results_parser:
+    """The Xml_results_parser Class reads SPARQL Results XML incrementally, from chunks of bytes as they are fed to it
+    (e.g. while reading a file), instead of building a document of all results first. The values of each result row
+    are collected into columns as soon as the row has been read, after which its elements are discarded again, so that
+    only one row at a time is held as elements. If a limit is given, only the values of the first 'limit' rows are
+    collected, while all rows are still counted."""
+
+    namespace = "{http://www.w3.org/2005/sparql-results#}"
+    xml_lang = "{http://www.w3.org/XML/1998/namespace}lang"
+
+    # size of the chunks to feed, the elements of all rows in a chunk are held at the same time
+    chunk_size = 2 ** 16
+
+    def __init__(self, limit=None):
+
+        self.limit = limit
+        self.parser = xml.etree.ElementTree.XMLPullParser(events=("start", "end"))
+        self.results_element = None
+
+        self.keys = []
+        self.columns = []
+        self.columns_annotations = []
+        self.key_indices = {}
+        self.rows_count = 0
+
+
+    def feed(self, chunk):
+        """Parses the next chunk of bytes and collects the values of all result rows completed by it"""
+
+        self.parser.feed(chunk)
+        self.read_events()
+
+
+    def close(self):
+        """Finishes parsing, raises xml.etree.ElementTree.ParseError if the results are incomplete or malformed"""
+
+        self.parser.close()
+        self.read_events()
+
+
+    def is_limit_reached(self):
+        return self.limit is not None and self.rows_count >= self.limit
+
+
+    def read_events(self):
+
+        for event, element in self.parser.read_events():
+
+            if event == "start":
+                if element.tag == self.namespace + "results":
+                    self.results_element = element
+
+            elif element.tag == self.namespace + "variable":
+                self.add_key(element.get('name'))
+
+            elif element.tag == self.namespace + "result":
+                if self.limit is None or self.rows_count < self.limit:
+                    self.read_row(element)
+                self.rows_count += 1
+                self.results_element.remove(element)
+
+
+    def add_key(self, key):
+
+        self.key_indices[key] = len(self.keys)
+        self.keys.append(key)
+        # rows collected before a variable is first seen (if it is not declared in the head) leave it unbound
+        rows_collected = self.rows_count if self.limit is None else min(self.rows_count, self.limit)
+        self.columns.append([ "" ] * rows_collected)
+        self.columns_annotations.append(set())
+
+
+    def read_row(self, result_element):
+        """Appends the values of a result row to the columns (unbound variables are left empty), and the datatypes
+        they are annotated with to the annotations of the columns. Variables not declared in the head are added as
+        further columns."""
+
+        values = [ "" ] * len(self.keys)
+
+        for binding in result_element:
+
+            if binding.get('name') not in self.key_indices:
+                self.add_key(binding.get('name'))
+                values.append("")
+
+            x = self.key_indices[binding.get('name')]
+            term = binding[0]
+
+            values[x] = term.text or ""
+
+            if term.tag != self.namespace + "literal":
+                self.columns_annotations[x].add(term.tag[len(self.namespace):])
+            elif self.xml_lang in term.attrib:
+                self.columns_annotations[x].add("lang")
+            else:
+                self.columns_annotations[x].add(term.get('datatype'))
+
+        for x in range(0, len(self.keys)):
+            self.columns[x].append(values[x])
+
+
+    def get_results_matrix(self):
+        return Results_matrix.from_columns(self.keys, self.columns, self.columns_annotations)
+
+
+
+
+class Json_results_parser:
+    """The Json_results_parser Class reads SPARQL Results JSON incrementally, from chunks of bytes as they are fed to it
+    (e.g. while reading a file), instead of loading all results into python objects first. The array of bindings is
+    decoded binding by binding, and the values of each binding are put straight into the columns of their variables
+    (unbound variables being left empty), so that only one binding at a time is held as python objects. If a limit is
+    given, only the values of the first 'limit' rows are collected, while all rows are still counted."""
+
+    decoder = json.JSONDecoder()
+    bindings_start = re.compile(r'"bindings"\s*:\s*\[')
+    bindings_separator = re.compile(r'[\s,]*')
+    vars_array = re.compile(r'"vars"\s*:\s*(\[[^\]]*\])')
+
+    # size of the chunks to feed
+    chunk_size = 2 ** 16
+
+    def __init__(self, limit=None):
+
+        self.limit = limit
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ""
+        self.state = "head"
+        self.texts_around_bindings = []
+
+        self.keys = []
+        self.columns = []
+        self.columns_annotations = []
+        self.key_indices = {}
+        self.rows_count = 0
+
+
+    def feed(self, chunk):
+        """Decodes the next chunk of bytes and collects the values of all bindings completed by it"""
+
+        self.buffer += self.text_decoder.decode(chunk)
+        self.read_buffer()
+
+
+    def close(self):
+        """Finishes parsing, raises ValueError if the results are incomplete or malformed"""
+
+        self.buffer += self.text_decoder.decode(b"", final=True)
+        self.read_buffer()
+
+        # results without bindings (e.g. of ASK queries) are only checked for being valid json
+        if self.state == "head":
+            json.loads(self.buffer)
+            self.texts_around_bindings.append(self.buffer)
+            self.buffer = ""
+
+        elif self.state == "bindings":
+            raise ValueError("Incomplete json results, array of bindings is not closed")
+
+        self.read_vars()
+
+
+    def is_limit_reached(self):
+        return self.limit is not None and self.rows_count >= self.limit
+
+
+    def read_buffer(self):
+        """Reads what the buffer holds so far: the text before the array of bindings, then the bindings one by one
+        (keeping an incomplete one in the buffer until its next chunk arrives), then the text after it"""
+
+        if self.state == "head":
+
+            match = self.bindings_start.search(self.buffer)
+            if match is None:
+                return
+
+            self.texts_around_bindings.append(self.buffer[:match.end()])
+            self.buffer = self.buffer[match.end():]
+            self.state = "bindings"
+
+            # variables are usually given before the bindings, take them for the order of the columns
+            self.read_vars()
+
+        if self.state == "bindings":
+
+            position = 0
+
+            while True:
+
+                position = self.bindings_separator.match(self.buffer, position).end()
+
+                if position == len(self.buffer):
+                    break
+
+                if self.buffer[position] == "]":
+                    self.state = "tail"
+                    break
+
+                try:
+                    binding, position_end = self.decoder.raw_decode(self.buffer, position)
+                except json.JSONDecodeError:
+                    break
+
+                self.read_binding(binding)
+                position = position_end
+
+            self.buffer = self.buffer[position:]
+
+        if self.state == "tail":
+
+            self.texts_around_bindings.append(self.buffer)
+            self.buffer = ""
+
+
+    def read_vars(self):
+        """Adds the variables of the head (if read already) as columns, in their order"""
+
+        match = self.vars_array.search("".join(self.texts_around_bindings))
+        if match is not None:
+            for key in json.loads(match.group(1)):
+                if key not in self.key_indices:
+                    self.add_key(key)
+
+
+    def add_key(self, key):
+
+        self.key_indices[key] = len(self.keys)
+        self.keys.append(key)
+        # bindings collected before a variable is first seen leave it unbound
+        rows_collected = self.rows_count if self.limit is None else min(self.rows_count, self.limit)
+        self.columns.append([ "" ] * rows_collected)
+        self.columns_annotations.append(set())
+
+
+    def read_binding(self, binding):
+        """Appends the values of a binding to the columns of their variables (unbound variables are left empty), and
+        the datatypes they are annotated with to the annotations of the columns"""
+
+        if self.limit is not None and self.rows_count >= self.limit:
+            self.rows_count += 1
+            return
+
+        for key in binding:
+            if key not in self.key_indices:
+                self.add_key(key)
+
+        values = [ "" ] * len(self.keys)
+
+        for key, term in binding.items():
+
+            x = self.key_indices[key]
+            values[x] = term['value']
+
+            if term['type'] != "literal" and term['type'] != "typed-literal":
+                self.columns_annotations[x].add(term['type'])
+            elif 'xml:lang' in term:
+                self.columns_annotations[x].add("lang")
+            else:
+                self.columns_annotations[x].add(term.get('datatype'))
+
+        for x in range(0, len(self.keys)):
+            self.columns[x].append(values[x])
+
+        self.rows_count += 1
+
+
+    def get_results_matrix(self):
+
+        # variables not declared in the head, but bound in bindings, are put last
+        match = self.vars_array.search("".join(self.texts_around_bindings))
+        order = json.loads(match.group(1)) if match is not None else []
+        order += [ key for key in self.keys if key not in order ]
+
+        return Results_matrix.from_columns(
+            order,
+            [ self.columns[self.key_indices[key]] for key in order ],
+            [ self.columns_annotations[self.key_indices[key]] for key in order ])
+
+
+    @classmethod
+    def split_bindings(cls, results):
+        """Splits json results given as bytes into the part up to and including the opening bracket of its array of
+        bindings, the bindings and the rest, so that the bindings of several pages can be joined"""
+
+        text = results.decode('utf-8')
+
+        start = cls.bindings_start.search(text).end()
+        position = start
+        end = start
+
+        while True:
+            position = cls.bindings_separator.match(text, position).end()
+            if text[position] == "]":
+                break
+            binding, position = cls.decoder.raw_decode(text, position)
+            end = position
+
+        return text[:start].encode('utf-8'), text[start:end].strip().encode('utf-8'), text[position:].encode('utf-8')
+
+
+
+
+class Query_collection_data_object:
+    """Data object encapsulating all data around a query collection file,
+    while also providing some logic (especially regarding multi values)
+
+    Attributes provided by end-user:
+        title: title of the whole query collection (optional)
+        description: description of the whole query collection (optional)
+        output_destination: where to save the results (optional, default: current folder)
+        output_format: what format should the results be saved in (optional, default: csv)
+        summary_sample_limit: how many rows from the results should be used as sample (optional, default: 5)
+        cooldown_between_queries: how many seconds should the execution be paused between queries (optional)
         count_the_results: should results of queries be counted (optional, default: yes)
+        count_from_downloaded_results: should results be counted from the downloaded rows instead of a query (optional)
         write_empty_results: should empty results be written into summaries (optional)
+        stream_results_to_disk: should results be written directly into a local folder (optional)
+        xlsx_constant_memory: should xlsx files be written row by row in constant memory (optional)
+        max_parallel_queries: how many queries should be executed at the same time (optional, default: 1)
+        pipeline_queue_size: how many queries may wait between the stages executing, harmonizing and writing them (optional, default: 0)
+        max_parallel_iterations: how many multi-value iterations should be run at the same time in separate processes (optional)
+        max_parallel_pages: how many pages of a query with page_size should be executed at the same time (optional)
+        page_retries: how often a failed page of a query with page_size is retried (optional, default: 0)
+        max_connections_per_endpoint: how many keep-alive connections to reuse per endpoint (optional, default: 0)
+        endpoint_rate_limit: how many requests per interval may be sent to the endpoint (optional)
+        google_rate_limit: how many requests per interval may be sent to the google api (optional)
+        query_timeout: after how many seconds a request to the endpoint is cancelled (optional, default: 0 = never)
+        retry_policy: how often and after which errors requests to the endpoint are retried (optional)
+        cache_max_age: for how many seconds results are taken from the cache of results (optional, default: 0)
+        cache_max_size: how many megabytes the cache of results may use on disk (optional, default: 1000)
+        count_triples_max_age: for how many seconds a count of all triples in the endpoint is reused (optional, default: 0)
         endpoint: which sparql endpoint (mandatory)
         queries: the list containing query data objects
         credentials_path: path to google credentials (optional)
         client_secret_path: path to google client secrets (optional)
 
-    Attributes handled by querPy internally:
-        output_writer: object which handles all the output writing
-        query_collection_module: the query collection file written by the end-user
-        query_collection_filename: the original file name of the query collection file
-        timestamp_start: start of execution
-        count_triples_in_endpoint: how many triples are there in the store in total
-        header_error_message: message if an error occured during counting of all triples
-        current_multi_value: which current multi value index is used
-        multi_value_length: how many multi value options are the maximumg
+    Attributes handled by querPy internally:
+        output_writer: object which handles all the output writing
+        query_collection_module: the query collection file written by the end-user
+        query_collection_filename: the original file name of the query collection file
+        timestamp_start: start of execution
+        count_triples_in_endpoint: how many triples are there in the store in total
+        count_triples_in_endpoint_timestamp: when the count of all triples was done, if it was reused (otherwise None)
+        header_error_message: message if an error occured during counting of all triples
+        current_multi_value: which current multi value index is used
+        multi_value_length: how many multi value options are the maximumg
+        cache_mode: whether the cache of results is used, refreshed or bypassed (set by command line arguments)
+        result_cache: the cache of results
+        endpoint_rate_limiter: the rate limiter for requests to the endpoint
+        checkpoint_journal: the journal recording completed queries, used for resuming an interrupted run
+        resume: whether an interrupted run is resumed (set by command line arguments)
+        progress_listener: function called with the events of the run (see 'report_progress'), if any
+
+
+
+    """
+
+    def __init__(self):
+
+        # current_multi_value represents the current index the query_collection is in regard to the possible
+        # multi values lists provided by the user
+        # e.g. two output_formats: [xml, csv], where current_multi_value represents the current element in the list.
+        # Is set to -1 because the method 'has_next' is called before the first item is accessed.
+        self._current_multi_value = 0
+
+        # multiv_value_length represents the possible length of a multi_value list.
+        self._multi_value_length = 1
+
+        self.progress_listener = None
+
+
+    # All the following variables could contain multi-values provided by the user,
+    # Thus when being read from the query collection file, they need to parsed into proper lists if needed,
+    # and when being used during processing, the correct current value of a multi-value list needs to be returned.
+
+
+    # title
+
+    @property
+    def title(self):
+        """Since the title is used as either file or folder or google sheet name, it's important for these
+        names to be unique. Thus the following if's are checking for duplicate titles and if detected
+        return them with a (n) attached where n represents the incrementing duplicate number.
+        Note that this logic here does not actually persist the title in the query_collection_data_object,
+        but only produces the adaptions on the fly when being queried."""
+
+        if self._multi_value_length > 1 :
+
+            if type(self._title) is list:
+
+                found_count = 0
+                for i in range(self._current_multi_value):
+                    if self._title[i] ==  self._title[self._current_multi_value]:
+                        found_count += 1
+
+                if found_count > 0:
+                    return self._title[self._current_multi_value] + " (" + str(found_count+1) + ")"
+                else:
+                    return self._title[self._current_multi_value]
+
+            else:
+                return self._title + " (" + str(self._current_multi_value+1) + ")"
+        else:
+            return self._title
+
+    @title.setter
+    def title(self, title):
+
+        if type(title) is list:
+            unsanitised_list = self.construct_multi_values(title)
+            self._title = [ str(e) for e in unsanitised_list ]
+        else:
+            self._title = str(title)
+
+
+    # description
+
+    @property
+    def description(self):
+        return self.return_current_multi_value_of(self._description)
+
+    @description.setter
+    def description(self, description):
+
+        def sanitise_description(unsanitised_description):
+
+            if unsanitised_description is None:
+                return ""
+            elif type(unsanitised_description) is str:
+                return unsanitised_description
+            else:
+                error_message = "Found invalid data type for description! \n" + \
+                    "Expected type: str\nFound type: " + str(type(unsanitised_description)) + \
+                    "\nFound value: " + str(unsanitised_description)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+
+        if type(description) is list:
+            unsanitised_list = self.construct_multi_values(description)
+            self._description = [ sanitise_description(e) for e in unsanitised_list ]
+        else:
+            self._description = sanitise_description(description)
+
+
+    # output_destination
+
+    @property
+    def output_destination(self):
+        return self.return_current_multi_value_of(self._output_destination)
+
+    @output_destination.setter
+    def output_destination(self, output_destination):
+
+        def sanitise_output_destination(unsanitised_output_destination):
+
+            if unsanitised_output_destination is None:
+                return "."
+            elif type(unsanitised_output_destination) is str:
+                if unsanitised_output_destination == "" or unsanitised_output_destination.isspace():
+                    return "."
+                else:
+                    return unsanitised_output_destination
+            else:
+                error_message = "Found invalid data type for output_destination! \n" + \
+                    "Expected type: str\nFound type: " + str(type(unsanitised_output_destination)) + \
+                    "\nFound value: " + str(unsanitised_output_destination)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+
+        if type(output_destination) is list:
+            unsanitised_list = self.construct_multi_values(output_destination)
+            self._output_destination = [ sanitise_output_destination(e) for e in unsanitised_list ]
+        else:
+            self._output_destination = sanitise_output_destination(output_destination)
+
+
+    # output_format
+
+    @property
+    def output_format(self):
+        return self.return_current_multi_value_of(self._output_format)
+
+    @output_format.setter
+    def output_format(self, output_format):
+
+        def sanitise_output_format(unsanitised_output_format):
+
+            if unsanitised_output_format is None or type(unsanitised_output_format) is not str:
+                error_message = "No valid output_format found. Possible formats are: \n" + \
+                                 "CSV, TSV, XML, JSON, XLSX\n" + \
+                                 "Found format is " + str(unsanitised_output_format)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            if unsanitised_output_format.upper() == "CSV" or unsanitised_output_format.upper() == CSV:
+                return CSV
+            elif unsanitised_output_format.upper() == "TSV" or unsanitised_output_format.upper() == TSV:
+                return TSV
+            elif unsanitised_output_format.upper() == "XML" or unsanitised_output_format.upper() == XML:
+                return XML
+            elif unsanitised_output_format.upper() == "JSON" or unsanitised_output_format.upper() == JSON:
+                return JSON
+            elif unsanitised_output_format.upper() == "XLSX" or unsanitised_output_format.upper() == XLSX:
+                return "XLSX"
+            else:
+                error_message = "No valid output_format found. Possible formats are: \n" + \
+                                 "CSV, TSV, XML, JSON, XLSX\n" + \
+                                 "Found format is " + str(unsanitised_output_format)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
 
+        if type(output_format) is list:
+            unsanitised_list = self.construct_multi_values(output_format)
+            self._output_format = [ sanitise_output_format(e) for e in unsanitised_list ]
+        else:
+            self._output_format = sanitise_output_format(output_format)
 
 
-    """
+    # summary_sample_limit
 
-    def __init__(self):
+    @property
+    def summary_sample_limit(self):
+        return self.return_current_multi_value_of(self._summary_sample_limit)
 
-        # current_multi_value represents the current index the query_collection is in regard to the possible
-        # multi values lists provided by the user
-        # e.g. two output_formats: [xml, csv], where current_multi_value represents the current element in the list.
-        # Is set to -1 because the method 'has_next' is called before the first item is accessed.
-        self._current_multi_value = 0
+    @summary_sample_limit.setter
+    def summary_sample_limit(self, summary_sample_limit):
 
-        # multiv_value_length represents the possible length of a multi_value list.
-        self._multi_value_length = 1
+        def sanitise_summary_sample_limit(unsanitised_summary_sample_limit):
 
+            if unsanitised_summary_sample_limit is None or type(unsanitised_summary_sample_limit) is not int:
+                error_message = "Found invalid data type for summary_sample_limit! \n" + \
+                    "Expected type: int\nFound type: " + str(type(unsanitised_count_the_results)) + \
+                    "\nFound value: " + str(unsanitised_count_the_results)
+                logging.error(error_message)
+                raise ValueError(error_message)
 
-    # All the following variables could contain multi-values provided by the user,
-    # Thus when being read from the query collection file, they need to parsed into proper lists if needed,
-    # and when being used during processing, the correct current value of a multi-value list needs to be returned.
+            elif unsanitised_summary_sample_limit > 101:
+                message = "Found sample limit which is too high: " + str(unsanitised_summary_sample_limit) + \
+                          ", replaced it with limit of 100"
+                logging.info(message)
+                print(message)
+                return 101
+
+            elif unsanitised_summary_sample_limit < 0:
+                message = "Found invalid sample limit: " + str(unsanitised_summary_sample_limit) + \
+                          ", replaced it with limit of 5"
+                logging.info(message)
+                print(message)
+                return 5
 
+            else:
+                return unsanitised_summary_sample_limit
 
-    # title
+
+        if type(summary_sample_limit) is list:
+            unsanitised_list = self.construct_multi_values(summary_sample_limit)
+            self._summary_sample_limit = [sanitise_summary_sample_limit(e) for e in unsanitised_list]
+        else:
+            self._summary_sample_limit = sanitise_summary_sample_limit(summary_sample_limit)
+
+
+    # cooldown_between_queries
 
     @property
-    def title(self):
-        """Since the title is used as either file or folder or google sheet name, it's important for these
-        names to be unique. Thus the following if's are checking for duplicate titles and if detected
-        return them with a (n) attached where n represents the incrementing duplicate number.
-        Note that this logic here does not actually persist the title in the query_collection_data_object,
-        but only produces the adaptions on the fly when being queried."""
+    def cooldown_between_queries(self):
+        return self.return_current_multi_value_of(self._cooldown_between_queries)
+
+    @cooldown_between_queries.setter
+    def cooldown_between_queries(self, cooldown_between_queries):
+
+        def sanitise_cooldown_between_queries(unsanitised_cooldown_between_queries):
+
+            if unsanitised_cooldown_between_queries is None or type(unsanitised_cooldown_between_queries) is not int:
+                error_message = "Found invalid type of cooldown_between_queries.\n" + \
+                    "Expected type: int\nFound type: " + str(type(unsanitised_cooldown_between_queries)) + \
+                    "\nFound value: " + str(unsanitised_cooldown_between_queries)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            else:
+
+                if unsanitised_cooldown_between_queries >= 0:
+                    return unsanitised_cooldown_between_queries
+
+                else:
+                    error_message = "Found invalid value for cooldown_between_queries: " + \
+                        "Expected value: greater than 0\n" + \
+                        "Found value:" + str(unsanitised_cooldown_between_queries)
+                    logging.error(error_message)
+                    raise ValueError(error_message)
+
+
+        if type(cooldown_between_queries) is list:
+            unsanitised_list = self.construct_multi_values(cooldown_between_queries)
+            self._cooldown_between_queries = [ sanitise_cooldown_between_queries(e) for e in unsanitised_list ]
+        else:
+            self._cooldown_between_queries = sanitise_cooldown_between_queries(cooldown_between_queries)
+
+
+    # write_empty_results
+
+    @property
+    def write_empty_results(self):
+        return self.return_current_multi_value_of(self._write_empty_results)
+
+    @write_empty_results.setter
+    def write_empty_results(self, write_empty_results):
+
+        def sanitise_write_empty_results(unsanitised_write_empty_results):
+
+            if unsanitised_write_empty_results is None or type(unsanitised_write_empty_results) is not bool:
+                error_message = "Found invalid type of write_empty_results.\n" + \
+                    "Expected type: bool\nFound type: " + str(type(unsanitised_write_empty_results)) + \
+                    "\nFound value: " + str(unsanitised_write_empty_results)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            else:
+                return unsanitised_write_empty_results
+
+
+        if type(write_empty_results) is list:
+            unsanitised_list = self.construct_multi_values(write_empty_results)
+            self._write_empty_results = [ sanitise_write_empty_results(e) for e in unsanitised_list ]
+        else:
+            self._write_empty_results = sanitise_write_empty_results(write_empty_results)
+
+
+    # count_the_results
+
+    @property
+    def count_the_results(self):
+        return self.return_current_multi_value_of(self._count_the_results)
+
+    @count_the_results.setter
+    def count_the_results(self, count_the_results):
+
+        def sanitise_count_the_results(unsanitised_count_the_results):
+
+            if unsanitised_count_the_results is None or type(unsanitised_count_the_results) is not bool:
+                error_message = "Found invalid type of count_the_results.\n" + \
+                    "Expected type: bool\nFound type: " + str(type(unsanitised_count_the_results)) + \
+                    "\nFound value: " + str(unsanitised_count_the_results)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            else:
+                return unsanitised_count_the_results
+
+
+        if type(count_the_results) is list:
+            unsanitised_list = self.construct_multi_values(count_the_results)
+            self._count_the_results = [ sanitise_count_the_results(e) for e in unsanitised_list ]
+        else:
+            self._count_the_results = sanitise_count_the_results(count_the_results)
+
+
+    # count_from_downloaded_results
+
+    @property
+    def count_from_downloaded_results(self):
+        return self.return_current_multi_value_of(self._count_from_downloaded_results)
+
+    @count_from_downloaded_results.setter
+    def count_from_downloaded_results(self, count_from_downloaded_results):
+
+        def sanitise_count_from_downloaded_results(unsanitised_count_from_downloaded_results):
+
+            if unsanitised_count_from_downloaded_results is None or \
+                    type(unsanitised_count_from_downloaded_results) is not bool:
+                error_message = "Found invalid type of count_from_downloaded_results.\n" + \
+                    "Expected type: bool\nFound type: " + str(type(unsanitised_count_from_downloaded_results)) + \
+                    "\nFound value: " + str(unsanitised_count_from_downloaded_results)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            else:
+                return unsanitised_count_from_downloaded_results
+
+
+        if type(count_from_downloaded_results) is list:
+            unsanitised_list = self.construct_multi_values(count_from_downloaded_results)
+            self._count_from_downloaded_results = \
+                [ sanitise_count_from_downloaded_results(e) for e in unsanitised_list ]
+        else:
+            self._count_from_downloaded_results = sanitise_count_from_downloaded_results(count_from_downloaded_results)
+
+
+    # stream_results_to_disk
+
+    @property
+    def stream_results_to_disk(self):
+        return self.return_current_multi_value_of(self._stream_results_to_disk)
+
+    @stream_results_to_disk.setter
+    def stream_results_to_disk(self, stream_results_to_disk):
+
+        def sanitise_stream_results_to_disk(unsanitised_stream_results_to_disk):
+
+            if unsanitised_stream_results_to_disk is None or \
+                    type(unsanitised_stream_results_to_disk) is not bool:
+                error_message = "Found invalid type of stream_results_to_disk.\n" + \
+                    "Expected type: bool\nFound type: " + str(type(unsanitised_stream_results_to_disk)) + \
+                    "\nFound value: " + str(unsanitised_stream_results_to_disk)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            else:
+                return unsanitised_stream_results_to_disk
+
+
+        if type(stream_results_to_disk) is list:
+            unsanitised_list = self.construct_multi_values(stream_results_to_disk)
+            self._stream_results_to_disk = \
+                [ sanitise_stream_results_to_disk(e) for e in unsanitised_list ]
+        else:
+            self._stream_results_to_disk = sanitise_stream_results_to_disk(stream_results_to_disk)
+
+
+    # xlsx_constant_memory
+
+    @property
+    def xlsx_constant_memory(self):
+        return self.return_current_multi_value_of(self._xlsx_constant_memory)
+
+    @xlsx_constant_memory.setter
+    def xlsx_constant_memory(self, xlsx_constant_memory):
+
+        def sanitise_xlsx_constant_memory(unsanitised_xlsx_constant_memory):
+
+            if unsanitised_xlsx_constant_memory is None or \
+                    type(unsanitised_xlsx_constant_memory) is not bool:
+                error_message = "Found invalid type of xlsx_constant_memory.\n" + \
+                    "Expected type: bool\nFound type: " + str(type(unsanitised_xlsx_constant_memory)) + \
+                    "\nFound value: " + str(unsanitised_xlsx_constant_memory)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            else:
+                return unsanitised_xlsx_constant_memory
+
+
+        if type(xlsx_constant_memory) is list:
+            unsanitised_list = self.construct_multi_values(xlsx_constant_memory)
+            self._xlsx_constant_memory = \
+                [ sanitise_xlsx_constant_memory(e) for e in unsanitised_list ]
+        else:
+            self._xlsx_constant_memory = sanitise_xlsx_constant_memory(xlsx_constant_memory)
+
+
+    # max_parallel_queries
+
+    @property
+    def max_parallel_queries(self):
+        return self.return_current_multi_value_of(self._max_parallel_queries)
+
+    @max_parallel_queries.setter
+    def max_parallel_queries(self, max_parallel_queries):
+
+        def sanitise_max_parallel_queries(unsanitised_max_parallel_queries):
+
+            if unsanitised_max_parallel_queries is None or type(unsanitised_max_parallel_queries) is not int:
+                error_message = "Found invalid type of max_parallel_queries.\n" + \
+                    "Expected type: int\nFound type: " + str(type(unsanitised_max_parallel_queries)) + \
+                    "\nFound value: " + str(unsanitised_max_parallel_queries)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            elif unsanitised_max_parallel_queries < 1:
+                error_message = "Found invalid value for max_parallel_queries: " + \
+                    "Expected value: 1 or greater\n" + \
+                    "Found value:" + str(unsanitised_max_parallel_queries)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            else:
+                return unsanitised_max_parallel_queries
+
+
+        if type(max_parallel_queries) is list:
+            unsanitised_list = self.construct_multi_values(max_parallel_queries)
+            self._max_parallel_queries = [ sanitise_max_parallel_queries(e) for e in unsanitised_list ]
+        else:
+            self._max_parallel_queries = sanitise_max_parallel_queries(max_parallel_queries)
+
+
+    # pipeline_queue_size
+
+    @property
+    def pipeline_queue_size(self):
+        return self.return_current_multi_value_of(self._pipeline_queue_size)
+
+    @pipeline_queue_size.setter
+    def pipeline_queue_size(self, pipeline_queue_size):
+
+        def sanitise_pipeline_queue_size(unsanitised_pipeline_queue_size):
+
+            if unsanitised_pipeline_queue_size is None or type(unsanitised_pipeline_queue_size) is not int:
+                error_message = "Found invalid type of pipeline_queue_size.\n" + \
+                    "Expected type: int\nFound type: " + str(type(unsanitised_pipeline_queue_size)) + \
+                    "\nFound value: " + str(unsanitised_pipeline_queue_size)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            elif unsanitised_pipeline_queue_size < 0:
+                error_message = "Found invalid value for pipeline_queue_size: " + \
+                    "Expected value: 0 or greater\n" + \
+                    "Found value:" + str(unsanitised_pipeline_queue_size)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            else:
+                return unsanitised_pipeline_queue_size
+
+
+        if type(pipeline_queue_size) is list:
+            unsanitised_list = self.construct_multi_values(pipeline_queue_size)
+            self._pipeline_queue_size = [ sanitise_pipeline_queue_size(e) for e in unsanitised_list ]
+        else:
+            self._pipeline_queue_size = sanitise_pipeline_queue_size(pipeline_queue_size)
+
+
+    # max_parallel_iterations
+    #
+    # can not be a multi value itself, since it determines how the multi-value iterations are run
+
+    @property
+    def max_parallel_iterations(self):
+        return self._max_parallel_iterations
+
+    @max_parallel_iterations.setter
+    def max_parallel_iterations(self, max_parallel_iterations):
+
+        if type(max_parallel_iterations) is not int or max_parallel_iterations < 1:
+            error_message = "Found invalid max_parallel_iterations.\n" + \
+                "Expected: int of 1 or greater (no multi values)\nFound type: " + \
+                str(type(max_parallel_iterations)) + "\nFound value: " + str(max_parallel_iterations)
+            logging.error(error_message)
+            raise ValueError(error_message)
+
+        self._max_parallel_iterations = max_parallel_iterations
+
+
+    # max_parallel_pages
+
+    @property
+    def max_parallel_pages(self):
+        return self.return_current_multi_value_of(self._max_parallel_pages)
 
-        if self._multi_value_length > 1 :
+    @max_parallel_pages.setter
+    def max_parallel_pages(self, max_parallel_pages):
 
-            if type(self._title) is list:
+        def sanitise_max_parallel_pages(unsanitised_max_parallel_pages):
 
-                found_count = 0
-                for i in range(self._current_multi_value):
-                    if self._title[i] ==  self._title[self._current_multi_value]:
-                        found_count += 1
+            if unsanitised_max_parallel_pages is None or type(unsanitised_max_parallel_pages) is not int:
+                error_message = "Found invalid type of max_parallel_pages.\n" + \
+                    "Expected type: int\nFound type: " + str(type(unsanitised_max_parallel_pages)) + \
+                    "\nFound value: " + str(unsanitised_max_parallel_pages)
+                logging.error(error_message)
+                raise ValueError(error_message)
 
-                if found_count > 0:
-                    return self._title[self._current_multi_value] + " (" + str(found_count+1) + ")"
-                else:
-                    return self._title[self._current_multi_value]
+            elif unsanitised_max_parallel_pages < 1:
+                error_message = "Found invalid value for max_parallel_pages: " + \
+                    "Expected value: 1 or greater\n" + \
+                    "Found value:" + str(unsanitised_max_parallel_pages)
+                logging.error(error_message)
+                raise ValueError(error_message)
 
             else:
-                return self._title + " (" + str(self._current_multi_value+1) + ")"
-        else:
-            return self._title
+                return unsanitised_max_parallel_pages
 
-    @title.setter
-    def title(self, title):
 
-        if type(title) is list:
-            unsanitised_list = self.construct_multi_values(title)
-            self._title = [ str(e) for e in unsanitised_list ]
+        if type(max_parallel_pages) is list:
+            unsanitised_list = self.construct_multi_values(max_parallel_pages)
+            self._max_parallel_pages = [ sanitise_max_parallel_pages(e) for e in unsanitised_list ]
         else:
-            self._title = str(title)
+            self._max_parallel_pages = sanitise_max_parallel_pages(max_parallel_pages)
 
 
-    # description
+    # page_retries
 
     @property
-    def description(self):
-        return self.return_current_multi_value_of(self._description)
+    def page_retries(self):
+        return self.return_current_multi_value_of(self._page_retries)
 
-    @description.setter
-    def description(self, description):
+    @page_retries.setter
+    def page_retries(self, page_retries):
 
-        def sanitise_description(unsanitised_description):
+        def sanitise_page_retries(unsanitised_page_retries):
 
-            if unsanitised_description is None:
-                return ""
-            elif type(unsanitised_description) is str:
-                return unsanitised_description
-            else:
-                error_message = "Found invalid data type for description! \n" + \
-                    "Expected type: str\nFound type: " + str(type(unsanitised_description)) + \
-                    "\nFound value: " + str(unsanitised_description)
+            if unsanitised_page_retries is None or type(unsanitised_page_retries) is not int:
+                error_message = "Found invalid type of page_retries.\n" + \
+                    "Expected type: int\nFound type: " + str(type(unsanitised_page_retries)) + \
+                    "\nFound value: " + str(unsanitised_page_retries)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            elif unsanitised_page_retries < 0:
+                error_message = "Found invalid value for page_retries: " + \
+                    "Expected value: 0 or greater\n" + \
+                    "Found value:" + str(unsanitised_page_retries)
                 logging.error(error_message)
                 raise ValueError(error_message)
 
+            else:
+                return unsanitised_page_retries
 
-        if type(description) is list:
-            unsanitised_list = self.construct_multi_values(description)
-            self._description = [ sanitise_description(e) for e in unsanitised_list ]
+
+        if type(page_retries) is list:
+            unsanitised_list = self.construct_multi_values(page_retries)
+            self._page_retries = [ sanitise_page_retries(e) for e in unsanitised_list ]
         else:
-            self._description = sanitise_description(description)
+            self._page_retries = sanitise_page_retries(page_retries)
 
 
-    # output_destination
+    # max_connections_per_endpoint
 
     @property
-    def output_destination(self):
-        return self.return_current_multi_value_of(self._output_destination)
+    def max_connections_per_endpoint(self):
+        return self.return_current_multi_value_of(self._max_connections_per_endpoint)
 
-    @output_destination.setter
-    def output_destination(self, output_destination):
+    @max_connections_per_endpoint.setter
+    def max_connections_per_endpoint(self, max_connections_per_endpoint):
 
-        def sanitise_output_destination(unsanitised_output_destination):
+        def sanitise_max_connections_per_endpoint(unsanitised_max_connections_per_endpoint):
 
-            if unsanitised_output_destination is None:
-                return "."
-            elif type(unsanitised_output_destination) is str:
-                if unsanitised_output_destination == "" or unsanitised_output_destination.isspace():
-                    return "."
-                else:
-                    return unsanitised_output_destination
-            else:
-                error_message = "Found invalid data type for output_destination! \n" + \
-                    "Expected type: str\nFound type: " + str(type(unsanitised_output_destination)) + \
-                    "\nFound value: " + str(unsanitised_output_destination)
+            if unsanitised_max_connections_per_endpoint is None or \
+                    type(unsanitised_max_connections_per_endpoint) is not int:
+                error_message = "Found invalid type of max_connections_per_endpoint.\n" + \
+                    "Expected type: int\nFound type: " + str(type(unsanitised_max_connections_per_endpoint)) + \
+                    "\nFound value: " + str(unsanitised_max_connections_per_endpoint)
                 logging.error(error_message)
                 raise ValueError(error_message)
 
+            elif unsanitised_max_connections_per_endpoint < 0:
+                error_message = "Found invalid value for max_connections_per_endpoint: " + \
+                    "Expected value: 0 or greater\n" + \
+                    "Found value:" + str(unsanitised_max_connections_per_endpoint)
+                logging.error(error_message)
+                raise ValueError(error_message)
 
-        if type(output_destination) is list:
-            unsanitised_list = self.construct_multi_values(output_destination)
-            self._output_destination = [ sanitise_output_destination(e) for e in unsanitised_list ]
+            else:
+                return unsanitised_max_connections_per_endpoint
+
+
+        if type(max_connections_per_endpoint) is list:
+            unsanitised_list = self.construct_multi_values(max_connections_per_endpoint)
+            self._max_connections_per_endpoint = \
+                [ sanitise_max_connections_per_endpoint(e) for e in unsanitised_list ]
         else:
-            self._output_destination = sanitise_output_destination(output_destination)
+            self._max_connections_per_endpoint = sanitise_max_connections_per_endpoint(max_connections_per_endpoint)
 
 
-    # output_format
+    # query_timeout
 
     @property
-    def output_format(self):
-        return self.return_current_multi_value_of(self._output_format)
+    def query_timeout(self):
+        return self.return_current_multi_value_of(self._query_timeout)
 
-    @output_format.setter
-    def output_format(self, output_format):
+    @query_timeout.setter
+    def query_timeout(self, query_timeout):
 
-        def sanitise_output_format(unsanitised_output_format):
+        def sanitise_query_timeout(unsanitised_query_timeout):
 
-            if unsanitised_output_format is None or type(unsanitised_output_format) is not str:
-                error_message = "No valid output_format found. Possible formats are: \n" + \
-                                 "CSV, TSV, XML, JSON, XLSX\n" + \
-                                 "Found format is " + str(unsanitised_output_format)
+            if unsanitised_query_timeout is None or type(unsanitised_query_timeout) not in (int, float):
+                error_message = "Found invalid type of query_timeout.\n" + \
+                    "Expected type: int or float\nFound type: " + str(type(unsanitised_query_timeout)) + \
+                    "\nFound value: " + str(unsanitised_query_timeout)
                 logging.error(error_message)
                 raise ValueError(error_message)
 
-            if unsanitised_output_format.upper() == "CSV" or unsanitised_output_format.upper() == CSV:
-                return CSV
-            elif unsanitised_output_format.upper() == "TSV" or unsanitised_output_format.upper() == TSV:
-                return TSV
-            elif unsanitised_output_format.upper() == "XML" or unsanitised_output_format.upper() == XML:
-                return XML
-            # TODO: json not working, look into why
-            # elif unsanitised_output_format.upper() == "JSON":
-            #     return JSON
-            elif unsanitised_output_format.upper() == "XLSX" or unsanitised_output_format.upper() == XLSX:
-                return "XLSX"
             else:
-                error_message = "No valid output_format found. Possible formats are: \n" + \
-                                 "CSV, TSV, XML, XLSX\n" + \
-                                 "Found format is " + str(unsanitised_output_format)
-                logging.error(error_message)
-                raise ValueError(error_message)
 
+                if unsanitised_query_timeout >= 0:
+                    return unsanitised_query_timeout
 
-        if type(output_format) is list:
-            unsanitised_list = self.construct_multi_values(output_format)
-            self._output_format = [ sanitise_output_format(e) for e in unsanitised_list ]
+                else:
+                    error_message = "Found invalid value for query_timeout: " + \
+                        "Expected value: 0 or greater (0 means no timeout)\n" + \
+                        "Found value:" + str(unsanitised_query_timeout)
+                    logging.error(error_message)
+                    raise ValueError(error_message)
+
+
+        if type(query_timeout) is list:
+            unsanitised_list = self.construct_multi_values(query_timeout)
+            self._query_timeout = [ sanitise_query_timeout(e) for e in unsanitised_list ]
         else:
-            self._output_format = sanitise_output_format(output_format)
+            self._query_timeout = sanitise_query_timeout(query_timeout)
 
 
-    # summary_sample_limit
+    # retry_policy
+    #
+    # a dictionary; keys which are not set are taken from default_retry_policy
+
+    default_retry_policy = {
+        'max_attempts': 1,
+        'backoff': 1,
+        'max_backoff': 60,
+        'status_codes': [ 500, 502, 503, 504 ],
+    }
 
     @property
-    def summary_sample_limit(self):
-        return self.return_current_multi_value_of(self._summary_sample_limit)
+    def retry_policy(self):
+        return self.return_current_multi_value_of(self._retry_policy)
 
-    @summary_sample_limit.setter
-    def summary_sample_limit(self, summary_sample_limit):
+    @retry_policy.setter
+    def retry_policy(self, retry_policy):
 
-        def sanitise_summary_sample_limit(unsanitised_summary_sample_limit):
+        if type(retry_policy) is list:
+            unsanitised_list = self.construct_multi_values(retry_policy)
+            self._retry_policy = [ self.sanitise_retry_policy(e) for e in unsanitised_list ]
+        else:
+            self._retry_policy = self.sanitise_retry_policy(retry_policy)
 
-            if unsanitised_summary_sample_limit is None or type(unsanitised_summary_sample_limit) is not int:
-                error_message = "Found invalid data type for summary_sample_limit! \n" + \
-                    "Expected type: int\nFound type: " + str(type(unsanitised_count_the_results)) + \
-                    "\nFound value: " + str(unsanitised_count_the_results)
+
+    @classmethod
+    def sanitise_retry_policy(cls, unsanitised_retry_policy):
+        """Validates a retry_policy (of the query collection or of a single query), completes it with defaults"""
+
+        if unsanitised_retry_policy is None:
+            return dict(cls.default_retry_policy)
+
+        retry_policy = dict(cls.default_retry_policy)
+        if type(unsanitised_retry_policy) is dict:
+            retry_policy.update(unsanitised_retry_policy)
+
+        if type(unsanitised_retry_policy) is not dict or \
+                not set(unsanitised_retry_policy).issubset(cls.default_retry_policy) or \
+                type(retry_policy['max_attempts']) is not int or retry_policy['max_attempts'] < 1 or \
+                type(retry_policy['backoff']) not in (int, float) or retry_policy['backoff'] < 0 or \
+                type(retry_policy['max_backoff']) not in (int, float) or retry_policy['max_backoff'] < 0 or \
+                type(retry_policy['status_codes']) is not list or \
+                any(type(code) is not int for code in retry_policy['status_codes']):
+            error_message = "Found invalid retry_policy.\n" + \
+                "Expected: dictionary like { 'max_attempts': 3, 'backoff': 1, 'max_backoff': 60, " + \
+                "'status_codes': [ 500, 502, 503, 504 ] }\n" + \
+                "Found type: " + str(type(unsanitised_retry_policy)) + \
+                "\nFound value: " + str(unsanitised_retry_policy)
+            logging.error(error_message)
+            raise ValueError(error_message)
+
+        return retry_policy
+
+
+    # endpoint_rate_limit
+
+    @property
+    def endpoint_rate_limit(self):
+        return self.return_current_multi_value_of(self._endpoint_rate_limit)
+
+    @endpoint_rate_limit.setter
+    def endpoint_rate_limit(self, endpoint_rate_limit):
+
+        def sanitise_endpoint_rate_limit(unsanitised_endpoint_rate_limit):
+
+            if unsanitised_endpoint_rate_limit is None:
+                return None
+
+            elif type(unsanitised_endpoint_rate_limit) is not dict or \
+                    type(unsanitised_endpoint_rate_limit.get('requests')) is not int or \
+                    type(unsanitised_endpoint_rate_limit.get('interval')) not in (int, float) or \
+                    unsanitised_endpoint_rate_limit['requests'] < 1 or \
+                    unsanitised_endpoint_rate_limit['interval'] <= 0:
+                error_message = "Found invalid endpoint_rate_limit.\n" + \
+                    "Expected: dictionary like { 'requests': 60, 'interval': 60 }\n" + \
+                    "Found type: " + str(type(unsanitised_endpoint_rate_limit)) + \
+                    "\nFound value: " + str(unsanitised_endpoint_rate_limit)
                 logging.error(error_message)
                 raise ValueError(error_message)
 
-            elif unsanitised_summary_sample_limit > 101:
-                message = "Found sample limit which is too high: " + str(unsanitised_summary_sample_limit) + \
-                          ", replaced it with limit of 100"
-                logging.info(message)
-                print(message)
-                return 101
+            else:
+                return unsanitised_endpoint_rate_limit
 
-            elif unsanitised_summary_sample_limit < 0:
-                message = "Found invalid sample limit: " + str(unsanitised_summary_sample_limit) + \
-                          ", replaced it with limit of 5"
-                logging.info(message)
-                print(message)
-                return 5
+
+        if type(endpoint_rate_limit) is list:
+            unsanitised_list = self.construct_multi_values(endpoint_rate_limit)
+            self._endpoint_rate_limit = [ sanitise_endpoint_rate_limit(e) for e in unsanitised_list ]
+        else:
+            self._endpoint_rate_limit = sanitise_endpoint_rate_limit(endpoint_rate_limit)
+
+
+    # google_rate_limit
+
+    @property
+    def google_rate_limit(self):
+        return self.return_current_multi_value_of(self._google_rate_limit)
+
+    @google_rate_limit.setter
+    def google_rate_limit(self, google_rate_limit):
+
+        def sanitise_google_rate_limit(unsanitised_google_rate_limit):
+
+            if unsanitised_google_rate_limit is None:
+                return None
+
+            elif type(unsanitised_google_rate_limit) is not dict or \
+                    type(unsanitised_google_rate_limit.get('requests')) is not int or \
+                    type(unsanitised_google_rate_limit.get('interval')) not in (int, float) or \
+                    unsanitised_google_rate_limit['requests'] < 1 or \
+                    unsanitised_google_rate_limit['interval'] <= 0:
+                error_message = "Found invalid google_rate_limit.\n" + \
+                    "Expected: dictionary like { 'requests': 60, 'interval': 60 }\n" + \
+                    "Found type: " + str(type(unsanitised_google_rate_limit)) + \
+                    "\nFound value: " + str(unsanitised_google_rate_limit)
+                logging.error(error_message)
+                raise ValueError(error_message)
 
             else:
-                return unsanitised_summary_sample_limit
+                return unsanitised_google_rate_limit
 
 
-        if type(summary_sample_limit) is list:
-            unsanitised_list = self.construct_multi_values(summary_sample_limit)
-            self._summary_sample_limit = [sanitise_summary_sample_limit(e) for e in unsanitised_list]
+        if type(google_rate_limit) is list:
+            unsanitised_list = self.construct_multi_values(google_rate_limit)
+            self._google_rate_limit = [ sanitise_google_rate_limit(e) for e in unsanitised_list ]
         else:
-            self._summary_sample_limit = sanitise_summary_sample_limit(summary_sample_limit)
+            self._google_rate_limit = sanitise_google_rate_limit(google_rate_limit)
 
 
-    # cooldown_between_queries
+    # cache_max_age
 
     @property
-    def cooldown_between_queries(self):
-        return self.return_current_multi_value_of(self._cooldown_between_queries)
+    def cache_max_age(self):
+        return self.return_current_multi_value_of(self._cache_max_age)
 
-    @cooldown_between_queries.setter
-    def cooldown_between_queries(self, cooldown_between_queries):
+    @cache_max_age.setter
+    def cache_max_age(self, cache_max_age):
 
-        def sanitise_cooldown_between_queries(unsanitised_cooldown_between_queries):
+        def sanitise_cache_max_age(unsanitised_cache_max_age):
 
-            if unsanitised_cooldown_between_queries is None or type(unsanitised_cooldown_between_queries) is not int:
-                error_message = "Found invalid type of cooldown_between_queries.\n" + \
-                    "Expected type: int\nFound type: " + str(type(unsanitised_cooldown_between_queries)) + \
-                    "\nFound value: " + str(unsanitised_cooldown_between_queries)
+            if unsanitised_cache_max_age is None or type(unsanitised_cache_max_age) is not int:
+                error_message = "Found invalid type of cache_max_age.\n" + \
+                    "Expected type: int\nFound type: " + str(type(unsanitised_cache_max_age)) + \
+                    "\nFound value: " + str(unsanitised_cache_max_age)
                 logging.error(error_message)
                 raise ValueError(error_message)
 
-            else:
-
-                if unsanitised_cooldown_between_queries >= 0:
-                    return unsanitised_cooldown_between_queries
+            elif unsanitised_cache_max_age < 0:
+                error_message = "Found invalid value for cache_max_age: " + \
+                    "Expected value: 0 or greater\n" + \
+                    "Found value:" + str(unsanitised_cache_max_age)
+                logging.error(error_message)
+                raise ValueError(error_message)
 
-                else:
-                    error_message = "Found invalid value for cooldown_between_queries: " + \
-                        "Expected value: greater than 0\n" + \
-                        "Found value:" + str(unsanitised_cooldown_between_queries)
-                    logging.error(error_message)
-                    raise ValueError(error_message)
+            else:
+                return unsanitised_cache_max_age
 
 
-        if type(cooldown_between_queries) is list:
-            unsanitised_list = self.construct_multi_values(cooldown_between_queries)
-            self._cooldown_between_queries = [ sanitise_cooldown_between_queries(e) for e in unsanitised_list ]
+        if type(cache_max_age) is list:
+            unsanitised_list = self.construct_multi_values(cache_max_age)
+            self._cache_max_age = [ sanitise_cache_max_age(e) for e in unsanitised_list ]
         else:
-            self._cooldown_between_queries = sanitise_cooldown_between_queries(cooldown_between_queries)
+            self._cache_max_age = sanitise_cache_max_age(cache_max_age)
 
 
-    # write_empty_results
+    # cache_max_size
 
     @property
-    def write_empty_results(self):
-        return self.return_current_multi_value_of(self._write_empty_results)
+    def cache_max_size(self):
+        return self.return_current_multi_value_of(self._cache_max_size)
 
-    @write_empty_results.setter
-    def write_empty_results(self, write_empty_results):
+    @cache_max_size.setter
+    def cache_max_size(self, cache_max_size):
 
-        def sanitise_write_empty_results(unsanitised_write_empty_results):
+        def sanitise_cache_max_size(unsanitised_cache_max_size):
 
-            if unsanitised_write_empty_results is None or type(unsanitised_write_empty_results) is not bool:
-                error_message = "Found invalid type of write_empty_results.\n" + \
-                    "Expected type: bool\nFound type: " + str(type(unsanitised_write_empty_results)) + \
-                    "\nFound value: " + str(unsanitised_write_empty_results)
+            if unsanitised_cache_max_size is None or type(unsanitised_cache_max_size) is not int:
+                error_message = "Found invalid type of cache_max_size.\n" + \
+                    "Expected type: int\nFound type: " + str(type(unsanitised_cache_max_size)) + \
+                    "\nFound value: " + str(unsanitised_cache_max_size)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            elif unsanitised_cache_max_size < 1:
+                error_message = "Found invalid value for cache_max_size: " + \
+                    "Expected value: 1 or greater\n" + \
+                    "Found value:" + str(unsanitised_cache_max_size)
                 logging.error(error_message)
                 raise ValueError(error_message)
 
             else:
-                return unsanitised_write_empty_results
+                return unsanitised_cache_max_size
 
 
-        if type(write_empty_results) is list:
-            unsanitised_list = self.construct_multi_values(write_empty_results)
-            self._write_empty_results = [ sanitise_write_empty_results(e) for e in unsanitised_list ]
+        if type(cache_max_size) is list:
+            unsanitised_list = self.construct_multi_values(cache_max_size)
+            self._cache_max_size = [ sanitise_cache_max_size(e) for e in unsanitised_list ]
         else:
-            self._write_empty_results = sanitise_write_empty_results(write_empty_results)
+            self._cache_max_size = sanitise_cache_max_size(cache_max_size)
 
 
-    # count_the_results
+    # count_triples_max_age
 
     @property
-    def count_the_results(self):
-        return self.return_current_multi_value_of(self._count_the_results)
+    def count_triples_max_age(self):
+        return self.return_current_multi_value_of(self._count_triples_max_age)
 
-    @count_the_results.setter
-    def count_the_results(self, count_the_results):
+    @count_triples_max_age.setter
+    def count_triples_max_age(self, count_triples_max_age):
 
-        def sanitise_count_the_results(unsanitised_count_the_results):
+        def sanitise_count_triples_max_age(unsanitised_count_triples_max_age):
 
-            if unsanitised_count_the_results is None or type(unsanitised_count_the_results) is not bool:
-                error_message = "Found invalid type of count_the_results.\n" + \
-                    "Expected type: bool\nFound type: " + str(type(unsanitised_count_the_results)) + \
-                    "\nFound value: " + str(unsanitised_count_the_results)
+            if unsanitised_count_triples_max_age is None or type(unsanitised_count_triples_max_age) is not int:
+                error_message = "Found invalid type of count_triples_max_age.\n" + \
+                    "Expected type: int\nFound type: " + str(type(unsanitised_count_triples_max_age)) + \
+                    "\nFound value: " + str(unsanitised_count_triples_max_age)
+                logging.error(error_message)
+                raise ValueError(error_message)
+
+            elif unsanitised_count_triples_max_age < 0:
+                error_message = "Found invalid value for count_triples_max_age: " + \
+                    "Expected value: 0 or greater\n" + \
+                    "Found value:" + str(unsanitised_count_triples_max_age)
                 logging.error(error_message)
                 raise ValueError(error_message)
 
             else:
-                return unsanitised_count_the_results
+                return unsanitised_count_triples_max_age
 
 
-        if type(count_the_results) is list:
-            unsanitised_list = self.construct_multi_values(count_the_results)
-            self._count_the_results = [ sanitise_count_the_results(e) for e in unsanitised_list ]
+        if type(count_triples_max_age) is list:
+            unsanitised_list = self.construct_multi_values(count_triples_max_age)
+            self._count_triples_max_age = [ sanitise_count_triples_max_age(e) for e in unsanitised_list ]
         else:
-            self._count_the_results = sanitise_count_the_results(count_the_results)
+            self._count_triples_max_age = sanitise_count_triples_max_age(count_triples_max_age)
 
 
     # endpoint
@@ -2067,6 +7810,15 @@ class Query_collection_data_object:
         return self._current_multi_value < self._multi_value_length
 
 
+    def report_progress(self, event, query_data_object=None):
+        """Passes an event of the run to the progress_listener (if any) together with this data object and the query
+        data object concerned, if any. Events are: 'iteration_started', 'query_executing', 'query_executed',
+        'query_written' and 'iteration_finished'. Can be called from several threads at once."""
+
+        if self.progress_listener is not None:
+            self.progress_listener(event, self, query_data_object)
+
+
 
 
 class Query_data_object:
@@ -2079,24 +7831,64 @@ class Query_data_object:
         query: the sparql query (mandatory)
         custom_meta_function: arbitrary python code included in the query collection file; if present will be executed
         custom_data_container: arbitrary data field which can be used in conjunction with a custom_meta_function
+        page_size: if set, the query is executed in pages of this many rows each (optional)
+        timeout: overrides query_timeout of the query collection for this query (optional)
+        retry_policy: overrides retry_policy of the query collection for this query (optional)
 
     Attributes handled by querPy internally:
         query_collection_data_object: the associated collection data object (important for multi value coordination)
         id: query data object id (mostly for logging, but also to provide identification for meta function calls)
         results_raw: the result from the sparql query, raw since they are saved as whatever data format was used for it
-        results_matrix: the results converted into a matrix (first row: variables, all others: their values)
+        results_matrix: the results converted into a matrix (first row: variables, all others: their values), stored
+            column by column as Results_matrix
         results_execution_duration: the duration it took the query to be run until a result was returned (or an error)
         query_for_count: an automatically created query adapted from the base query, in order to count the results
         results_line_count: the total number of result lines from a given sparql query
         error_message: in case of an error encountered, the message will be saved and returned using this attribute
+        results_cache_timestamp: when the results were executed, if they were taken from the cache (otherwise None)
+        results_file: the file the results were streamed into (otherwise None); results_matrix then only holds a sample
+        results_pages_durations: the duration of execution of each page, if the query was executed in pages
+        results_attempts: how many requests were sent to the endpoint for the query (including retries)
+        results_count_attempts: how many requests were sent to the endpoint for the query for counting its results
+            (including retries), not included in results_attempts
+        results_retry_duration: how many seconds were spent waiting before retrying requests
+        results_stage_durations: how many seconds were spent in each stage of the query (see 'stages'), summed over all
+            its requests (e.g. its pages, which may run at the same time)
+        results_restored: whether the results were restored from the checkpoint journal instead of executing the query
+        results_reused: whether the restored results are the ones of the previous run, reused since the query did not change
 
     """
 
+    # stages of executing, harmonizing and writing a query, for which their durations are recorded, with their names
+    # as written into summaries. The connection to the endpoint is only timed on its own if pooled connections are
+    # used (see max_connections_per_endpoint), otherwise it is part of the time to the first byte.
+    stages = {
+        'connect': "connect",
+        'first_byte': "time to first byte",
+        'download': "download",
+        'count_query': "count query",
+        'parse': "parse",
+        'harmonize': "harmonize",
+        'write_summary': "write summary",
+        'write_result': "write result",
+        'meta_function': "meta function",
+        'cooldown': "cooldown",
+    }
+
     def __init__(self, query_collection_data_object):
 
         # mandatory attribute: the associated collection_data_object. Thus no default value (=None) assigned to it.
         self._query_collection_data_object = query_collection_data_object
 
+        # the count, pages and retries of a query can be executed in several threads, which all record their attempts
+        # and the durations of their stages
+        self._attempts_lock = threading.Lock()
+        self.results_stage_durations = {}
+
+        # set if the results were restored from the checkpoint journal of an interrupted run, or of the previous run
+        self.results_restored = False
+        self.results_reused = False
+
 
 
     # title
@@ -2223,7 +8015,100 @@ class Query_data_object:
              unsanitised_list = self._query_collection_data_object.construct_multi_values( query )
              self._query = [ sanitise_query(e) for e in unsanitised_list ]
         else:
-            self._query = query
+            self._query = sanitise_query(query)
+
+
+    # page_size
+
+    @property
+    def page_size(self):
+        return self._page_size
+
+    @page_size.setter
+    def page_size(self, page_size):
+
+        if page_size is not None and (type(page_size) is not int or page_size < 1):
+            error_message = "Found invalid page_size of query.\n" + \
+                "Expected: int of 1 or greater\nFound type: " + str(type(page_size)) + \
+                "\nFound value: " + str(page_size)
+            logging.error(error_message)
+            raise ValueError(error_message)
+
+        self._page_size = page_size
+
+
+    # timeout
+    #
+    # if not set for the query itself, the query_timeout of the query collection is used
+
+    @property
+    def timeout(self):
+        if self._timeout is None:
+            return self._query_collection_data_object.query_timeout
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, timeout):
+
+        if timeout is not None and (type(timeout) not in (int, float) or timeout < 0):
+            error_message = "Found invalid timeout of query.\n" + \
+                "Expected: number of 0 or greater\nFound type: " + str(type(timeout)) + \
+                "\nFound value: " + str(timeout)
+            logging.error(error_message)
+            raise ValueError(error_message)
+
+        self._timeout = timeout
+
+
+    # retry_policy
+    #
+    # if not set for the query itself, the retry_policy of the query collection is used
+
+    @property
+    def retry_policy(self):
+        if self._retry_policy is None:
+            return self._query_collection_data_object.retry_policy
+        return self._retry_policy
+
+    @retry_policy.setter
+    def retry_policy(self, retry_policy):
+
+        if retry_policy is None:
+            self._retry_policy = None
+        else:
+            self._retry_policy = Query_collection_data_object.sanitise_retry_policy(retry_policy)
+
+
+    def add_attempts(self, attempts, retry_duration, is_count_query=False):
+        """Records requests sent to the endpoint for this query (or its query for counting the results) and the time
+        spent waiting to retry them"""
+
+        with self._attempts_lock:
+            if is_count_query:
+                self.results_count_attempts += attempts
+            else:
+                self.results_attempts += attempts
+            self.results_retry_duration += retry_duration
+
+
+    def add_stage_durations(self, stage_durations):
+        """Records the durations of stages (dictionary of stage and seconds) of this query, adding them to those
+        recorded already for the same stages"""
+
+        with self._attempts_lock:
+            for stage, duration in stage_durations.items():
+                self.results_stage_durations[stage] = self.results_stage_durations.get(stage, 0) + duration
+
+
+    @contextlib.contextmanager
+    def measure_stage(self, stage):
+        """Context manager recording the time spent within it as duration of the given stage"""
+
+        startTime = time.time()
+        try:
+            yield
+        finally:
+            self.add_stage_durations({ stage: time.time() - startTime })
 
 
     # custom_meta_function
@@ -2257,4 +8142,5 @@ class Query_data_object:
 
 
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,15 @@
 
     
     
+# NOTE: Instead of a python file like this one, a query collection file can also be a declarative json, toml or
+# yaml file (ending with .json, .toml, .yaml or .yml) with the same settings as keys, e.g. in toml:
+#   endpoint = "https://dbpedia.org/sparql"
+#   [[queries]]
+#   title = "Some triples"
+#   query = "SELECT * WHERE { ?s ?p ?o } LIMIT 5"
+# Such files are validated before any query is executed, but can not define the custom functions described below.
+
+
 # -------------------- OPTIONAL SETTINGS -------------------- 
 
 # title
@@ -40,6 +49,7 @@ summary_sample_limit = 3
 
 # cooldown_between_queries
 # defines how many seconds should be waited between execution of individual queries in order to prevent exhaustion of Google API due to too many writes per time-interval
+# NOTE: google_rate_limit (see below) only waits when necessary and should be preferred
 # OPTIONAL, if not set, 0 will be used
 cooldown_between_queries = 0
 
@@ -50,6 +60,135 @@ cooldown_between_queries = 0
 write_empty_results = False
 
 
+# count_from_downloaded_results
+# Should the results be counted from the downloaded results, instead of sending a separate query for counting them?
+# Saves a query per query, but only use this if the endpoint does not truncate its results. Possible values are python boolean values: True, False
+# OPTIONAL, if not set, False will be used
+count_from_downloaded_results = False
+
+
+# stream_results_to_disk
+# Should results be written in chunks directly into the local folder while downloading them, instead of keeping them
+# in memory? Only the rows needed for the summary are read then. Only applies to a local folder as output_destination
+# and csv, tsv, xml or json as output_format. Possible values are python boolean values: True, False
+# OPTIONAL, if not set, False will be used
+stream_results_to_disk = False
+
+
+# xlsx_constant_memory
+# Should xlsx files be written row by row in constant memory, instead of keeping all their cells in memory until the
+# end? Useful for large results in a local xlsx file. The count of all triples in the endpoint is then waited for
+# before executing the queries, since rows can not be changed once written. Possible values are python boolean values:
+# True, False
+# OPTIONAL, if not set, False will be used
+xlsx_constant_memory = False
+
+
+# max_parallel_queries
+# defines how many queries should be executed at the same time. Their results are still written in the order of the queries.
+# Queries having a custom_meta_function are waited for, before any further queries are executed.
+# OPTIONAL, if not set, 1 will be used (i.e. one query after another)
+max_parallel_queries = 1
+
+
+# pipeline_queue_size
+# defines how many queries may wait between the stages of executing queries, harmonizing their results and writing them.
+# These stages run at the same time (e.g. the next query is already executed while the results of the previous one are
+# written), and a stage waits once this many queries are waiting for the next stage, which limits the results kept in
+# memory. If set to 0, every query is executed, harmonized and written before the next one is executed (unless
+# max_parallel_queries is greater than 1).
+# NOTE: if set, queries are executed while earlier ones are still written, so that cooldown_between_queries does not
+# space the requests to the endpoint anymore.
+# OPTIONAL, if not set, 0 will be used
+pipeline_queue_size = 0
+
+
+# max_parallel_iterations
+# defines how many multi-value iterations (e.g. the same queries against several endpoints) should be run at the same
+# time, each in a separate process writing its own output. Can not be a multi value itself.
+# NOTE: custom_meta_function and custom_post_processing are then run in these processes, so they can not change anything
+# used by the other iterations
+# OPTIONAL, if not set, 1 will be used (i.e. one multi-value iteration after another)
+max_parallel_iterations = 1
+
+
+# max_parallel_pages
+# defines how many pages of a query are executed at the same time, for queries which have a page_size set
+# OPTIONAL, if not set, 1 will be used (i.e. one page after another)
+max_parallel_pages = 1
+
+
+# page_retries
+# defines how often a page of a query is executed again if it failed, for queries which have a page_size set
+# OPTIONAL, if not set, 0 will be used
+page_retries = 0
+
+
+# max_connections_per_endpoint
+# defines how many connections to an endpoint are kept open and reused for the queries (and how many are used at most at
+# the same time), which saves setting up a new connection for every query. If 0, a new connection is opened for every query.
+# OPTIONAL, if not set, 0 will be used
+max_connections_per_endpoint = 0
+
+
+# endpoint_rate_limit
+# defines how many requests may be sent to the endpoint within an interval of seconds, e.g. { 'requests': 60, 'interval': 60 }.
+# Requests are only delayed when this limit is reached. If the endpoint responds with 'too many requests' (HTTP 429),
+# querPy waits as long as the endpoint asks for and retries.
+# OPTIONAL, if not set, requests are not limited
+endpoint_rate_limit = None
+
+
+# google_rate_limit
+# defines how many requests may be sent to the google api within an interval of seconds, e.g. { 'requests': 60, 'interval': 60 }.
+# Requests are only delayed when this limit is reached. If google responds with 'too many requests' (HTTP 429),
+# querPy waits as long as google asks for and retries.
+# OPTIONAL, if not set, requests are not limited
+google_rate_limit = None
+
+
+# query_timeout
+# defines after how many seconds a request to the endpoint is cancelled if it has not been answered yet. A cancelled
+# request counts as failed and is retried according to the retry_policy. If 0, querPy waits for each query as long as it takes.
+# Fractions of seconds are rounded up to whole seconds, unless max_connections_per_endpoint is greater than 0.
+# Can be overriden per query (see 'timeout' below)
+# OPTIONAL, if not set, 0 will be used
+query_timeout = 0
+
+
+# retry_policy
+# defines how often requests to the endpoint are sent again if they failed, e.g.
+# { 'max_attempts': 3, 'backoff': 1, 'max_backoff': 60, 'status_codes': [ 500, 502, 503, 504 ] }
+# 'max_attempts' is the number of attempts in total, 'backoff' the seconds waited before the first retry, which double with
+# every further retry (up to 'max_backoff', randomized by +/- 50 %). Timeouts and connection errors are always retried, HTTP
+# errors only if their status code is listed in 'status_codes'. Keys which are not set are taken from the example above,
+# except 'max_attempts', which defaults to 1 (i.e. no retries).
+# Can be overriden per query (see 'retry_policy' below)
+# OPTIONAL, if not set, failed requests are not retried
+retry_policy = None
+
+
+# cache_max_age
+# defines for how many seconds the results of queries are saved in a cache (in the folder 'querPy_cache'), so that
+# identical queries against the same endpoint are not executed again within that time. Use '--no-cache' or
+# '--refresh-cache' when running querPy to ignore or renew the cache. If 0, no cache is used.
+# OPTIONAL, if not set, 0 will be used
+cache_max_age = 0
+
+
+# cache_max_size
+# defines how many megabytes the cache may use at most; if exceeded, the least recently used results are deleted
+# OPTIONAL, if not set, 1000 will be used
+cache_max_size = 1000
+
+
+# count_triples_max_age
+# defines for how many seconds the count of all triples in an endpoint is reused (also across several runs of querPy),
+# instead of counting them again, which can be expensive on large triplestores. If 0, they are counted on every run.
+# OPTIONAL, if not set, 0 will be used
+count_triples_max_age = 0
+
+
 # -------------------- MANDATORY SETTINGS -------------------- 
 
 # endpoint
@@ -70,6 +209,26 @@ queries = [
         # OPTIONAL, if not set, nothing will be used or displayed
         "description" : "Optional description of first query, used to describe the purpose of the query." ,
 
+        # page_size
+        # if set, the query is executed in pages of this many rows each (using LIMIT and OFFSET), whose results are
+        # joined afterwards. Useful for endpoints which limit the size of results or time out on large results.
+        # NOTE: SPARQL does not guarantee that results are returned in the same order by every request, so without an
+        # ORDER BY in the query, pages could overlap or miss rows and the joined results would be wrong. Thus a query
+        # with page_size should contain an ORDER BY (over variables which identify each row), otherwise a warning is
+        # printed when it is executed.
+        # OPTIONAL, if not set, the query is executed as a whole
+        # "page_size" : 10000 ,
+
+        # timeout
+        # overrides query_timeout (see above) for this query
+        # OPTIONAL, if not set, query_timeout is used
+        # "timeout" : 600 ,
+
+        # retry_policy
+        # overrides retry_policy (see above) for this query
+        # OPTIONAL, if not set, retry_policy is used
+        # "retry_policy" : { 'max_attempts': 3 } ,
+
         # query
         # the sparql query itself
         # NOTE: best practise is to attach a 'r' before the string so that python would not interpret some characters as metacharacters, e.g. "\n"
@@ -126,13 +285,20 @@ This dictionary has the following keys and respective values:
 'query_title' - title of an individual query, as defined above.
 'results_matrix' - the result data organized as a two dimensional list, where the first row contains the headers. 
 This value is what you would most likely need to post process the result data.  
+Its values are converted into int, float, bool, date or datetime where possible, one type per column. The columns
+themselves are available as 'results_matrix.columns' (with their types in 'results_matrix.column_types'), which is
+faster than going through the rows on large results.
+Its rows can be changed like those of a list (also appending, inserting or deleting rows). All rows are constructed
+once they are accessed, after which the columns are taken from the rows (so changing the columns themselves only has
+an effect as long as no row was accessed).
 
 * other than these two, each query dictionary also contains data from and for querPy, which might be of use:
 'query_description' - description of an individual query, as defined above.
 'query_text' - the sparql query itself.
 'results_execution_duration' - the duration it took to run the sparql query.
+'results_stage_durations' - how many seconds were spent in each stage of the query (e.g. 'first_byte', 'download', 'parse', 'harmonize', 'write_result').
 'results_lines_count' - the number of lines the sparql query produced at the triplestore.
-'results_raw' - the result data in the specified format, encapsulated by its respective python class (e.g. a python json object).
+'results_raw' - the result data in the specified format, as the raw bytes received from the endpoint (or the path of the file they were streamed into).
 'query_for_count' - an infered query from the original query, is used to get number of result lines at the triplestore.
 
 As an example to print the raw data from the second query defined above, write:
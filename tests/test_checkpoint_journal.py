@@ -0,0 +1,156 @@
+import datetime
+import json
+
+import querPy
+
+
+def start_run(tmp_path, timestamp_start="260101_120000", incremental=False):
+
+    checkpoint_journal = querPy.Checkpoint_journal(tmp_path / "collection_0123.json")
+    checkpoint_journal.start("collection.py", timestamp_start, incremental)
+
+    return checkpoint_journal
+
+
+def interrupt_iteration(checkpoint_journal, multi_value_index):
+    """Records a query of an iteration as completed, without completing the iteration"""
+
+    checkpoint_journal.start_iteration(multi_value_index, False)
+    checkpoint_journal.append_to_iteration({ 'queries': { "1": { 'id': 1 } } })
+
+
+def test_fresh_run_starts_new_iterations(tmp_path):
+
+    checkpoint_journal = start_run(tmp_path)
+    assert checkpoint_journal.start_iteration(0, False)
+    checkpoint_journal.complete_iteration()
+    interrupt_iteration(checkpoint_journal, 1)
+
+    # a new run started in the same second has the same timestamp
+    checkpoint_journal = start_run(tmp_path)
+
+    assert checkpoint_journal.start_iteration(0, False)
+    assert checkpoint_journal.iteration['queries'] == {}
+    assert checkpoint_journal.start_iteration(1, False)
+    assert checkpoint_journal.iteration['queries'] == {}
+
+
+def test_fresh_run_deletes_journals_of_iterations_with_same_timestamp(tmp_path):
+
+    checkpoint_journal = start_run(tmp_path)
+    checkpoint_journal.start_iteration(0, False)
+    checkpoint_journal.complete_iteration()
+
+    checkpoint_journal = start_run(tmp_path)
+
+    # e.g. worker processes of multi-value iterations, which load the journal
+    checkpoint_journal = querPy.Checkpoint_journal(tmp_path / "collection_0123.json")
+    assert checkpoint_journal.load()
+    assert checkpoint_journal.start_iteration(0, True)
+
+
+def test_resumed_run_skips_completed_iterations(tmp_path):
+
+    checkpoint_journal = start_run(tmp_path)
+    checkpoint_journal.start_iteration(0, False)
+    checkpoint_journal.complete_iteration()
+
+    checkpoint_journal = querPy.Checkpoint_journal(tmp_path / "collection_0123.json")
+    assert checkpoint_journal.load()
+    assert checkpoint_journal.timestamp_start == "260101_120000"
+    assert not checkpoint_journal.start_iteration(0, True)
+
+
+def test_resumed_run_continues_interrupted_iterations(tmp_path):
+
+    interrupt_iteration(start_run(tmp_path), 0)
+
+    checkpoint_journal = querPy.Checkpoint_journal(tmp_path / "collection_0123.json")
+    assert checkpoint_journal.load()
+    assert checkpoint_journal.start_iteration(0, True)
+    assert checkpoint_journal.iteration['queries'] == { "1": { 'id': 1 } }
+
+
+def test_load_without_journal(tmp_path):
+
+    assert not querPy.Checkpoint_journal(tmp_path / "missing.json").load()
+
+
+def test_output_location_is_kept_for_resuming(tmp_path):
+
+    checkpoint_journal = start_run(tmp_path)
+    checkpoint_journal.start_iteration(0, False)
+    checkpoint_journal.set_output_location({ 'folder': "out" })
+
+    checkpoint_journal = querPy.Checkpoint_journal(tmp_path / "collection_0123.json")
+    checkpoint_journal.load()
+    checkpoint_journal.start_iteration(0, True)
+
+    assert checkpoint_journal.get_output_location() == { 'folder': "out" }
+
+
+def test_changes_are_appended_as_lines_and_compacted_once_complete(tmp_path):
+
+    checkpoint_journal = start_run(tmp_path)
+    checkpoint_journal.start_iteration(0, False)
+    checkpoint_journal.set_output_location({ 'folder': "out" })
+    for query_id in range(1, 4):
+        checkpoint_journal.append_to_iteration({ 'queries': { str(query_id): { 'id': query_id } } })
+
+    assert len(checkpoint_journal.iteration_file_path.read_text().splitlines()) == 5
+
+    checkpoint_journal.complete_iteration()
+
+    lines = checkpoint_journal.iteration_file_path.read_text().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0]) == {
+        'complete': True,
+        'output_location': { 'folder': "out" },
+        'queries': { "1": { 'id': 1 }, "2": { 'id': 2 }, "3": { 'id': 3 } },
+    }
+
+
+def test_incomplete_last_line_is_ignored(tmp_path):
+
+    checkpoint_journal = start_run(tmp_path)
+    interrupt_iteration(checkpoint_journal, 0)
+    with checkpoint_journal.iteration_file_path.open('a') as fw:
+        fw.write('{"queries": {"2": {"id"')
+
+    checkpoint_journal = querPy.Checkpoint_journal(tmp_path / "collection_0123.json")
+    checkpoint_journal.load()
+    assert checkpoint_journal.start_iteration(0, True)
+    assert checkpoint_journal.iteration['queries'] == { "1": { 'id': 1 } }
+
+
+def test_disabled_journal_writes_nothing(tmp_path):
+
+    checkpoint_journal = querPy.Checkpoint_journal(tmp_path / "checkpoints" / "collection_0123.json", False)
+    checkpoint_journal.start("collection.py", "260101_120000")
+    assert checkpoint_journal.start_iteration(0, False)
+    checkpoint_journal.set_output_location({ 'folder': "out" })
+    checkpoint_journal.record_query(None, None)
+    checkpoint_journal.complete_iteration()
+    checkpoint_journal.clean_up()
+
+    assert checkpoint_journal.get_output_location() == { 'folder': "out" }
+    assert not (tmp_path / "checkpoints").exists()
+
+
+def test_kept_results_keep_their_types(tmp_path):
+
+    results_matrix = querPy.Results_matrix.from_rows([
+        [ "s", "count", "share", "date", "time" ],
+        [ "a", "1", "0.5", "2020-01-31", "2020-01-31T10:00:00+01:00" ],
+        [ "b", "2", "1.5", "", "2021-12-01T00:00:00" ],
+    ])
+    checkpoint_journal = start_run(tmp_path)
+    results_file = tmp_path / "1.jsonl"
+    checkpoint_journal.write_atomically(results_file, results_matrix.iter_rows())
+
+    with results_file.open('r') as fr:
+        restored = querPy.Results_matrix.from_typed_rows(
+            json.loads(line, object_hook=checkpoint_journal.decode_value) for line in fr)
+
+    assert list(restored) == list(results_matrix)
+    assert restored.column_types == [ str, int, float, datetime.date, datetime.datetime ]
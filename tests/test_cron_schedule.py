@@ -0,0 +1,82 @@
+import datetime
+
+import pytest
+
+import querPy
+
+
+def get_next(expression, after):
+
+    return querPy.Cron_schedule(expression).get_next(datetime.datetime(*after))
+
+
+def test_fields_are_parsed():
+
+    schedule = querPy.Cron_schedule("*/15 8-10,22 1 */5 7")
+
+    assert schedule.minutes == { 0, 15, 30, 45 }
+    assert schedule.hours == { 8, 9, 10, 22 }
+    assert schedule.days == { 1 }
+    assert schedule.months == { 1, 6, 11 }
+    assert schedule.weekdays == { 0 }
+
+
+def test_step_from_single_value_runs_until_maximum():
+
+    assert querPy.Cron_schedule("5/20 * * * *").minutes == { 5, 25, 45 }
+
+
+def test_next_time_is_after_given_one():
+
+    assert get_next("*/15 * * * *", (2026, 3, 1, 10, 0, 30)) == datetime.datetime(2026, 3, 1, 10, 15)
+    assert get_next("*/15 * * * *", (2026, 3, 1, 10, 14, 59)) == datetime.datetime(2026, 3, 1, 10, 15)
+    assert get_next("0 0 * * *", (2026, 12, 31, 23, 59)) == datetime.datetime(2027, 1, 1, 0, 0)
+
+
+def test_shortcuts():
+
+    assert get_next("@hourly", (2026, 3, 1, 10, 5)) == datetime.datetime(2026, 3, 1, 11, 0)
+    assert get_next("@monthly", (2026, 3, 1, 10, 5)) == datetime.datetime(2026, 4, 1, 0, 0)
+    assert get_next("@yearly", (2026, 3, 1, 10, 5)) == datetime.datetime(2027, 1, 1, 0, 0)
+
+
+def test_day_of_week_counts_from_sunday():
+
+    # 2026-03-01 is a sunday
+    assert get_next("0 12 * * 0", (2026, 2, 26, 0, 0)) == datetime.datetime(2026, 3, 1, 12, 0)
+    assert get_next("0 12 * * 7", (2026, 2, 26, 0, 0)) == datetime.datetime(2026, 3, 1, 12, 0)
+    assert get_next("0 12 * * 1-5", (2026, 2, 27, 13, 0)) == datetime.datetime(2026, 3, 2, 12, 0)
+
+
+def test_either_day_field_matches_if_both_are_restricted():
+
+    # the 15th, or any monday (2026-03-02)
+    assert get_next("0 0 15 * 1", (2026, 3, 1, 0, 0)) == datetime.datetime(2026, 3, 2, 0, 0)
+    assert get_next("0 0 15 * 1", (2026, 3, 10, 0, 0)) == datetime.datetime(2026, 3, 15, 0, 0)
+
+    # only the day of month restricted: the 15th, whatever day of the week it is
+    assert get_next("0 0 15 * *", (2026, 3, 1, 0, 0)) == datetime.datetime(2026, 3, 15, 0, 0)
+
+
+def test_leap_day():
+
+    assert get_next("0 0 29 2 *", (2026, 3, 1, 0, 0)) == datetime.datetime(2028, 2, 29, 0, 0)
+
+
+@pytest.mark.parametrize("expression", [
+    "* * * *",
+    "60 * * * *",
+    "* 24 * * *",
+    "* * 0 * *",
+    "* * * 13 *",
+    "* * * * 8",
+    "10-5 * * * *",
+    "*/0 * * * *",
+    "a * * * *",
+    "@often",
+    "0 0 30 2 *",
+])
+def test_invalid_schedules_are_rejected(expression):
+
+    with pytest.raises(ValueError):
+        querPy.Cron_schedule(expression)
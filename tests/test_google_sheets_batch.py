@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+import querPy
+
+
+class Fake_service_sheets:
+    """Records the calls of spreadsheets().batchUpdate and spreadsheets().values().batchUpdate"""
+
+    def __init__(self):
+        self.calls = []
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return Fake_values(self.calls)
+
+    def batchUpdate(self, spreadsheetId, body):
+        return ("requests", body['requests'])
+
+
+class Fake_values:
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def batchUpdate(self, spreadsheetId, body):
+        return ("values", [ value_range['range'] for value_range in body['data'] ])
+
+
+def create_batch(max_delay=30, fail=False):
+
+    service_sheets = Fake_service_sheets()
+    threads = []
+
+    def execute_request(request, http=None):
+        threads.append(threading.current_thread())
+        if fail:
+            raise RuntimeError("google api not reachable")
+        service_sheets.calls.append(request)
+
+    batch = querPy.Google_sheets_batch(execute_request, service_sheets, "sheet", lambda: "http")
+    batch.max_delay = max_delay
+
+    return batch, service_sheets.calls, threads
+
+
+def wait_for(condition, timeout=5):
+
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.01)
+
+
+def test_requests_and_values_are_sent_in_one_call_each():
+
+    batch, calls, threads = create_batch()
+    recorded = []
+
+    batch.add_requests([ { 'addSheet': {} } ])
+    batch.add_values("'1. a'!A1:B1", [[ "s", "o" ]])
+    batch.add_values("'2. b'!A1:A1", [[ "s" ]])
+    batch.add_callback(lambda: recorded.append(len(calls)))
+
+    assert calls == []
+    batch.flush()
+
+    assert calls == [ ("requests", [ { 'addSheet': {} } ]), ("values", [ "'1. a'!A1:B1", "'2. b'!A1:A1" ]) ]
+    assert recorded == [ 2 ]
+    assert batch.calls_count == 2
+
+
+def test_queue_is_flushed_after_max_delay_without_anything_queued_afterwards():
+
+    batch, calls, threads = create_batch(max_delay=0.1)
+    recorded = []
+
+    batch.add_values("'1. a'!A1:A1", [[ "s" ]])
+    batch.add_callback(lambda: recorded.append(True))
+
+    wait_for(lambda: recorded)
+
+    assert calls == [ ("values", [ "'1. a'!A1:A1" ]) ]
+    assert threads[0] is not threading.main_thread()
+    assert batch.time_first_queued is None
+
+
+def test_flush_cancels_timer():
+
+    batch, calls, threads = create_batch(max_delay=0.1)
+
+    batch.add_values("'1. a'!A1:A1", [[ "s" ]])
+    batch.flush()
+    time.sleep(0.3)
+
+    assert len(calls) == 1
+
+
+def test_error_of_flush_by_timer_is_raised_later():
+
+    batch, calls, threads = create_batch(max_delay=0.1, fail=True)
+
+    batch.add_values("'1. a'!A1:A1", [[ "s" ]])
+    wait_for(lambda: batch.timer_error is not None)
+
+    with pytest.raises(RuntimeError):
+        batch.add_values("'2. b'!A1:A1", [[ "s" ]])
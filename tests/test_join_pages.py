@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from SPARQLWrapper import CSV, TSV, XML, JSON
+
+import querPy
+
+
+def get_xml(values):
+
+    results = "".join('<result><binding name="x"><literal>' + str(value) + '</literal></binding></result>'
+                      for value in values)
+    results_element = "<results>" + results + "</results>" if len(values) > 0 else "<results/>"
+
+    return ('<?xml version="1.0"?><sparql xmlns="http://www.w3.org/2005/sparql-results#"><head><variable name="x"/>'
+            '</head>' + results_element + '</sparql>').encode('utf-8')
+
+
+def get_json(values):
+
+    return json.dumps({ 'head': { 'vars': [ "x" ] }, 'results': { 'bindings': [
+        { 'x': { 'type': "literal", 'value': str(value) } } for value in values ] } }).encode('utf-8')
+
+
+def get_values(results, results_format):
+    """Returns the values of the variable x in the results, read with querPy's parsers"""
+
+    parser = querPy.Xml_results_parser() if results_format == XML else querPy.Json_results_parser()
+    parser.feed(results)
+    parser.close()
+
+    return [ row[0] for row in list(parser.get_results_matrix())[1:] ]
+
+
+def test_join_csv_pages():
+
+    pages = [ b"x\r\n1\r\n2\r\n", b"x\r\n3\r\n4\r\n", b"x\r\n5" ]
+
+    assert querPy.join_pages(pages, CSV, None) == b"x\r\n1\r\n2\r\n3\r\n4\r\n5"
+
+
+def test_join_tsv_pages_without_trailing_newline_and_empty_page():
+
+    pages = [ b"?x\n1", b"?x\n2\n", b"?x\n" ]
+
+    assert querPy.join_pages(pages, TSV, None) == b"?x\n1\n2\n"
+
+
+@pytest.mark.parametrize("results_format, get_results", [ (XML, get_xml), (JSON, get_json) ])
+def test_join_pages(results_format, get_results):
+
+    pages = [ get_results([ 1, 2 ]), get_results([ 3, 4 ]), get_results([ 5 ]) ]
+
+    assert get_values(querPy.join_pages(pages, results_format, None), results_format) == [ 1, 2, 3, 4, 5 ]
+
+
+@pytest.mark.parametrize("results_format, get_results", [ (XML, get_xml), (JSON, get_json) ])
+def test_join_pages_with_empty_last_page(results_format, get_results):
+
+    pages = [ get_results([ 1, 2 ]), get_results([]) ]
+
+    assert get_values(querPy.join_pages(pages, results_format, None), results_format) == [ 1, 2 ]
+
+
+@pytest.mark.parametrize("results_format, get_results", [ (XML, get_xml), (JSON, get_json) ])
+def test_join_pages_streamed_to_disk(tmp_path, results_format, get_results):
+
+    pages = []
+    for i, values in enumerate([ [ 1, 2 ], [], [ 3 ] ]):
+        pages.append(tmp_path / ("page" + str(i)))
+        pages[-1].write_bytes(get_results(values))
+    local_file = tmp_path / "results"
+
+    assert querPy.join_pages(pages, results_format, local_file) == local_file
+    assert get_values(local_file.read_bytes(), results_format) == [ 1, 2, 3 ]
+
+
+def test_join_csv_pages_streamed_to_disk(tmp_path):
+
+    pages = []
+    for i, content in enumerate([ b"x\r\n1\r\n2\r\n", b"x\r\n3\r\n" ]):
+        pages.append(tmp_path / ("page" + str(i)))
+        pages[-1].write_bytes(content)
+    local_file = tmp_path / "results.csv"
+
+    querPy.join_pages(pages, CSV, local_file)
+
+    assert local_file.read_bytes() == b"x\r\n1\r\n2\r\n3\r\n"
+
+
+def test_join_tsv_pages_without_trailing_newline_streamed_to_disk(tmp_path):
+
+    pages = []
+    for i, content in enumerate([ b"?x\n1", b"?x\n2\n", b"?x\n" ]):
+        pages.append(tmp_path / ("page" + str(i)))
+        pages[-1].write_bytes(content)
+    local_file = tmp_path / "results.tsv"
+
+    querPy.join_pages(pages, TSV, local_file)
+
+    assert local_file.read_bytes() == querPy.join_pages([ page.read_bytes() for page in pages ], TSV, None) == b"?x\n1\n2\n"
+
+
+def test_split_empty_xml_results():
+
+    head, results, tail = querPy.split_results(get_xml([]), XML)
+
+    assert head.endswith(b"<results>") and results == b"" and tail.startswith(b"</results>")
@@ -0,0 +1,102 @@
+import datetime
+import json
+
+import pytest
+
+import querPy
+
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+RESULTS = json.dumps({
+    'head': { 'vars': [ "s", "count", "label", "date" ] },
+    'results': { 'bindings': [
+        {
+            's': { 'type': "uri", 'value': "http://ex.org/1" },
+            'count': { 'type': "literal", 'datatype': XSD + "integer", 'value': "1" },
+            'label': { 'type': "literal", 'xml:lang': "de", 'value': "Käse" },
+            'date': { 'type': "literal", 'datatype': XSD + "date", 'value': "2020-01-31" },
+        },
+        {
+            'count': { 'type': "typed-literal", 'datatype': XSD + "integer", 'value': "2" },
+            's': { 'type': "bnode", 'value': "b0" },
+            'label': { 'type': "literal", 'value': "7" },
+        },
+        {
+            's': { 'type': "uri", 'value': "http://ex.org/3" },
+            'count': { 'type': "literal", 'datatype': XSD + "integer", 'value': "3" },
+            'label': { 'type': "literal", 'value': "" },
+            'date': { 'type': "literal", 'datatype': XSD + "date", 'value': "2021-12-01" },
+        },
+    ] },
+}, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def parse(results, limit=None, chunk_size=None):
+
+    parser = querPy.Json_results_parser(limit)
+    chunk_size = chunk_size or len(results)
+    for start in range(0, len(results), chunk_size):
+        parser.feed(results[start:start + chunk_size])
+    parser.close()
+
+    return parser
+
+
+def test_values_are_collected_by_variable():
+
+    results_matrix = parse(RESULTS).get_results_matrix()
+
+    assert list(results_matrix) == [
+        [ "s", "count", "label", "date" ],
+        [ "http://ex.org/1", 1, "Käse", datetime.date(2020, 1, 31) ],
+        [ "b0", 2, "7", "" ],
+        [ "http://ex.org/3", 3, "", datetime.date(2021, 12, 1) ],
+    ]
+    assert results_matrix.column_types == [ str, int, str, datetime.date ]
+
+
+def test_results_fed_in_chunks_are_the_same():
+
+    # also splits the two bytes of 'ä'
+    assert list(parse(RESULTS, chunk_size=1).get_results_matrix()) == list(parse(RESULTS).get_results_matrix())
+
+
+def test_limit_collects_first_rows_but_counts_all():
+
+    parser = parse(RESULTS, limit=2)
+
+    assert parser.rows_count == 3
+    assert [ row[1] for row in parser.get_results_matrix() ] == [ "count", 1, 2 ]
+
+
+def test_variables_not_in_head_are_put_last():
+
+    results = json.dumps({ 'head': { 'vars': [ "a" ] }, 'results': { 'bindings': [
+        { 'b': { 'type': "literal", 'value': "x" } },
+        { 'a': { 'type': "literal", 'value': "y" }, 'b': { 'type': "literal", 'value': "z" } },
+    ] } }).encode('utf-8')
+
+    assert list(parse(results).get_results_matrix()) == [ [ "a", "b" ], [ "", "x" ], [ "y", "z" ] ]
+
+
+def test_variables_given_after_bindings():
+
+    results = b'{"results": {"bindings": [{"b": {"type": "literal", "value": "1"}}]}, "head": {"vars": ["a", "b"]}}'
+
+    assert list(parse(results).get_results_matrix()) == [ [ "a", "b" ], [ "", 1 ] ]
+
+
+def test_results_without_bindings():
+
+    parser = parse(b'{"head": {}, "boolean": true}')
+
+    assert parser.rows_count == 0
+    assert list(parser.get_results_matrix()) == [ [] ]
+
+
+@pytest.mark.parametrize("results", [ RESULTS[:len(RESULTS) // 2], b'{"head": {}, "boolean": tru' ])
+def test_incomplete_results_are_rejected(results):
+
+    with pytest.raises(ValueError):
+        parse(results)
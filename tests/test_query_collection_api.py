@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+import querPy
+
+
+@pytest.fixture
+def api(tmp_path):
+
+    collections_folder = tmp_path / "collections"
+    (collections_folder / "sub").mkdir(parents=True)
+    (collections_folder / "counts.py").write_text("endpoint = 'http://127.0.0.1:1/sparql'\nqueries = []\n")
+    (collections_folder / "sub" / "types.json").write_text('{ "endpoint": "http://127.0.0.1:1/sparql", "queries": [] }')
+    (tmp_path / "outside.py").write_text("endpoint = 'http://127.0.0.1:1/sparql'\nqueries = []\n")
+
+    api = querPy.Query_collection_api("127.0.0.1", 0, {}, collections_folder)
+    yield api
+    api.server.server_close()
+
+
+def test_collection_files_are_found_by_name(api):
+
+    assert api.get_query_collection_path("counts.py") == api.collections_folder / "counts.py"
+    assert api.get_query_collection_path("sub/types.json") == api.collections_folder / "sub" / "types.json"
+    assert api.get_query_collection_path("sub/../counts.py") == api.collections_folder / "counts.py"
+    assert api.get_query_collection_path("missing.py") is None
+    assert api.get_query_collection_path("sub") is None
+
+
+def test_collection_files_outside_of_folder_are_not_found(api, tmp_path):
+
+    assert api.get_query_collection_path("../outside.py") is None
+    assert api.get_query_collection_path(str(tmp_path / "outside.py")) is None
+
+    (api.collections_folder / "link.py").symlink_to(tmp_path / "outside.py")
+    assert api.get_query_collection_path("link.py") is None
+
+
+def test_missing_collections_folder_is_rejected(tmp_path):
+
+    with pytest.raises(ValueError):
+        querPy.Query_collection_api("127.0.0.1", 0, {}, tmp_path / "missing")
+
+
+def test_loading_from_several_threads_keeps_modules_apart(tmp_path):
+
+    loader = querPy.Query_collection_loader(tmp_path / "cache")
+    for i in range(8):
+        (tmp_path / ("collection_" + str(i) + ".py")).write_text(
+            "import sys\ntitle = " + str(i) + "\nsame_module = sys.modules['conf'].__dict__ is globals()\n")
+
+    modules = {}
+
+    def load(i):
+        modules[i] = loader.load(tmp_path / ("collection_" + str(i) + ".py"))
+
+    threads = [ threading.Thread(target=load, args=(i % 8,)) for i in range(32) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for i, module in modules.items():
+        assert module.title == i
+        assert module.same_module
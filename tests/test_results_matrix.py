@@ -0,0 +1,85 @@
+import datetime
+
+import querPy
+
+
+def get_results_matrix():
+
+    return querPy.Results_matrix.from_rows([
+        [ "s", "count", "date" ],
+        [ "a", "1", "2020-01-31" ],
+        [ "b", "2", "" ],
+        [ "c", "3", "2021-12-01" ],
+    ])
+
+
+def test_columns_are_typed():
+
+    results_matrix = get_results_matrix()
+
+    assert results_matrix.variables == [ "s", "count", "date" ]
+    assert list(results_matrix.columns[1]) == [ 1, 2, 3 ]
+    assert results_matrix.column_types == [ str, int, datetime.date ]
+    assert results_matrix.rows_count == 3
+    assert len(results_matrix) == 4
+
+
+def test_behaves_like_list_of_rows():
+
+    results_matrix = get_results_matrix()
+
+    assert results_matrix[0] == [ "s", "count", "date" ]
+    assert results_matrix[-1] == [ "c", 3, datetime.date(2021, 12, 1) ]
+    assert results_matrix[1:3] == [ [ "a", 1, datetime.date(2020, 1, 31) ], [ "b", 2, "" ] ]
+    assert results_matrix == [ row for row in results_matrix ]
+
+
+def test_changed_rows_are_kept():
+
+    results_matrix = get_results_matrix()
+
+    results_matrix[1][1] = 10
+    for row in results_matrix[1:]:
+        row[0] = row[0].upper()
+    results_matrix.append([ "d", 4, "" ])
+    del results_matrix[2]
+    results_matrix.insert(1, [ "e", 5, datetime.date(2022, 2, 2) ])
+
+    assert list(results_matrix) == [
+        [ "s", "count", "date" ],
+        [ "e", 5, datetime.date(2022, 2, 2) ],
+        [ "A", 10, datetime.date(2020, 1, 31) ],
+        [ "C", 3, datetime.date(2021, 12, 1) ],
+        [ "d", 4, "" ],
+    ]
+    assert results_matrix.rows_count == 4
+    assert results_matrix.columns[0] == [ "e", "A", "C", "d" ]
+    assert results_matrix.column_types == [ str, int, datetime.date ]
+
+
+def test_column_of_changed_values_of_several_types_is_str():
+
+    results_matrix = get_results_matrix()
+    results_matrix[2][1] = "two"
+
+    assert results_matrix.column_types == [ str, str, datetime.date ]
+
+
+def test_reading_rows_does_not_construct_them():
+
+    results_matrix = get_results_matrix()
+
+    assert querPy.get_result_rows(results_matrix, 0, 2) == [ [ "s", "count", "date" ], [ "a", 1, datetime.date(2020, 1, 31) ] ]
+    assert querPy.get_result_rows(results_matrix, 3) == [ [ "c", 3, datetime.date(2021, 12, 1) ] ]
+    assert results_matrix.rows is None
+
+    # plain rows, e.g. restored from a checkpoint journal
+    assert querPy.get_result_rows([ [ "error" ] ], 0, 2) == [ [ "error" ] ]
+
+
+def test_short_rows_are_filled_up():
+
+    # e.g. csv results whose last line was cut off
+    results_matrix = querPy.Results_matrix.from_rows([ [ "s", "count" ], [ "a", "1" ], [ "b" ], [] ])
+
+    assert list(results_matrix) == [ [ "s", "count" ], [ "a", 1 ], [ "b", "" ], [ "", "" ] ]
@@ -0,0 +1,191 @@
+import socketserver
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+from SPARQLWrapper import CSV, SPARQLExceptions
+
+import querPy
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Answers '/sparql' with a csv result, '/redirect/<status>' with a redirect to '/sparql', '/loop' with a redirect
+    to itself and '/status/<status>' with that status"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+
+        path = self.path.split("?", 1)[0]
+
+        if path == "/sparql":
+            self.respond(200, b"s\r\nhttp://example.org/s\r\n", { 'Content-Type': "text/csv" })
+        elif path.startswith("/redirect/"):
+            self.respond(int(path.rsplit("/", 1)[1]), b"", { 'Location': "/sparql?" + self.path.split("?", 1)[1] })
+        elif path == "/loop":
+            self.respond(302, b"", { 'Location': self.path })
+        else:
+            self.respond(int(path.rsplit("/", 1)[1]), b"error")
+
+    def respond(self, status, body, headers={}):
+
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture(scope="module")
+def endpoint():
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:" + str(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client():
+
+    client = querPy.Sparql_http_client()
+    yield client
+    client.close()
+
+
+def test_returns_body_of_successful_response(endpoint, client):
+
+    results, duration = client.execute_query("SELECT * WHERE { ?s ?p ?o }", endpoint + "/sparql", CSV, 2)
+
+    assert results == b"s\r\nhttp://example.org/s\r\n"
+
+
+@pytest.mark.parametrize("status", [ 301, 302, 303, 307, 308 ])
+def test_follows_redirects(endpoint, client, status):
+
+    results, duration = client.execute_query("SELECT * WHERE { ?s ?p ?o }", endpoint + "/redirect/" + str(status), CSV, 2)
+
+    assert results == b"s\r\nhttp://example.org/s\r\n"
+
+
+def test_raises_for_too_many_redirects(endpoint, client):
+
+    with pytest.raises(querPy.Endpoint_http_error) as ex:
+        client.execute_query("SELECT * WHERE { ?s ?p ?o }", endpoint + "/loop", CSV, 2)
+
+    assert ex.value.code == 302
+
+
+def test_redirect_is_not_written_into_file(endpoint, client, tmp_path):
+
+    file_path = tmp_path / "results.csv"
+    client.execute_query_to_file("SELECT * WHERE { ?s ?p ?o }", endpoint + "/redirect/301", CSV, 2, file_path)
+
+    assert file_path.read_bytes() == b"s\r\nhttp://example.org/s\r\n"
+
+
+@pytest.mark.parametrize("status, exception", [
+    (400, SPARQLExceptions.QueryBadFormed),
+    (401, SPARQLExceptions.Unauthorized),
+    (404, SPARQLExceptions.EndPointNotFound),
+    (414, SPARQLExceptions.URITooLong),
+    (500, SPARQLExceptions.EndPointInternalError),
+    (503, querPy.Endpoint_http_error),
+])
+def test_raises_sparqlwrapper_exceptions(endpoint, client, status, exception):
+
+    with pytest.raises(exception):
+        client.execute_query("SELECT * WHERE { ?s ?p ?o }", endpoint + "/status/" + str(status), CSV, 2)
+
+
+@pytest.mark.parametrize("status", [ 201, 304 ])
+def test_convert_only_accepts_2xx(client, status):
+
+    if status == 201:
+        assert client.convert(status, {}, b"body", CSV) == b"body"
+    else:
+        with pytest.raises(querPy.Endpoint_http_error):
+            client.convert(status, {}, b"", CSV)
+
+
+class Scripted_handler(socketserver.BaseRequestHandler):
+    """Answers the requests on the n-th connection with the raw responses server.scripts[n], then closes it"""
+
+    def handle(self):
+
+        with self.server.lock:
+            script = self.server.scripts[self.server.connections_count]
+            self.server.connections_count += 1
+
+        for response in script:
+            request = b""
+            while b"\r\n\r\n" not in request:
+                data = self.request.recv(65536)
+                if data == b"":
+                    return
+                request += data
+            self.request.sendall(response)
+
+
+@pytest.fixture
+def scripted_endpoint():
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Scripted_handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections_count = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get_response(body):
+    return b"HTTP/1.1 200 OK\r\nContent-Type: text/csv\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+
+
+@pytest.mark.parametrize("status_line", [ b"garbage\r\n", b"HTTP/1.1\r\n", b"HTTP/1.1 OK 200\r\n" ])
+def test_invalid_status_line_raises_connection_error(scripted_endpoint, client, status_line):
+
+    scripted_endpoint.scripts = [ [ status_line + b"\r\n" ] ]
+    endpoint = "http://127.0.0.1:" + str(scripted_endpoint.server_address[1]) + "/sparql"
+
+    with pytest.raises(querPy.Endpoint_connection_error):
+        client.execute_query("SELECT * WHERE { ?s ?p ?o }", endpoint, CSV, 2)
+
+
+def test_reused_connection_closed_before_response_is_tried_again(scripted_endpoint, client, tmp_path):
+
+    scripted_endpoint.scripts = [ [ get_response(b"s\r\n1\r\n"), b"" ], [ get_response(b"s\r\n2\r\n") ] ]
+    endpoint = "http://127.0.0.1:" + str(scripted_endpoint.server_address[1]) + "/sparql"
+    file_path = tmp_path / "results.csv"
+
+    client.execute_query_to_file("SELECT * WHERE { ?s ?p ?o }", endpoint, CSV, 1, file_path)
+    client.execute_query_to_file("SELECT * WHERE { ?s ?p ?o }", endpoint, CSV, 1, file_path)
+
+    assert file_path.read_bytes() == b"s\r\n2\r\n"
+
+
+def test_reused_connection_closed_during_body_is_not_tried_again(scripted_endpoint, client, tmp_path):
+
+    response = get_response(b"s\r\n2\r\n3\r\n")
+    scripted_endpoint.scripts = [ [ get_response(b"s\r\n1\r\n"), response[:-4] ], [ response ] ]
+    endpoint = "http://127.0.0.1:" + str(scripted_endpoint.server_address[1]) + "/sparql"
+    file_path = tmp_path / "results.csv"
+
+    # the body is passed to the file in chunks, the first of which arrives before the connection is closed
+    client.stream_chunk_size = 4
+
+    client.execute_query_to_file("SELECT * WHERE { ?s ?p ?o }", endpoint, CSV, 1, file_path)
+    with pytest.raises(querPy.Endpoint_connection_error):
+        client.execute_query_to_file("SELECT * WHERE { ?s ?p ?o }", endpoint, CSV, 1, file_path)
+
+    # what arrived of the body is not followed by the whole body once more
+    assert file_path.read_bytes() == b"s\r\n2"
@@ -0,0 +1,80 @@
+import datetime
+import types
+
+import pytest
+
+import querPy
+
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+@pytest.fixture
+def output_writer(tmp_path, monkeypatch):
+
+    # few rows per worksheet, so that results are continued in further worksheets
+    monkeypatch.setattr(querPy.Output_writer, "xlsx_max_rows", 4)
+
+    checkpoint_journal = querPy.Checkpoint_journal(tmp_path / "checkpoints" / "collection.json", False)
+    checkpoint_journal.start("collection.py", "260101_120000")
+    checkpoint_journal.start_iteration(0, False)
+
+    query_collection_data_object = types.SimpleNamespace(
+        title="collection",
+        description="",
+        endpoint="http://127.0.0.1:1/sparql",
+        timestamp_start="260101_120000",
+        output_destination=str(tmp_path / "out"),
+        output_format="XLSX",
+        summary_sample_limit=0,
+        write_empty_results=False,
+        google_rate_limit=None,
+        xlsx_constant_memory=True,
+        checkpoint_journal=checkpoint_journal,
+    )
+
+    output_writer = querPy.Output_writer(query_collection_data_object)
+    output_writer.write_header_summary(query_collection_data_object)
+
+    return output_writer
+
+
+def write_results(output_writer, rows):
+
+    query_data_object = types.SimpleNamespace(
+        id=1,
+        title="results",
+        results_restored=False,
+        results_reused=False,
+        results_matrix=querPy.Results_matrix.from_rows(rows),
+    )
+    output_writer.write_query_result(query_data_object)
+    output_writer.close()
+
+    return openpyxl.load_workbook(str(output_writer.file_xlsx))
+
+
+def get_values(worksheet):
+
+    return [ [ cell.value for cell in row ] for row in worksheet.iter_rows() ]
+
+
+def test_results_are_continued_in_further_worksheets(output_writer):
+
+    rows = [ [ "s", "n" ] ] + [ [ "s" + str(y), str(y) ] for y in range(1, 9) ]
+    workbook = write_results(output_writer, rows)
+
+    assert workbook.sheetnames == [ "0. Summary", "1results", "1results (2)", "1results (3)" ]
+    assert get_values(workbook["1results"]) == [ [ "s", "n" ], [ "s1", 1 ], [ "s2", 2 ], [ "s3", 3 ] ]
+    assert get_values(workbook["1results (2)"]) == [ [ "s", "n" ], [ "s4", 4 ], [ "s5", 5 ], [ "s6", 6 ] ]
+    assert get_values(workbook["1results (3)"]) == [ [ "s", "n" ], [ "s7", 7 ], [ "s8", 8 ] ]
+
+
+def test_results_fitting_into_one_worksheet(output_writer):
+
+    rows = [ [ "d" ], [ "2020-01-31" ], [ "2021-12-01" ], [ "2022-02-02" ] ]
+    workbook = write_results(output_writer, rows)
+
+    assert workbook.sheetnames == [ "0. Summary", "1results" ]
+    assert get_values(workbook["1results"]) == [
+        [ "d" ], [ datetime.datetime(2020, 1, 31) ], [ datetime.datetime(2021, 12, 1) ], [ datetime.datetime(2022, 2, 2) ] ]
@@ -0,0 +1,98 @@
+import datetime
+import xml.etree.ElementTree
+
+import pytest
+
+import querPy
+
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+RESULTS = ('<?xml version="1.0"?>\n'
+           '<sparql xmlns="http://www.w3.org/2005/sparql-results#">\n'
+           '  <head><variable name="s"/><variable name="count"/><variable name="label"/><variable name="date"/></head>\n'
+           '  <results>\n'
+           '    <result>\n'
+           '      <binding name="s"><uri>http://ex.org/1</uri></binding>\n'
+           '      <binding name="count"><literal datatype="' + XSD + 'integer">1</literal></binding>\n'
+           '      <binding name="label"><literal xml:lang="de">Käse</literal></binding>\n'
+           '      <binding name="date"><literal datatype="' + XSD + 'date">2020-01-31</literal></binding>\n'
+           '    </result>\n'
+           '    <result>\n'
+           '      <binding name="count"><literal datatype="' + XSD + 'integer">2</literal></binding>\n'
+           '      <binding name="s"><bnode>b0</bnode></binding>\n'
+           '      <binding name="label"><literal>7</literal></binding>\n'
+           '    </result>\n'
+           '    <result>\n'
+           '      <binding name="s"><uri>http://ex.org/3</uri></binding>\n'
+           '      <binding name="count"><literal datatype="' + XSD + 'integer">3</literal></binding>\n'
+           '      <binding name="label"><literal></literal></binding>\n'
+           '      <binding name="date"><literal datatype="' + XSD + 'date">2021-12-01</literal></binding>\n'
+           '    </result>\n'
+           '  </results>\n'
+           '</sparql>\n').encode('utf-8')
+
+
+def parse(results, limit=None, chunk_size=None):
+
+    parser = querPy.Xml_results_parser(limit)
+    chunk_size = chunk_size or len(results)
+    for start in range(0, len(results), chunk_size):
+        parser.feed(results[start:start + chunk_size])
+    parser.close()
+
+    return parser
+
+
+def test_values_are_collected_by_variable():
+
+    results_matrix = parse(RESULTS).get_results_matrix()
+
+    assert list(results_matrix) == [
+        [ "s", "count", "label", "date" ],
+        [ "http://ex.org/1", 1, "Käse", datetime.date(2020, 1, 31) ],
+        [ "b0", 2, "7", "" ],
+        [ "http://ex.org/3", 3, "", datetime.date(2021, 12, 1) ],
+    ]
+    assert results_matrix.column_types == [ str, int, str, datetime.date ]
+
+
+def test_results_fed_in_chunks_are_the_same():
+
+    # also splits the two bytes of 'ä'
+    assert list(parse(RESULTS, chunk_size=1).get_results_matrix()) == list(parse(RESULTS).get_results_matrix())
+
+
+def test_limit_collects_first_rows_but_counts_all():
+
+    parser = parse(RESULTS, limit=2)
+
+    assert parser.rows_count == 3
+    assert [ row[1] for row in parser.get_results_matrix() ] == [ "count", 1, 2 ]
+
+
+def test_empty_results():
+
+    parser = parse(b'<?xml version="1.0"?><sparql xmlns="http://www.w3.org/2005/sparql-results#">'
+                   b'<head><variable name="s"/></head><results/></sparql>')
+
+    assert parser.rows_count == 0
+    assert list(parser.get_results_matrix()) == [ [ "s" ] ]
+
+
+def test_incomplete_results_are_rejected():
+
+    with pytest.raises(xml.etree.ElementTree.ParseError):
+        parse(RESULTS[:len(RESULTS) // 2])
+
+
+def test_variables_not_in_head_are_put_last():
+
+    results = (b'<?xml version="1.0"?><sparql xmlns="http://www.w3.org/2005/sparql-results#">'
+               b'<head><variable name="a"/></head><results>'
+               b'<result><binding name="a"><literal>x</literal></binding></result>'
+               b'<result><binding name="b"><literal>y</literal></binding></result>'
+               b'<result><binding name="a"><literal>z</literal></binding><binding name="b"><literal>w</literal></binding></result>'
+               b'</results></sparql>')
+
+    assert list(parse(results).get_results_matrix()) == [ [ "a", "b" ], [ "x", "" ], [ "", "y" ], [ "z", "w" ] ]